@@ -0,0 +1,109 @@
+"""
+Spatial join between weather alerts and the entities they affect.
+
+Camps, victims, volunteers and open help requests are loaded into a single
+SphericalKDTree (items are (entity_type, id) pairs), and every alert's
+circle is answered from that one index. The results are stored as
+WeatherAlertImpact rows whenever an alert is created or moves, so reading
+an alert's impacted sets is a plain indexed lookup.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from operations.utils import SphericalKDTree, bounding_box_filter
+
+
+IMPACT_ALERT_STATUSES = ['forecast', 'active', 'warning']
+IMPACT_HELP_REQUEST_STATUSES = ['pending', 'in_progress']
+# Alert fields that change which entities are impacted
+IMPACT_ALERT_FIELDS = {'latitude', 'longitude', 'affected_radius_km', 'status'}
+# Beyond this many alerts the index is built over every located entity
+# instead of OR-ing one bounding box per alert into the queries
+MAX_REGION_ALERTS = 50
+
+
+def _entity_querysets():
+    from users.models import User
+    from shelters.models import Camp
+    from operations.models import HelpRequest
+
+    located = Q(latitude__isnull=False, longitude__isnull=False)
+    return [
+        ('camp', Camp.objects.filter(located).exclude(status='closed')),
+        ('victim', User.objects.filter(located, role='victim', is_active=True)),
+        ('volunteer', User.objects.filter(located, role='volunteer', is_active=True)),
+        ('help_request', HelpRequest.objects.filter(located, status__in=IMPACT_HELP_REQUEST_STATUSES)),
+    ]
+
+
+def affects_area(alert):
+    """Whether an alert currently has an area that can impact anything"""
+    return (
+        alert.status in IMPACT_ALERT_STATUSES
+        and alert.latitude is not None
+        and alert.longitude is not None
+        and alert.affected_radius_km is not None
+        and float(alert.affected_radius_km) > 0
+    )
+
+
+def build_impact_index(alerts=None):
+    """
+    Build one spatial index over every impactable entity type.
+    When alerts are given, only entities inside their bounding boxes are loaded
+    """
+    region = None
+    if alerts is not None and len(alerts) <= MAX_REGION_ALERTS:
+        region = Q(pk__in=[])
+        for alert in alerts:
+            region |= bounding_box_filter(alert.latitude, alert.longitude, alert.affected_radius_km)
+
+    points, items = [], []
+    for entity_type, queryset in _entity_querysets():
+        if region is not None:
+            queryset = queryset.filter(region)
+        for entity_id, lat, lon in queryset.values_list('id', 'latitude', 'longitude'):
+            points.append((lat, lon))
+            items.append((entity_type, entity_id))
+    return SphericalKDTree(points, items)
+
+
+def compute_alert_impacts(alerts, index=None):
+    """
+    Recompute and store the impacted entities of each alert.
+    One index is shared by all the alerts; returns the number of impacts written
+    """
+    from .models import WeatherAlertImpact
+
+    alerts = list(alerts)
+    located = [alert for alert in alerts if affects_area(alert)]
+    if index is None and located:
+        index = build_impact_index(located)
+
+    impacts = []
+    for alert in located:
+        for (entity_type, entity_id), distance in index.query(
+            alert.latitude, alert.longitude, k=len(index), radius_km=float(alert.affected_radius_km)
+        ):
+            impacts.append(WeatherAlertImpact(
+                weather_alert=alert,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                distance_km=distance
+            ))
+
+    with transaction.atomic():
+        WeatherAlertImpact.objects.filter(weather_alert__in=[alert.pk for alert in alerts]).delete()
+        WeatherAlertImpact.objects.bulk_create(impacts, batch_size=1000)
+    return len(impacts)
+
+
+def recompute_all_impacts():
+    """Recompute impacts of every weather alert against one shared index"""
+    from .models import WeatherAlert, WeatherAlertImpact
+
+    alerts = list(WeatherAlert.objects.all())
+    if not any(affects_area(alert) for alert in alerts):
+        WeatherAlertImpact.objects.all().delete()
+        return 0
+    return compute_alert_impacts(alerts, build_impact_index())
@@ -0,0 +1,26 @@
+"""
+Django management command to recompute the impacted entities of every weather alert.
+
+Impacts are computed when an alert is saved; run this periodically (or after
+large location changes) to pick up camps, users and help requests that moved
+into or out of an alert's area since then.
+
+Usage:
+    python manage.py recompute_weather_alert_impacts
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from alerts.impacts import recompute_all_impacts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the camps, victims, volunteers and help requests impacted by each weather alert'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = recompute_all_impacts()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] {total} impacts written in {elapsed:.2f}s'))
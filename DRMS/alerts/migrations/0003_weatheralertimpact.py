@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-17 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0002_weatheralert_weatheralertstatushistory_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherAlertImpact',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(choices=[('camp', 'Camp'), ('victim', 'Victim'), ('volunteer', 'Volunteer'), ('help_request', 'Help Request')], max_length=20)),
+                ('entity_id', models.PositiveIntegerField(help_text='Primary key of the camp, user or help request')),
+                ('distance_km', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('weather_alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impacts', to='alerts.weatheralert')),
+            ],
+            options={
+                'db_table': 'weather_alert_impacts',
+                'indexes': [models.Index(fields=['weather_alert', 'entity_type', 'distance_km'], name='weather_ale_weather_4c9298_idx'), models.Index(fields=['entity_type', 'entity_id'], name='weather_ale_entity__02ec08_idx')],
+                'constraints': [models.CheckConstraint(check=models.Q(('entity_type__in', ['camp', 'victim', 'volunteer', 'help_request'])), name='valid_impact_entity_type')],
+                'unique_together': {('weather_alert', 'entity_type', 'entity_id')},
+            },
+        ),
+    ]
@@ -186,4 +186,37 @@ class WeatherAlertStatusHistory(models.Model):
         ]
 
     def __str__(self):
-        return f"WeatherAlert {self.weather_alert_id}: {self.previous_status}->{self.new_status}"
\ No newline at end of file
+        return f"WeatherAlert {self.weather_alert_id}: {self.previous_status}->{self.new_status}"
+
+class WeatherAlertImpact(models.Model):
+    """Entity (camp, victim, volunteer or open help request) inside a weather alert's radius."""
+    ENTITY_TYPE_CHOICES = [
+        ('camp', 'Camp'),
+        ('victim', 'Victim'),
+        ('volunteer', 'Volunteer'),
+        ('help_request', 'Help Request'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    weather_alert = models.ForeignKey(WeatherAlert, on_delete=models.CASCADE, related_name='impacts')
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPE_CHOICES)
+    entity_id = models.PositiveIntegerField(help_text="Primary key of the camp, user or help request")
+    distance_km = models.FloatField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'weather_alert_impacts'
+        unique_together = ['weather_alert', 'entity_type', 'entity_id']
+        indexes = [
+            models.Index(fields=['weather_alert', 'entity_type', 'distance_km']),
+            models.Index(fields=['entity_type', 'entity_id']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(entity_type__in=['camp', 'victim', 'volunteer', 'help_request']),
+                name='valid_impact_entity_type'
+            )
+        ]
+
+    def __str__(self):
+        return f"WeatherAlert {self.weather_alert_id}: {self.entity_type} {self.entity_id} ({self.distance_km:.2f} km)"
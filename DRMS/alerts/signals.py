@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .impacts import IMPACT_ALERT_FIELDS, compute_alert_impacts
+from .models import WeatherAlert
+
+
+@receiver(post_save, sender=WeatherAlert)
+def weather_alert_saved(sender, instance, update_fields=None, **kwargs):
+    """Recompute the impacted entities when an alert is created, moves or changes status"""
+    if update_fields is not None and not IMPACT_ALERT_FIELDS & set(update_fields):
+        return
+    compute_alert_impacts([instance])
@@ -12,6 +12,7 @@ urlpatterns = [
     path('weather-alerts/create/', views.create_weather_alert, name='create_weather_alert'),
     path('weather-alerts/active/', views.active_weather_alerts, name='active_weather_alerts'),
     path('weather-alerts/high-risk/', views.high_risk_weather_alerts, name='high_risk_weather_alerts'),
+    path('weather-alerts/<int:alert_id>/impacts/', views.weather_alert_impacts, name='weather_alert_impacts'),
     path('weather-alerts/<int:alert_id>/status/', views.update_weather_alert_status, name='update_weather_alert_status'),
 ]
 
@@ -1,16 +1,22 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q, Count
+from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import timedelta
 import json
 
-from .models import Alert, AlertStatusHistory, WeatherAlert, WeatherAlertStatusHistory
+from .models import Alert, AlertStatusHistory, WeatherAlert, WeatherAlertStatusHistory, WeatherAlertImpact
 from disasters.models import Disasters
 from users.models import User
+from shelters.models import Camp
+from operations.models import HelpRequest
+from api.conditional import conditional_get
+from api.pagination import paginate_keyset, PaginationError
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -19,9 +25,11 @@ from users.models import User
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('alerts.Alert', 'disasters.Disasters')
 def list_alerts(request):
     """
     List all alerts with optional filtering
+    Paginated with ?cursor= and ?page_size=
     """
     alerts = Alert.objects.all()
     
@@ -40,10 +48,13 @@ def list_alerts(request):
     if disaster_id:
         alerts = alerts.filter(Disasters_id=disaster_id)
     
-    alerts = alerts.order_by('-issued_at')
+    try:
+        page = paginate_keyset(alerts.select_related('Disasters'), request.GET, ('-issued_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     alert_list = []
-    for alert in alerts:
+    for alert in page:
         alert_list.append({
             'id': alert.id,
             'disaster_id': alert.Disasters.id,
@@ -56,11 +67,12 @@ def list_alerts(request):
             'resolved_at': alert.resolved_at.isoformat() if alert.resolved_at else None
         })
     
-    return JsonResponse({'alerts': alert_list}, safe=False)
+    return JsonResponse({'alerts': alert_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('alerts.Alert', 'alerts.AlertStatusHistory', 'disasters.Disasters')
 def get_alert(request, alert_id):
     """
     Get a specific alert by ID
@@ -149,6 +161,7 @@ def create_alert(request):
 @login_required
 @require_http_methods(["PUT", "PATCH"])
 @csrf_exempt
+@transaction.atomic
 def update_alert_status(request, alert_id):
     """
     Update alert status (admin only)
@@ -250,9 +263,11 @@ def critical_alerts(request):
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('alerts.WeatherAlert')
 def list_weather_alerts(request):
     """
     List all weather alerts with optional filtering
+    Paginated with ?cursor= and ?page_size=
     """
     alerts = WeatherAlert.objects.all()
     
@@ -271,10 +286,13 @@ def list_weather_alerts(request):
     if weather_type:
         alerts = alerts.filter(weather_type=weather_type)
     
-    alerts = alerts.order_by('-forecast_date', '-risk_level')
+    try:
+        page = paginate_keyset(alerts.select_related('issued_by'), request.GET, ('-forecast_date', '-risk_level'))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     alert_list = []
-    for alert in alerts:
+    for alert in page:
         alert_list.append({
             'id': alert.id,
             'weather_type': alert.weather_type,
@@ -294,10 +312,10 @@ def list_weather_alerts(request):
             'issued_by': alert.issued_by.username if alert.issued_by else None,
             'issued_at': alert.issued_at.isoformat(),
             'expires_at': alert.expires_at.isoformat() if alert.expires_at else None,
-            'related_disaster_id': alert.related_disaster.id if alert.related_disaster else None
+            'related_disaster_id': alert.related_disaster_id
         })
     
-    return JsonResponse({'weather_alerts': alert_list}, safe=False)
+    return JsonResponse({'weather_alerts': alert_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -442,6 +460,7 @@ def high_risk_weather_alerts(request):
 @login_required
 @require_http_methods(["PUT", "PATCH"])
 @csrf_exempt
+@transaction.atomic
 def update_weather_alert_status(request, alert_id):
     """
     Update weather alert status (admin only)
@@ -488,3 +507,71 @@ def update_weather_alert_status(request, alert_id):
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def weather_alert_impacts(request, alert_id):
+    """
+    Paginated list of camps, victims, volunteers and open help requests
+    inside a weather alert's affected radius, nearest first (admin only)
+    """
+    if request.user.role not in ['super_admin', 'camp_admin']:
+        return JsonResponse({'error': 'Unauthorized. Admin role required.'}, status=403)
+    
+    alert = get_object_or_404(WeatherAlert, id=alert_id)
+    impacts = WeatherAlertImpact.objects.filter(weather_alert=alert)
+    
+    summary = {entity_type: 0 for entity_type, _ in WeatherAlertImpact.ENTITY_TYPE_CHOICES}
+    for row in impacts.values('entity_type').annotate(total=Count('id')):
+        summary[row['entity_type']] = row['total']
+    
+    # Filter by entity type
+    entity_type = request.GET.get('entity_type')
+    if entity_type:
+        if entity_type not in summary:
+            return JsonResponse({'error': f'Invalid entity_type. Must be one of: {list(summary)}'}, status=400)
+        impacts = impacts.filter(entity_type=entity_type)
+    
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+    except ValueError:
+        return JsonResponse({'error': 'page_size must be a number'}, status=400)
+    
+    paginator = Paginator(impacts.order_by('distance_km', 'entity_type', 'entity_id'), page_size)
+    page = paginator.get_page(request.GET.get('page'))
+    
+    # Look up the names of the impacted entities on this page only
+    ids = {entity_type: [] for entity_type in summary}
+    for impact in page:
+        ids[impact.entity_type].append(impact.entity_id)
+    labels = {}
+    if ids['camp']:
+        for camp_id, name in Camp.objects.filter(id__in=ids['camp']).values_list('id', 'name'):
+            labels[('camp', camp_id)] = name
+    user_ids = ids['victim'] + ids['volunteer']
+    if user_ids:
+        for user_id, username in User.objects.filter(id__in=user_ids).values_list('id', 'username'):
+            labels[('victim', user_id)] = labels[('volunteer', user_id)] = username
+    if ids['help_request']:
+        for request_id, location in HelpRequest.objects.filter(id__in=ids['help_request']).values_list('id', 'location'):
+            labels[('help_request', request_id)] = location
+    
+    impact_list = []
+    for impact in page:
+        impact_list.append({
+            'entity_type': impact.entity_type,
+            'entity_id': impact.entity_id,
+            'name': labels.get((impact.entity_type, impact.entity_id)),
+            'distance_km': round(impact.distance_km, 2),
+            'computed_at': impact.computed_at.isoformat()
+        })
+    
+    return JsonResponse({
+        'alert_id': alert.id,
+        'summary': summary,
+        'count': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'impacts': impact_list
+    })
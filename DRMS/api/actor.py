@@ -0,0 +1,93 @@
+"""
+The requesting user's role and the profile rows permission checks need.
+
+ActorMiddleware puts a lazy request.actor on every request. It is resolved
+on first use, after authentication (session or JWT, since DRF sets the
+user on the underlying request too), with one joined query for the
+CampAdmin, Volunteer and Victim rows of the user, and kept for the rest of
+the request. With a shared cache backend the profile ids are also cached
+per user across requests, so most requests resolve the actor without any
+query; api.signals drops the cached entry when one of those rows is saved
+or deleted. A process-local cache would only be cleared in the worker
+that saved the row, leaving the others with a stale camp_id, so there the
+ids are read once per request. The role is always read from request.user.
+
+Usage:
+    actor = request.actor
+    if actor.role == 'camp_admin' and actor.camp_id != camp.id:
+        return Response({'error': '...'}, status=status.HTTP_403_FORBIDDEN)
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .conditional import cache_is_shared
+
+
+ACTOR_CACHE_KEY = 'api:actor:{user_id}'
+# Bounds how long writes that bypass the signals (queryset .update()) go unnoticed
+ACTOR_CACHE_TTL = 300
+
+PROFILE_FIELDS = {
+    'camp_admin_id': 'campadmin__id',
+    'camp_id': 'campadmin__camp_id',
+    'volunteer_id': 'volunteer__id',
+    'victim_id': 'victim__id',
+}
+
+
+class Actor:
+    """Role and profile ids of a user; the ids are None where there is no profile"""
+
+    def __init__(self, user_id=None, role=None, camp_admin_id=None, camp_id=None, volunteer_id=None, victim_id=None):
+        self.user_id = user_id
+        self.role = role
+        self.camp_admin_id = camp_admin_id
+        self.camp_id = camp_id
+        self.volunteer_id = volunteer_id
+        self.victim_id = victim_id
+
+    def __repr__(self):
+        return f'<Actor user={self.user_id} role={self.role} camp={self.camp_id}>'
+
+
+def _load_profile_ids(user_id):
+    from users.models import User
+
+    row = User.objects.filter(pk=user_id).values(*PROFILE_FIELDS.values()).first() or {}
+    return {name: row.get(lookup) for name, lookup in PROFILE_FIELDS.items()}
+
+
+def _profile_ids(user_id):
+    if not cache_is_shared():
+        return _load_profile_ids(user_id)
+    key = ACTOR_CACHE_KEY.format(user_id=user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = _load_profile_ids(user_id)
+        cache.set(key, ids, timeout=ACTOR_CACHE_TTL)
+    return ids
+
+
+def actor_for_user(user):
+    if user is None or not user.is_authenticated:
+        return Actor()
+    return Actor(user_id=user.pk, role=user.role, **_profile_ids(user.pk))
+
+
+def forget_actor(user_id):
+    """Drop the cached profile ids of a user once the current transaction commits"""
+    key = ACTOR_CACHE_KEY.format(user_id=user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class ActorMiddleware:
+    """Sets a lazy request.actor; place it after AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.actor = SimpleLazyObject(lambda: actor_for_user(getattr(request, 'user', None)))
+        return self.get_response(request)
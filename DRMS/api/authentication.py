@@ -0,0 +1,183 @@
+"""
+JWT authentication that does not load the user row on reads.
+
+Access tokens carry the user's id, username, role, flags and camp id as
+claims, plus a stamp: a hash of those values. The stamp of each user's
+current values is kept in the cache, written whenever the user is loaded
+from the database and dropped by api.signals when the user or their
+CampAdmin row changes. A safe (GET/HEAD/OPTIONS) request whose token stamp
+matches the cached one is authenticated from the claims alone, as a User
+instance built with User.from_db where every other field is deferred;
+touching one of those loads them all in one query. Writes, tokens without
+a stamp and stale stamps go through the database as before.
+
+The claims are only trusted with a shared cache backend. A process-local
+cache (local-memory, the default) would keep a stamp in every worker but
+the one that dropped it, so deactivated users, demoted admins and moved
+camp admins would keep their old claims there until the token expires.
+With such a cache every request loads the user from the database, as
+JWTAuthentication does.
+
+Tokens are issued with the claims by ClaimsRefreshToken, which the login,
+register, token and token refresh endpoints use.
+
+Usage:
+    REST_FRAMEWORK = {
+        'DEFAULT_AUTHENTICATION_CLASSES': ('api.authentication.ClaimsJWTAuthentication',),
+    }
+"""
+import hashlib
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .actor import actor_for_user
+from .conditional import cache_is_shared
+
+
+# User fields copied into the token; a user built from the claims has only these loaded
+CLAIM_FIELDS = ('username', 'role', 'is_active', 'is_staff', 'is_superuser')
+STAMP_CLAIM = 'stamp'
+CAMP_CLAIM = 'camp_id'
+
+STAMP_CACHE_KEY = 'api:auth_stamp:{user_id}'
+# Token issue writes last_login at most this often per user
+LAST_LOGIN_UPDATE_INTERVAL = timedelta(minutes=15)
+
+
+def profile_stamp(values):
+    """Hash of the claim values (CLAIM_FIELDS and camp id) of a user"""
+    parts = [str(values[name]) for name in CLAIM_FIELDS + (CAMP_CLAIM,)]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def user_claims(user):
+    claims = {name: getattr(user, name) for name in CLAIM_FIELDS}
+    claims[CAMP_CLAIM] = actor_for_user(user).camp_id
+    claims[STAMP_CLAIM] = profile_stamp(claims)
+    return claims
+
+
+def remember_stamp(user_id, stamp):
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(STAMP_CACHE_KEY.format(user_id=user_id), stamp, timeout=timeout)
+
+
+def forget_stamp(user_id):
+    """Send the user's next requests through the database, once the current transaction commits"""
+    key = STAMP_CACHE_KEY.format(user_id=user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def touch_last_login(user):
+    """update_last_login(), skipped when the recorded login is recent enough"""
+    if user.last_login is None or timezone.now() - user.last_login >= LAST_LOGIN_UPDATE_INTERVAL:
+        update_last_login(None, user)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user claims"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for name, value in user_claims(user).items():
+            token[name] = value
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        touch_last_login(self.user)
+        return data
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refreshes the claims along with the access token"""
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(data.get('refresh', attrs['refresh']))
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is not None:
+            for name, value in user_claims(user).items():
+                refresh[name] = value
+            data['access'] = str(refresh.access_token)
+            if 'refresh' in data:
+                data['refresh'] = str(refresh)
+        return data
+
+
+def _load_all_deferred(user):
+    # Deferred attribute access reloads one field per query; load the rest at once
+    refresh_from_db = user.refresh_from_db
+
+    def load(using=None, fields=None):
+        deferred = user.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = list(deferred)
+        refresh_from_db(using=using, fields=fields)
+
+    user.refresh_from_db = load
+    return user
+
+
+def claims_user(token):
+    """A User with the token's claim fields loaded and every other field deferred"""
+    User = get_user_model()
+    # The id claim is a string; typed, so the user compares equal to a loaded one
+    values = {User._meta.pk.attname: User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])}
+    values.update((name, token[name]) for name in CLAIM_FIELDS)
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return _load_all_deferred(User.from_db(None, names, [values[name] for name in names]))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication answering safe requests from the token claims while the stamp is current"""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS and cache_is_shared():
+            user = self.get_claims_user(validated_token)
+            if user is not None:
+                return user, validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        """The user built from the claims, or None when they cannot be trusted"""
+        stamp = validated_token.get(STAMP_CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if stamp is None or user_id is None:
+            return None
+        if cache.get(STAMP_CACHE_KEY.format(user_id=user_id)) != stamp:
+            return None
+        return claims_user(validated_token)
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if cache_is_shared():
+            remember_stamp(user.pk, user_claims(user)[STAMP_CLAIM])
+        return user
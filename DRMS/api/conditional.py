@@ -0,0 +1,248 @@
+"""
+Conditional GET (ETag / If-None-Match) for the read-heavy list and detail
+endpoints.
+
+Every model an endpoint reads has a version counter, bumped by signals
+after any save or delete of that model is committed (and explicitly by the
+bulk_update/bulk_create paths, which send no signals). The ETag of a
+response is a hash of the versions of the models the endpoint reads, the
+user, the full path and the Accept header. A request whose If-None-Match
+still matches gets a 304 before the view runs any other query or any
+serialization.
+
+HelpRequest and Donation are written too often for a counter: every save
+would UPDATE the same model_versions row (or cache key), serializing all
+writers on it. Their version is read from the table instead, as the
+newest updated_at and the row count (see STATE_MODELS).
+
+The counters must be seen by every worker process. With a shared cache
+backend (Redis, Memcached) they live in the cache, and reading them costs
+a handful of cache reads. With a process-local backend (local-memory,
+dummy) they live in the model_versions table instead, read with one query
+and bumped with one UPDATE per commit.
+
+Last-Modified is not used: HTTP dates have one-second resolution, so two
+changes within the same second would be missed.
+
+Usage:
+    @login_required
+    @require_http_methods(["GET"])
+    @conditional_get('disasters.Disasters', 'shelters.Camp')
+    def list_disasters(request):
+        ...
+
+    class DisasterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+        version_models = ('disasters.Disasters',)
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+VERSION_KEY_PREFIX = 'api:version:'
+
+# Models whose versions are kept; each is bumped by api.signals. users.User
+# is left out on purpose: last_login and location pings write to it all the
+# time, so a renamed user shows up with the next change to the other models
+VERSIONED_MODELS = (
+    'disasters.Disasters',
+    'shelters.Camp',
+    'users.CampAdmin',
+    'alerts.Alert',
+    'alerts.AlertStatusHistory',
+    'alerts.WeatherAlert',
+    'alerts.WeatherAlertStatusHistory',
+    'relief.Resource',
+    'relief.ResourceRequest',
+    'relief.ResourceInventoryTransaction',
+)
+
+# High-churn models versioned by the state of their table: the newest value
+# of the field below (indexed, and kept current by every write path,
+# bulk_update included) plus the row count, which catches deletes.
+# Saving or deleting a DonationItem moves its donation's updated_at
+STATE_MODELS = {
+    'operations.HelpRequest': 'updated_at',
+    'operations.Donation': 'updated_at',
+}
+
+
+def cache_is_shared():
+    """
+    Whether the default cache is seen by every worker process. The
+    local-memory and dummy backends are not, so another worker's writes
+    never reach them
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def _version_key(label):
+    return f'{VERSION_KEY_PREFIX}{label.lower()}'
+
+
+def _new_version():
+    # Seeded from the clock so a version lost from the cache never comes back
+    # with a value an old ETag was computed from
+    return time.time_ns()
+
+
+def _cached_versions(labels):
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _stored_versions(labels):
+    from .models import ModelVersion
+
+    names = [label.lower() for label in labels]
+    versions = dict(ModelVersion.objects.filter(label__in=names).values_list('label', 'version'))
+    missing = [name for name in names if name not in versions]
+    if missing:
+        ModelVersion.objects.bulk_create(
+            [ModelVersion(label=name, version=_new_version()) for name in missing], ignore_conflicts=True
+        )
+        versions.update(ModelVersion.objects.filter(label__in=missing).values_list('label', 'version'))
+    return [versions[name] for name in names]
+
+
+def _table_state(label):
+    from django.apps import apps
+
+    model = apps.get_model(label)
+    state = model._default_manager.aggregate(latest=Max(STATE_MODELS[label]), rows=Count('pk'))
+    latest = state['latest'].isoformat() if state['latest'] else ''
+    return f"{latest}/{state['rows']}"
+
+
+def get_versions(labels):
+    """Return the current version of each model label, creating missing ones"""
+    counted = [label for label in labels if label not in STATE_MODELS]
+    versions = {}
+    if counted:
+        versions.update(zip(counted, _cached_versions(counted) if cache_is_shared() else _stored_versions(counted)))
+    for label in labels:
+        if label in STATE_MODELS:
+            versions[label] = _table_state(label)
+    return [versions[label] for label in labels]
+
+
+def _bump(labels):
+    if not cache_is_shared():
+        from .models import ModelVersion
+
+        # A missing row is created on its next read, with a fresh version
+        ModelVersion.objects.filter(label__in=[label.lower() for label in labels]).update(
+            version=F('version') + 1
+        )
+        return
+    for label in labels:
+        key = _version_key(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def bump_versions(*labels):
+    """
+    Mark the models as changed once the current transaction commits, so a
+    request racing the commit cannot tag the old data with the new version
+    """
+    transaction.on_commit(lambda: _bump(labels))
+
+
+def compute_etag(request, labels):
+    user = request.user
+    parts = [
+        str(user.pk), getattr(user, 'role', '') or '',
+        request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+    ]
+    parts.extend(str(version) for version in get_versions(labels))
+    return '"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    """The 304 response if If-None-Match matches the ETag, else None"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if isinstance(response, HttpResponseNotModified):
+        return response
+    return None
+
+
+def _tag_response(request, response, etag):
+    if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        # Clients may keep the response but must revalidate it every time
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(*labels):
+    """
+    View decorator answering If-None-Match with a 304 while none of the
+    models has changed. Place it below the authentication decorators
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag = compute_etag(request, labels)
+            response = _not_modified(request, etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _tag_response(request, response, etag)
+        return wrapped
+
+    return decorator
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    conditional_get() for ViewSets: safe requests whose If-None-Match
+    matches the versions of version_models are answered with a 304 right
+    after authentication and permission checks
+    """
+    version_models = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = None
+        if request.method in ('GET', 'HEAD') and self.version_models:
+            self._etag = compute_etag(request, self.version_models)
+            response = _not_modified(request, self._etag)
+            if response is not None:
+                raise _NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_etag', None)
+        if etag:
+            _tag_response(request, response, etag)
+        return response
@@ -0,0 +1,126 @@
+"""
+Admin dashboard statistics.
+
+The figures are read from the stat counters (api.stats) in one query and
+served from a short-lived cached snapshot per role. Recomputation is
+single-flight: when the snapshot goes stale, one request takes a lock in
+the cache and recomputes while the others keep serving the stale
+snapshot, so a burst of dashboard loads costs one recompute. A request
+finding no snapshot at all waits for the recompute in flight instead of
+starting its own, and takes over if that recompute fails.
+"""
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .stats import read_counters
+
+
+DASHBOARD_CACHE_KEY = 'api:admin_dashboard:{role}'
+DASHBOARD_TTL = 30  # seconds a snapshot is served as fresh
+# A stale snapshot is kept this much longer, to be served while it is recomputed
+DASHBOARD_STALE_TTL = 300
+# Longest a recompute may hold the lock before another request takes over
+RECOMPUTE_LOCK_TIMEOUT = 30
+RECOMPUTE_POLL_INTERVAL = 0.05
+
+
+def compute_admin_stats():
+    """Dashboard figures, read from the stat counters in one query"""
+    counters = read_counters(
+        'users.user', 'disasters.disasters', 'shelters.camp', 'relief.resource', 'relief.resourcerequest',
+        'operations.donation', 'operations.donationitem', 'operations.helprequest', 'alerts.alert',
+        'alerts.weatheralert', 'operations.taskassignment'
+    )
+    count = counters.count
+    return {
+        "users": {
+            "total": count('users.user'),
+            "volunteers": count('users.user', 'role', 'volunteer'),
+            "victims": count('users.user', 'role', 'victim'),
+            "admins": count('users.user', 'role', 'super_admin') + count('users.user', 'role', 'camp_admin'),
+        },
+        "disasters": {
+            "total": count('disasters.disasters'),
+            "active": count('disasters.disasters', 'status', 'active'),
+            "critical": count('disasters.disasters', 'active_severity', 'critical'),
+        },
+        "camps": {
+            "total": count('shelters.camp'),
+            "active": count('shelters.camp', 'status', 'active'),
+            "capacity_used": count('shelters.camp', 'capacity'),
+        },
+        "resources": {
+            "total": count('relief.resource'),
+            "active": count('relief.resource', 'is_active', 'True'),
+            "pending_requests": count('relief.resourcerequest', 'status', 'pending'),
+            "urgent_requests": count('relief.resourcerequest', 'pending_priority', 'urgent'),
+        },
+        "donations": {
+            "total": count('operations.donation'),
+            "this_month": count('operations.donation', 'month', timezone.localtime().strftime('%Y-%m')),
+            "total_items": count('operations.donationitem'),
+        },
+        "sos_requests": {
+            "total": count('operations.helprequest'),
+            "pending": count('operations.helprequest', 'status', 'pending'),
+            "in_progress": count('operations.helprequest', 'status', 'in_progress'),
+            "resolved": count('operations.helprequest', 'status', 'resolved'),
+        },
+        "alerts": {
+            "total": count('alerts.alert'),
+            "active": count('alerts.alert', 'status', 'active'),
+            "critical": count('alerts.alert', 'active_severity', 'critical'),
+        },
+        "weather_alerts": {
+            "total": count('alerts.weatheralert'),
+            "active": sum(count('alerts.weatheralert', 'status', name) for name in ('forecast', 'active', 'warning')),
+            "high_risk": sum(count('alerts.weatheralert', 'risk_level', name) for name in ('high', 'extreme')),
+        },
+        "tasks": {
+            "total": count('operations.taskassignment'),
+            "assigned": count('operations.taskassignment', 'status', 'assigned'),
+            "in_progress": count('operations.taskassignment', 'status', 'in_progress'),
+            "completed": count('operations.taskassignment', 'status', 'completed'),
+        },
+    }
+
+
+def cached_snapshot(key, compute, ttl, stale_ttl=DASHBOARD_STALE_TTL):
+    """
+    Return compute() through the cache, fresh for ttl seconds, with at most
+    one recompute in flight per key
+    """
+    entry = cache.get(key)
+    if entry is not None and entry['fresh_until'] > time.time():
+        return entry['value']
+
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + RECOMPUTE_LOCK_TIMEOUT
+    while True:
+        if cache.add(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+            try:
+                value = compute()
+                cache.set(key, {'value': value, 'fresh_until': time.time() + ttl}, timeout=ttl + stale_ttl)
+                return value
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            # Someone else is recomputing; the stale snapshot will do until then
+            return entry['value']
+        if time.monotonic() >= deadline:
+            return compute()
+
+        # No snapshot to serve: wait for the recompute in flight. If it fails,
+        # its lock goes away without a snapshot and the next add() above
+        # takes over, so a failed recompute is retried by one waiter at once
+        time.sleep(RECOMPUTE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+
+
+def admin_dashboard_stats(role):
+    return cached_snapshot(DASHBOARD_CACHE_KEY.format(role=role), compute_admin_stats, DASHBOARD_TTL)
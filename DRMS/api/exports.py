@@ -0,0 +1,175 @@
+"""
+Streaming NDJSON / CSV exports of the large audit and activity tables.
+
+Rows are read with values_list().iterator(chunk_size=...), so neither model
+instances nor the full result set are held in memory, and written out a
+chunk at a time through a StreamingHttpResponse. Memory use stays flat
+however many rows are exported.
+"""
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class ExportDataset:
+    """
+    A table that can be exported: its columns (values_list lookups), the
+    datetime field the since/until range applies to, and the lookups that
+    tie a row to a disaster or camp (several lookups are OR-ed together)
+    """
+
+    def __init__(self, model_path, columns, date_field, disaster_lookups=(), camp_lookups=()):
+        self.model_path = model_path
+        self.columns = columns
+        self.date_field = date_field
+        self.disaster_lookups = disaster_lookups
+        self.camp_lookups = camp_lookups
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    def queryset(self, since=None, until=None, disaster_id=None, camp_id=None):
+        queryset = self.model.objects.all()
+        if since:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': since})
+        if until:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': until})
+        for value, lookups, label in ((disaster_id, self.disaster_lookups, 'disaster'),
+                                      (camp_id, self.camp_lookups, 'camp')):
+            if not value:
+                continue
+            if not lookups:
+                raise ValueError(f'This export cannot be filtered by {label}')
+            query = Q()
+            for lookup in lookups:
+                query |= Q(**{lookup: value})
+            queryset = queryset.filter(query)
+        return queryset.order_by(self.date_field, 'id').values_list(*self.columns)
+
+
+HISTORY_COLUMNS = ['id', 'previous_status', 'new_status', 'changed_by_id', 'changed_by__username', 'note', 'changed_at']
+
+EXPORT_DATASETS = {
+    'inventory-transactions': ExportDataset(
+        'relief.ResourceInventoryTransaction',
+        ['id', 'resource_id', 'resource__name', 'transaction_type', 'quantity_delta', 'reason',
+         'related_request_id', 'related_donation_item_id', 'created_by_id', 'created_by__username', 'created_at'],
+        'created_at',
+        disaster_lookups=('related_request__camp__disasters_id', 'related_donation_item__donation__camp__disasters_id'),
+        camp_lookups=('related_request__camp_id', 'related_donation_item__donation__camp_id'),
+    ),
+    'help-requests': ExportDataset(
+        'operations.HelpRequest',
+        ['id', 'victim_id', 'victim__username', 'disasters_id', 'description', 'location',
+         'latitude', 'longitude', 'assigned_volunteer_id', 'status', 'requested_at'],
+        'requested_at',
+        disaster_lookups=('disasters_id',),
+    ),
+    'help-request-history': ExportDataset(
+        'operations.HelpRequestStatusHistory',
+        ['help_request_id'] + HISTORY_COLUMNS,
+        'changed_at',
+        disaster_lookups=('help_request__disasters_id',),
+    ),
+    'task-history': ExportDataset(
+        'operations.TaskAssignmentStatusHistory',
+        ['task_id'] + HISTORY_COLUMNS,
+        'changed_at',
+        disaster_lookups=('task__help_request__disasters_id',),
+    ),
+    'resource-request-history': ExportDataset(
+        'relief.ResourceRequestStatusHistory',
+        ['request_id'] + HISTORY_COLUMNS,
+        'changed_at',
+        disaster_lookups=('request__camp__disasters_id',),
+        camp_lookups=('request__camp_id',),
+    ),
+    'alert-history': ExportDataset(
+        'alerts.AlertStatusHistory',
+        ['alert_id'] + HISTORY_COLUMNS,
+        'changed_at',
+        disaster_lookups=('alert__Disasters_id',),
+    ),
+    'weather-alert-history': ExportDataset(
+        'alerts.WeatherAlertStatusHistory',
+        ['weather_alert_id'] + HISTORY_COLUMNS,
+        'changed_at',
+        disaster_lookups=('weather_alert__related_disaster_id',),
+    ),
+    'messages': ExportDataset(
+        'communication.Communication',
+        ['id', 'sender_id', 'sender__username', 'receiver_id', 'receiver__username',
+         'message_type', 'content', 'status', 'sent_at'],
+        'sent_at',
+    ),
+}
+
+
+def parse_export_bound(value, end=False):
+    """
+    Parse a since/until value: an ISO datetime, or a date meaning the start
+    of that day (the start of the next day for an inclusive 'until' date).
+    Raises ValueError if the value is neither
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f'Invalid date: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _column_name(column):
+    return column.replace('__', '_')
+
+
+class _Echo:
+    """File-like object whose write() returns the line for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(lines, size=EXPORT_CHUNK_SIZE):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_rows(dataset, queryset, export_format):
+    """Yield the encoded export in chunks of EXPORT_CHUNK_SIZE rows"""
+    names = [_column_name(column) for column in dataset.columns]
+    rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        lines = (writer.writerow(row) for row in rows)
+        yield writer.writerow(names)
+    else:
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+        lines = (encoder.encode(dict(zip(names, row))) + '\n' for row in rows)
+    yield from _chunks(lines)
+
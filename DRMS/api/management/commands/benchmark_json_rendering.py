@@ -0,0 +1,141 @@
+"""
+Django management command to compare JSON render times of the stdlib and
+fast (orjson) paths on list payloads shaped like the largest list endpoints.
+
+Three payloads are rendered:
+- help_requests: rows as built by the function-based list_help_requests view
+- weather_alerts: rows as built by list_weather_alerts, with raw Decimal
+  and datetime values instead of hand-converted floats and strings
+- serializer: HelpRequestSerializer output as rendered by the ViewSets
+
+Usage:
+    python manage.py benchmark_json_rendering
+
+    # Bigger payloads, more repetitions:
+    python manage.py benchmark_json_rendering --rows 20000 --repeat 10
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, FastJsonResponse, orjson
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks stdlib vs fast JSON rendering on large list payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Rows per payload',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Renders per measurement; the fastest is reported',
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast path falls back to the stdlib'))
+
+        payloads = self._payloads(rows)
+        renderer_context = {'indent': None}
+        for name, payload in payloads.items():
+            if name == 'serializer':
+                baseline = self._best(repeat, lambda: JSONRenderer().render(payload, 'application/json', renderer_context))
+                fast = self._best(repeat, lambda: FastJSONRenderer().render(payload, 'application/json', renderer_context))
+                labels = ('JSONRenderer', 'FastJSONRenderer')
+            else:
+                baseline = self._best(repeat, lambda: JsonResponse(payload))
+                fast = self._best(repeat, lambda: FastJsonResponse(payload))
+                labels = ('JsonResponse', 'FastJsonResponse')
+            self.stdout.write(
+                f"  {name:<15} {rows} rows: {labels[0]} {baseline * 1000:8.1f} ms | "
+                f"{labels[1]} {fast * 1000:8.1f} ms | {baseline / fast:5.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] JSON rendering benchmark complete'))
+
+    def _best(self, repeat, render):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _payloads(self, rows):
+        now = timezone.now()
+        help_requests = [{
+            'id': i,
+            'victim': f'victim{i}',
+            'victim_id': i,
+            'disaster_id': 1,
+            'disaster_name': 'Kerala Floods',
+            'description': 'Family of four stranded on the first floor, water rising',
+            'location': 'Chalakudy, Thrissur',
+            'latitude': 10.3 + i * 1e-5,
+            'longitude': 76.33 + i * 1e-5,
+            'assigned_volunteer_id': None,
+            'assigned_volunteer_username': None,
+            'status': 'pending',
+            'requested_at': (now - timedelta(minutes=i)).isoformat(),
+            'distance_km': round(i * 0.01, 2),
+        } for i in range(rows)]
+
+        weather_alerts = [{
+            'id': i,
+            'weather_type': 'heavy_rain',
+            'risk_level': 'high',
+            'status': 'active',
+            'location': 'Idukki',
+            'latitude': Decimal('9.849100') + i,
+            'longitude': Decimal('76.972900'),
+            'title': 'Red alert: extremely heavy rainfall',
+            'description': 'Rainfall above 204.5 mm expected over the next 24 hours',
+            'forecast_date': now + timedelta(hours=i),
+            'affected_radius_km': Decimal('35.50'),
+            'rainfall_mm': Decimal('210.40'),
+            'issued_at': now,
+            'expires_at': now + timedelta(days=1),
+        } for i in range(rows)]
+
+        serializer = [{
+            'id': i,
+            'victim': i,
+            'victim_name': f'victim{i}',
+            'disasters': 1,
+            'disaster_name': 'Kerala Floods',
+            'description': 'Family of four stranded on the first floor, water rising',
+            'location': 'Chalakudy, Thrissur',
+            'latitude': '10.300000',
+            'longitude': '76.330000',
+            'assigned_volunteer': None,
+            'assigned_volunteer_name': None,
+            'requested_at': (now - timedelta(minutes=i)).isoformat(),
+            'status': 'in_progress',
+            'status_history': [{
+                'id': i,
+                'previous_status': 'pending',
+                'new_status': 'in_progress',
+                'changed_by': 1,
+                'changed_by_name': 'admin',
+                'note': 'Dispatched to volunteer',
+                'changed_at': now.isoformat(),
+            }],
+        } for i in range(rows)]
+
+        return {'help_requests': {'help_requests': help_requests},
+                'weather_alerts': {'weather_alerts': weather_alerts},
+                'serializer': serializer}
@@ -0,0 +1,98 @@
+"""
+Django management command to compare authenticated request throughput of
+the database-backed JWTAuthentication and ClaimsJWTAuthentication.
+
+Each mode serves the same minimal GET view through the DRF request cycle
+(authentication, permission check, rendering) with a real access token, so
+the difference is the cost of resolving the user. The claims are only used
+with a shared cache backend, so with the default local-memory cache both
+modes load the user.
+
+Usage:
+    python manage.py benchmark_jwt_auth
+
+    # Token of a given user, more requests:
+    python manage.py benchmark_jwt_auth --username admin --requests 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from api.conditional import cache_is_shared
+from users.models import User
+
+
+def probe_view(authentication_class):
+    @api_view(['GET'])
+    @authentication_classes([authentication_class])
+    @permission_classes([IsAuthenticated])
+    def probe(request):
+        return Response({'user_id': request.user.pk, 'role': request.user.role})
+    return probe
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks authenticated GET throughput with and without per-request user lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            help='User whose token is used (default: the first active user)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Requests per mode',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('No matching active user')
+
+        token = str(ClaimsRefreshToken.for_user(user).access_token)
+        factory = RequestFactory()
+        total = options['requests']
+        self.stdout.write(f'  {total} GET requests as {user.username} ({user.role})')
+        if not cache_is_shared():
+            self.stdout.write(self.style.WARNING(
+                '  The default cache is process-local, so ClaimsJWTAuthentication loads the user too'
+            ))
+
+        results = {}
+        for label, authentication_class in (
+            ('JWTAuthentication', JWTAuthentication),
+            ('ClaimsJWTAuthentication', ClaimsJWTAuthentication),
+        ):
+            view = probe_view(authentication_class)
+
+            def call():
+                response = view(factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+                if response.status_code != 200:
+                    raise CommandError(f'{label}: status {response.status_code}')
+
+            call()  # warm up; the claims mode caches the stamp here
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(total):
+                    call()
+                elapsed = time.perf_counter() - started
+            results[label] = total / elapsed
+            self.stdout.write(
+                f'  {label:<24} {results[label]:9.0f} req/s  {len(queries) / total:.2f} queries/request'
+            )
+
+        speedup = results['ClaimsJWTAuthentication'] / results['JWTAuthentication']
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] JWT auth benchmark complete ({speedup:.2f}x)'))
@@ -0,0 +1,99 @@
+"""
+Django management command to measure the reference-data cache against the
+current database.
+
+For each cached endpoint it reports the queries and time of a miss (right
+after the models' versions are bumped) and of a hit. A hit should cost no
+queries with a shared cache, and one (the versions) with a process-local
+one.
+
+Usage:
+    python manage.py benchmark_reference_cache
+
+    # More repetitions per measurement:
+    python manage.py benchmark_reference_cache --repeat 50
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import force_authenticate
+
+from api.conditional import bump_versions
+from api.views import CampViewSet, DisasterViewSet, ResourceViewSet
+from disasters.utils import locate_disaster
+from disasters.views import active_disasters
+from relief.views import list_resources
+from shelters.views import active_camps
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks cache misses and hits of the disaster, camp and resource reference data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Runs per measurement; the fastest is reported',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True, role='super_admin').first() or User.objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError('No active user to make the requests as')
+        factory = RequestFactory()
+
+        def django_view(view, path):
+            def call():
+                request = factory.get(path)
+                request.user = user
+                return view(request)
+            return call
+
+        def drf_action(viewset, path):
+            view = viewset.as_view({'get': 'active'})
+
+            def call():
+                request = factory.get(path)
+                force_authenticate(request, user)
+                return view(request)
+            return call
+
+        cases = [
+            ('active_disasters', ('disasters.Disasters',), django_view(active_disasters, '/')),
+            ('active_camps', ('shelters.Camp', 'disasters.Disasters'), django_view(active_camps, '/')),
+            ('list_resources', ('relief.Resource',), django_view(list_resources, '/?page_size=100')),
+            ('disasters/active', ('disasters.Disasters',), drf_action(DisasterViewSet, '/')),
+            ('camps/active', ('shelters.Camp', 'disasters.Disasters'), drf_action(CampViewSet, '/')),
+            ('resources/active', ('relief.Resource',), drf_action(ResourceViewSet, '/?fields=id,name')),
+            ('locate_disaster', ('disasters.Disasters',), lambda: locate_disaster(0, 0)),
+        ]
+
+        for label, models, call in cases:
+            misses, miss_queries = [], None
+            for _ in range(options['repeat']):
+                bump_versions(*models)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    call()
+                    misses.append(time.perf_counter() - started)
+                miss_queries = len(queries)
+
+            hits = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    call()
+                    hits.append(time.perf_counter() - started)
+            hit_queries = len(queries) / options['repeat']
+
+            self.stdout.write(
+                f'  {label:<18} miss: {miss_queries:2d} queries {min(misses) * 1000:8.2f} ms   '
+                f'hit: {hit_queries:.0f} queries {min(hits) * 1000:8.2f} ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] Reference-data cache benchmark complete'))
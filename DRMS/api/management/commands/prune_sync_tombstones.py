@@ -0,0 +1,24 @@
+"""
+Django management command to delete sync tombstones past the retention window.
+
+Clients whose token is older than the retention get a full resync instead,
+so older tombstones are never read again.
+
+Usage:
+    python manage.py prune_sync_tombstones
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import SyncTombstone
+from api.sync import SYNC_TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the delta-sync retention window'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - SYNC_TOMBSTONE_RETENTION
+        deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] {deleted} tombstones older than {cutoff:%Y-%m-%d} deleted'))
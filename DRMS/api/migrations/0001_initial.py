@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+                'indexes': [models.Index(fields=['model', 'deleted_at'], name='sync_tombst_model_688a85_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=100)),
+                ('dimension', models.CharField(max_length=50)),
+                ('bucket', models.CharField(blank=True, max_length=100)),
+                ('disaster_id', models.IntegerField(default=0)),
+                ('camp_id', models.IntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+            options={
+                'db_table': 'stat_counters',
+                'unique_together': {('model', 'dimension', 'bucket', 'disaster_id', 'camp_id')},
+            },
+        ),
+    ]
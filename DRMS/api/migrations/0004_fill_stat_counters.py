@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Used to fill the stat counters with the live models. It now does
+    nothing: api.stats.read_counters builds a model's counters on first
+    read, and rebuild_stat_counters recomputes them on demand
+    """
+
+    dependencies = [
+        ('api', '0003_modelversion'),
+    ]
+
+    operations = []
@@ -1,3 +1,48 @@
 from django.db import models
 
-# Create your models here.
+
+class SyncTombstone(models.Model):
+    """Record of a deleted row, so delta-sync clients can drop their copy."""
+    id = models.AutoField(primary_key=True)
+    model = models.CharField(max_length=100)  # app_label.model_name
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        indexes = [
+            models.Index(fields=['model', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
+class StatCounter(models.Model):
+    """Denormalized count or sum of a model's rows in one bucket (see api.stats)."""
+    id = models.AutoField(primary_key=True)
+    model = models.CharField(max_length=100)  # app_label.model_name
+    dimension = models.CharField(max_length=50)
+    bucket = models.CharField(max_length=100, blank=True)
+    disaster_id = models.IntegerField(default=0)  # 0 when not scoped to a disaster
+    camp_id = models.IntegerField(default=0)  # 0 when not scoped to a camp
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'stat_counters'
+        unique_together = ['model', 'dimension', 'bucket', 'disaster_id', 'camp_id']
+
+    def __str__(self):
+        return f"{self.model}.{self.dimension}[{self.bucket}] = {self.value}"
+
+
+class ModelVersion(models.Model):
+    """Change counter of a model, used when the cache is process-local (see api.conditional)."""
+    label = models.CharField(max_length=100, primary_key=True)  # app_label.modelname
+    version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'model_versions'
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
@@ -0,0 +1,141 @@
+"""
+Keyset (cursor) pagination for the hand-written list views.
+
+Instead of OFFSET, each page is fetched with a WHERE clause that continues
+after the last row of the previous page in the list's ordering, so a page
+costs one index range scan however deep the client has paged. The position
+is handed out as an opaque cursor: urlsafe base64 of the ordering and the
+last row's values. The primary key is always appended to the ordering so
+rows sharing a timestamp are neither skipped nor repeated.
+
+Ordering fields must be non-null concrete fields of the model.
+
+Usage:
+    try:
+        page = paginate_keyset(queryset, request.GET, ('-requested_at',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    ... serialize page.items ...
+    return Response({'help_requests': rows, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor or page_size"""
+
+
+class KeysetPage:
+    """One page of rows plus the cursor of the next page (None on the last page)"""
+
+    def __init__(self, items, next_cursor, page_size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _full_ordering(ordering):
+    ordering = list(ordering)
+    if not any(name.lstrip('-') in ('id', 'pk') for name in ordering):
+        # Tie-breaker in the direction of the last column
+        ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+    return ['-id' if name == '-pk' else 'id' if name == 'pk' else name for name in ordering]
+
+
+def _encode_value(value):
+    # isoformat() keeps microseconds, which the keyset comparison needs
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(ordering, values):
+    payload = json.dumps({'o': ordering, 'v': [_encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering, model):
+    """Return the typed position values stored in a cursor for this ordering"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values = payload['v']
+        if payload['o'] != ordering or len(values) != len(ordering):
+            raise PaginationError('Cursor does not belong to this list')
+        fields = [model._meta.get_field(name.lstrip('-')) for name in ordering]
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except PaginationError:
+        raise
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, ValidationError):
+        raise PaginationError('Invalid cursor')
+
+
+def _after(ordering, values):
+    """Rows strictly after the position in the (mixed-direction) ordering"""
+    query = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        query |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+    return query
+
+
+def get_page_size(params, default=DEFAULT_PAGE_SIZE):
+    value = params.get('page_size')
+    if value in (None, ''):
+        return default
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError('page_size must be an integer')
+    if page_size < 1:
+        raise PaginationError('page_size must be positive')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def paginate_keyset(queryset, params, ordering, default_page_size=DEFAULT_PAGE_SIZE):
+    """
+    Order the queryset and return the KeysetPage selected by params['cursor']
+    and params['page_size']. Raises PaginationError on bad parameters
+    """
+    ordering = _full_ordering(ordering)
+    page_size = get_page_size(params, default_page_size)
+    queryset = queryset.order_by(*ordering)
+
+    cursor = params.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, ordering, queryset.model)))
+
+    # One extra row tells whether another page exists
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(ordering, [
+            getattr(last, queryset.model._meta.get_field(name.lstrip('-')).attname) for name in ordering
+        ])
+    return KeysetPage(items, next_cursor, page_size)
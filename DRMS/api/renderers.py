@@ -0,0 +1,72 @@
+"""
+Fast JSON rendering for DRF views and the function-based JsonResponse views.
+
+orjson is used when it is installed and the standard library json module
+otherwise. datetime/date/time and numpy values are encoded natively by
+orjson (datetimes keep microseconds, UTC is written as "Z"). Types it does
+not know, such as Decimal, lazy strings and querysets, go through the same
+encoder default() as before, so Decimal is still a string in JsonResponse
+views and a number in DRF views. A payload orjson rejects outright (e.g.
+an int wider than 64 bits) is re-encoded with the stdlib.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+ORJSON_OPTIONS = (
+    orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None else 0
+)
+
+
+def dumps(data, encoder=DjangoJSONEncoder, **json_dumps_params):
+    """
+    Serialize data to UTF-8 JSON bytes.
+    Takes the orjson path unless stdlib formatting options (indent,
+    sort_keys, ...) are requested
+    """
+    if orjson is not None and not json_dumps_params:
+        try:
+            return orjson.dumps(data, default=encoder().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. an int beyond 64 bits
+            pass
+    return json.dumps(data, cls=encoder, **json_dumps_params).encode('utf-8')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that serializes with orjson.
+    Indented output (?indent= or the browsable API) goes through the stdlib
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data, encoder=self.encoder_class or encoders.JSONEncoder)
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse rendering through dumps()
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data, encoder, **(json_dumps_params or {})), **kwargs)
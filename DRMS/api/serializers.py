@@ -1,3 +1,4 @@
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
 from rest_framework import serializers
 from users.models import User, Volunteer, Victim, CampAdmin, VolunteerSkill
 from relief.models import Resource, ResourceRequest, ResourceInventoryTransaction, ResourceRequestStatusHistory
@@ -13,10 +14,142 @@ from operations.models import (
     TransportTrip,
 )
 from disasters.models import Disasters
+from disasters.geometry import parse_boundary
 from alerts.models import Alert, WeatherAlert, AlertStatusHistory, WeatherAlertStatusHistory
 from shelters.models import Camp
 
 
+# Attribute the ViewSets prefetch ordered status history into
+PREFETCHED_STATUS_HISTORY = 'prefetched_status_history'
+
+
+class StatusHistoryMixin:
+    """
+    Reads status_history from the list prefetched by the ViewSets and only
+    queries when it is missing. The field is dropped when the serializer
+    context has include_history set to False
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.context.get('include_history') is False:
+            self.fields.pop('status_history', None)
+
+    def status_history_for(self, obj):
+        history = getattr(obj, PREFETCHED_STATUS_HISTORY, None)
+        if history is None:
+            history = obj.status_history.select_related('changed_by').order_by('-changed_at')
+        return history
+
+
+def parse_field_paths(value):
+    """
+    Parse a ?fields= / ?omit= value such as "id,user.username,user.email"
+    into a tree {'id': {}, 'user': {'username': {}, 'email': {}}}.
+    Returns None for a blank value
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in path.split('.'):
+            name = name.strip()
+            if name:
+                node = node.setdefault(name, {})
+    return tree or None
+
+
+def field_selected(name, fields, omit):
+    """Whether a top-level field survives the fields / omit trees"""
+    if fields and name not in fields:
+        return False
+    return not (omit and name in omit and not omit[name])
+
+
+def _restrict_fields(serializer, fields, omit):
+    serializer = getattr(serializer, 'child', serializer)
+    if not hasattr(serializer, 'fields'):
+        return
+    for name in list(serializer.fields):
+        if not field_selected(name, fields, omit):
+            serializer.fields.pop(name)
+            continue
+        nested_fields = (fields or {}).get(name)
+        nested_omit = (omit or {}).get(name)
+        if nested_fields or nested_omit:
+            _restrict_fields(serializer.fields[name], nested_fields, nested_omit)
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets. The 'fields' and 'omit' trees in the serializer context
+    (see parse_field_paths) drop fields, including fields of nested
+    serializers, and narrow_queryset() loads only what the rest read:
+    .only() for columns, select_related for forward relations and
+    prefetch_related for reverse and many-to-many ones
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = self.context.get('fields'), self.context.get('omit')
+        if fields or omit:
+            _restrict_fields(self, fields, omit)
+
+    def narrow_queryset(self, queryset):
+        only, select, prefetch = set(), set(), set()
+        if not _collect_lookups(self, queryset.model, '', only, select, prefetch):
+            # A field reads something that is not a model field; keep every column
+            return queryset.prefetch_related(*prefetch)
+        return queryset.select_related(None).prefetch_related(None).only(
+            queryset.model._meta.pk.name, *only
+        ).select_related(*select).prefetch_related(*prefetch)
+
+
+def _collect_lookups(serializer, model, prefix, only, select, prefetch, in_prefetch=False):
+    """
+    Walk the serializer's fields and gather the lookups they need.
+    Inside a prefetched relation only traversals are collected (as prefetch
+    paths). Returns False if a field source is not a model field or relation
+    """
+    serializer = getattr(serializer, 'child', serializer)
+    narrowable = True
+    for field in serializer.fields.values():
+        if field.source == '*':
+            # SerializerMethodFields load their own data
+            continue
+        current, path = model, prefix
+        attrs = field.source.split('.')
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                narrowable = False
+                break
+            path = f'{path}{attr}'
+            last = index == len(attrs) - 1
+            if model_field.one_to_many or model_field.many_to_many:
+                prefetch.add(path)
+                if last and isinstance(field, serializers.BaseSerializer):
+                    _collect_lookups(field, model_field.related_model, f'{path}__', only, select, prefetch, True)
+                break
+            if model_field.is_relation and not model_field.concrete:
+                # Reverse one-to-one cannot be restricted with only()
+                narrowable = False
+                break
+            if in_prefetch:
+                if model_field.is_relation and (not last or isinstance(field, serializers.BaseSerializer)):
+                    prefetch.add(path)
+            else:
+                only.add(path)
+                if model_field.is_relation and (not last or isinstance(field, serializers.BaseSerializer)):
+                    select.add(path)
+            if model_field.is_relation:
+                current = model_field.related_model
+                if last and isinstance(field, serializers.BaseSerializer):
+                    narrowable &= _collect_lookups(field, current, f'{path}__', only, select, prefetch, in_prefetch)
+            path = f'{path}__'
+    return narrowable
+
+
 # -----------------------------
 # User Serializers
 # -----------------------------
@@ -37,7 +170,7 @@ class VolunteerSkillSerializer(serializers.ModelSerializer):
         fields = ["id", "skill", "proficiency"]
 
 
-class VolunteerSerializer(serializers.ModelSerializer):
+class VolunteerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     skills = VolunteerSkillSerializer(many=True, read_only=True)
 
@@ -78,7 +211,7 @@ class CampAdminSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Disaster Serializers
 # -----------------------------
-class DisasterSerializer(serializers.ModelSerializer):
+class DisasterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Disasters
         fields = [
@@ -90,11 +223,18 @@ class DisasterSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def validate_geojson_boundary(self, value):
+        try:
+            parse_boundary(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return value
+
 
 # -----------------------------
 # Camp Serializers
 # -----------------------------
-class CampSerializer(serializers.ModelSerializer):
+class CampSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     disaster_name = serializers.CharField(source='disasters.name', read_only=True)
 
     class Meta:
@@ -112,7 +252,7 @@ class CampSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Alert Serializers
 # -----------------------------
-class AlertSerializer(serializers.ModelSerializer):
+class AlertSerializer(StatusHistoryMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     disaster_name = serializers.CharField(source='Disasters.name', read_only=True)
     status_history = serializers.SerializerMethodField()
 
@@ -125,11 +265,10 @@ class AlertSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "issued_at"]
 
     def get_status_history(self, obj):
-        history = obj.status_history.order_by('-changed_at')
-        return AlertStatusHistorySerializer(history, many=True).data
+        return AlertStatusHistorySerializer(self.status_history_for(obj), many=True).data
 
 
-class WeatherAlertSerializer(serializers.ModelSerializer):
+class WeatherAlertSerializer(StatusHistoryMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     related_disaster_name = serializers.CharField(source='related_disaster.name', read_only=True)
     issued_by_name = serializers.CharField(source='issued_by.username', read_only=True)
     status_history = serializers.SerializerMethodField()
@@ -147,14 +286,13 @@ class WeatherAlertSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "issued_at", "updated_at"]
 
     def get_status_history(self, obj):
-        history = obj.status_history.order_by('-changed_at')
-        return WeatherAlertStatusHistorySerializer(history, many=True).data
+        return WeatherAlertStatusHistorySerializer(self.status_history_for(obj), many=True).data
 
 
 # -----------------------------
 # Resource Serializers
 # -----------------------------
-class ResourceSerializer(serializers.ModelSerializer):
+class ResourceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Resource
         fields = [
@@ -165,7 +303,7 @@ class ResourceSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class ResourceInventoryTransactionSerializer(serializers.ModelSerializer):
+class ResourceInventoryTransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     resource_name = serializers.CharField(source='resource.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
 
@@ -191,7 +329,7 @@ class ResourceRequestStatusHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "changed_at"]
 
 
-class ResourceRequestSerializer(serializers.ModelSerializer):
+class ResourceRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     resource_name = serializers.CharField(source='resource.name', read_only=True)
     camp_name = serializers.CharField(source='camp.name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.username', read_only=True)
@@ -221,7 +359,7 @@ class DonationItemSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class DonationSerializer(serializers.ModelSerializer):
+class DonationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     items = DonationItemSerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     camp_name = serializers.CharField(source='camp.name', read_only=True)
@@ -251,7 +389,7 @@ class DonationAcknowledgmentSerializer(serializers.ModelSerializer):
 # -----------------------------
 # SOS/Help Request Serializers
 # -----------------------------
-class HelpRequestSerializer(serializers.ModelSerializer):
+class HelpRequestSerializer(StatusHistoryMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     victim_name = serializers.CharField(source='victim.username', read_only=True)
     disaster_name = serializers.CharField(source='disasters.name', read_only=True)
     assigned_volunteer_name = serializers.CharField(source='assigned_volunteer.username', read_only=True)
@@ -268,14 +406,13 @@ class HelpRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "requested_at"]
 
     def get_status_history(self, obj):
-        history = obj.status_history.order_by('-changed_at')
-        return HelpRequestStatusHistorySerializer(history, many=True).data
+        return HelpRequestStatusHistorySerializer(self.status_history_for(obj), many=True).data
 
 
 # -----------------------------
 # Task Assignment Serializers
 # -----------------------------
-class TaskAssignmentSerializer(serializers.ModelSerializer):
+class TaskAssignmentSerializer(StatusHistoryMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     volunteer_name = serializers.CharField(source='volunteer.username', read_only=True)
     help_request_description = serializers.CharField(source='help_request.description', read_only=True)
     status_history = serializers.SerializerMethodField()
@@ -289,14 +426,13 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "assigned_at"]
 
     def get_status_history(self, obj):
-        history = obj.status_history.order_by('-changed_at')
-        return TaskAssignmentStatusHistorySerializer(history, many=True).data
+        return TaskAssignmentStatusHistorySerializer(self.status_history_for(obj), many=True).data
 
 
 # -----------------------------
 # Transport Serializers
 # -----------------------------
-class TransportSerializer(serializers.ModelSerializer):
+class TransportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     camp_name = serializers.CharField(source='assigned_to_camp.name', read_only=True)
 
     class Meta:
@@ -309,7 +445,7 @@ class TransportSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class TransportTripSerializer(serializers.ModelSerializer):
+class TransportTripSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     transport_vehicle = serializers.CharField(source='transport.vehicle_number', read_only=True)
 
     class Meta:
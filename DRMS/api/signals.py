@@ -0,0 +1,84 @@
+from django.apps import apps
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from . import stats
+from .actor import forget_actor
+from .authentication import CLAIM_FIELDS, forget_stamp
+from .conditional import VERSIONED_MODELS, bump_versions
+from .models import SyncTombstone
+from .sync import SYNC_COLLECTIONS
+
+
+ACTOR_PROFILE_MODELS = ('users.CampAdmin', 'users.Volunteer', 'users.Victim')
+
+
+def model_changed(sender, **kwargs):
+    """Invalidate the ETags of every endpoint reading the changed model"""
+    bump_versions(sender._meta.label)
+
+
+def synced_row_deleted(sender, instance, **kwargs):
+    """Leave a tombstone so delta-sync clients drop the row"""
+    SyncTombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def remember_counted_row(sender, instance, update_fields=None, **kwargs):
+    """Keep the counters of the stored row, to be moved once the save is done"""
+    spec = stats.spec_for(sender)
+    instance._stat_previous = []
+    instance._stat_unchanged = False
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not spec.reads & {sender._meta.get_field(name).attname for name in update_fields}:
+        instance._stat_unchanged = True
+        return
+    previous = spec.previous_row(instance.pk)
+    if previous is not None:
+        instance._stat_previous = [spec.counters(previous)]
+
+
+def counted_row_saved(sender, instance, **kwargs):
+    """Move the row's counters from its previous buckets to its current ones"""
+    if getattr(instance, '_stat_unchanged', False):
+        return
+    stats.apply_changes(getattr(instance, '_stat_previous', []), [stats.row_counters(instance)])
+
+
+def counted_row_deleted(sender, instance, **kwargs):
+    stats.apply_changes([stats.row_counters(instance)])
+
+
+def actor_profile_changed(sender, instance, **kwargs):
+    """Drop the cached actor of the profile's user"""
+    forget_actor(instance.user_id)
+    if sender._meta.label == 'users.CampAdmin':
+        # The camp id is one of the token claims
+        forget_stamp(instance.user_id)
+
+
+def user_claims_changed(sender, instance, update_fields=None, **kwargs):
+    """Stop trusting the token claims of a user whose claimed fields may have changed"""
+    if update_fields is None or set(update_fields) & set(CLAIM_FIELDS):
+        forget_stamp(instance.pk)
+
+
+for label in VERSIONED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(model_changed, sender=model, dispatch_uid=f'api_version_save_{label}')
+    post_delete.connect(model_changed, sender=model, dispatch_uid=f'api_version_delete_{label}')
+
+for collection in SYNC_COLLECTIONS.values():
+    post_delete.connect(synced_row_deleted, sender=collection.model, dispatch_uid=f'api_tombstone_{collection.label}')
+
+for spec in stats.COUNTER_SPECS.values():
+    pre_save.connect(remember_counted_row, sender=spec.model, dispatch_uid=f'api_counters_pre_save_{spec.label}')
+    post_save.connect(counted_row_saved, sender=spec.model, dispatch_uid=f'api_counters_save_{spec.label}')
+    post_delete.connect(counted_row_deleted, sender=spec.model, dispatch_uid=f'api_counters_delete_{spec.label}')
+
+for label in ACTOR_PROFILE_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(actor_profile_changed, sender=model, dispatch_uid=f'api_actor_save_{label}')
+    post_delete.connect(actor_profile_changed, sender=model, dispatch_uid=f'api_actor_delete_{label}')
+
+post_save.connect(user_claims_changed, sender=apps.get_model('users.User'), dispatch_uid='api_auth_stamp_save')
+post_delete.connect(user_claims_changed, sender=apps.get_model('users.User'), dispatch_uid='api_auth_stamp_delete')
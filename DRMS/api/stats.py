@@ -0,0 +1,343 @@
+"""
+Materialized counters for the dashboard and statistics endpoints.
+
+Each tracked model has a CounterSpec listing its dimensions. A dimension
+puts every row into a bucket (a field value, or a value computed from a few
+fields) and either counts the rows or sums one of their fields. Counters are
+kept per (model, dimension, bucket, disaster, camp) in StatCounter, so a
+statistics read is one query over a table whose size depends on the number
+of buckets, not on the number of rows.
+
+The counters are maintained by save/delete signals (see api.signals), in
+the same transaction as the write when the caller runs one, and by the bulk
+paths that send no signals (apply_changes). rebuild_stat_counters recomputes
+them from scratch to repair drift, e.g. after raw SQL or .update() calls.
+A model's counters are built from its rows by the first read that finds
+them never built (rebuild_counters leaves a BUILT marker row), so rows
+that predate the counters are counted without a backfill on deploy.
+
+The price is paid by writes. A save of a counted row first selects the
+stored values the counters read (skipped when update_fields leaves them
+all out), then updates one counter row per dimension whose bucket changed,
+and always the model's 'all' row on insert and delete. Those UPDATEs lock
+their rows until the transaction commits, so concurrent inserts of the
+same model (e.g. a burst of help requests) queue on the 'all' row: keep
+transactions around counted writes short. The bulk paths apply one summed
+delta per counter for the whole batch.
+
+Usage:
+    counters = read_counters('operations.helprequest', 'shelters.camp')
+    counters.count('operations.helprequest', 'status', 'pending')
+    counters.buckets('shelters.camp', 'camp_type')
+"""
+from collections import defaultdict
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+ALL = 'all'
+# Dimension of the zero-valued row marking a model's counters as built
+BUILT = 'built'
+
+
+class Dimension:
+    """
+    A way of bucketing rows. bucket is an attname, a callable taking the row
+    (listing the attnames it reads in reads) or None for a single bucket;
+    a bucket of None leaves the row out. amount is the attname summed, or
+    None to count rows
+    """
+
+    def __init__(self, name, bucket=None, amount=None, reads=()):
+        self.name = name
+        self.bucket = bucket
+        self.amount = amount
+        self.reads = set(reads)
+        if isinstance(bucket, str):
+            self.reads.add(bucket)
+        if amount:
+            self.reads.add(amount)
+
+    def bucket_for(self, row):
+        if self.bucket is None:
+            return ''
+        value = self.bucket(row) if callable(self.bucket) else getattr(row, self.bucket)
+        return None if value is None else str(value)
+
+    def amount_for(self, row):
+        if self.amount is None:
+            return Decimal(1)
+        value = getattr(row, self.amount)
+        return Decimal(value) if value else Decimal(0)
+
+
+class CounterSpec:
+    """The dimensions of one model, and the attnames scoping it to a disaster or camp"""
+
+    def __init__(self, model_path, dimensions, disaster=None, camp=None):
+        self.model_path = model_path
+        self.label = model_path.lower()
+        self.dimensions = [Dimension(ALL)] + list(dimensions)
+        self.disaster = disaster
+        self.camp = camp
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_path)
+
+    @property
+    def reads(self):
+        """Attnames the counters depend on"""
+        fields = set()
+        for dimension in self.dimensions:
+            fields |= dimension.reads
+        return fields | {name for name in (self.disaster, self.camp) if name}
+
+    def counters(self, row):
+        """{(model, dimension, bucket, disaster_id, camp_id): amount} for one row"""
+        disaster_id = (getattr(row, self.disaster) or 0) if self.disaster else 0
+        camp_id = (getattr(row, self.camp) or 0) if self.camp else 0
+        result = {}
+        for dimension in self.dimensions:
+            bucket = dimension.bucket_for(row)
+            if bucket is None:
+                continue
+            amount = dimension.amount_for(row)
+            if amount:
+                result[(self.label, dimension.name, bucket, disaster_id, camp_id)] = amount
+        return result
+
+    def previous_row(self, pk):
+        """The stored values the counters depend on, before a save"""
+        values = self.model.objects.filter(pk=pk).values(*self.reads).first()
+        return SimpleNamespace(**values) if values is not None else None
+
+
+def _month(field):
+    def bucket(row):
+        value = getattr(row, field)
+        return timezone.localtime(value).strftime('%Y-%m') if value else None
+    return bucket
+
+
+def _when(field, value, bucket_field):
+    def bucket(row):
+        return getattr(row, bucket_field) if getattr(row, field) == value else None
+    return bucket
+
+
+COUNTER_SPECS = {spec.label: spec for spec in [
+    CounterSpec('users.User', [
+        Dimension('role', 'role'),
+        Dimension('is_active', 'is_active'),
+    ]),
+    CounterSpec('users.Volunteer', [
+        Dimension('availability', 'availability'),
+    ]),
+    CounterSpec('users.Victim', [
+        Dimension(
+            'high_priority',
+            lambda row: row.priority_level in ('high', 'critical') or bool(row.is_high_risk),
+            reads=('priority_level', 'is_high_risk')
+        ),
+    ]),
+    CounterSpec('users.CampAdmin', [], camp='camp_id'),
+    CounterSpec('users.VolunteerSkill', [
+        Dimension('skill', 'skill'),
+    ]),
+    CounterSpec('disasters.Disasters', [
+        Dimension('status', 'status'),
+        Dimension('disaster_type', 'disaster_type'),
+        Dimension('severity', 'severity'),
+        Dimension('active_severity', _when('status', 'active', 'severity'), reads=('status', 'severity')),
+        Dimension('affected_population', amount='affected_population_estimate'),
+        Dimension('estimated_damage', amount='estimated_damage'),
+    ]),
+    CounterSpec('shelters.Camp', [
+        Dimension('status', 'status'),
+        Dimension('camp_type', 'camp_type'),
+        Dimension('capacity', amount='capacity'),
+        Dimension('population_capacity', amount='population_capacity'),
+    ], disaster='disasters_id'),
+    CounterSpec('relief.Resource', [
+        Dimension('category', 'category'),
+        Dimension('is_active', 'is_active'),
+    ]),
+    CounterSpec('relief.ResourceRequest', [
+        Dimension('status', 'status'),
+        Dimension('priority', 'priority'),
+        Dimension('pending_priority', _when('status', 'pending', 'priority'), reads=('status', 'priority')),
+        Dimension('resource', 'resource_id'),
+        Dimension('resource_quantity', 'resource_id', amount='quantity_requested'),
+    ], camp='camp_id'),
+    CounterSpec('operations.Donation', [
+        Dimension('status', 'status'),
+        Dimension('month', _month('donation_date'), reads=('donation_date',)),
+    ], camp='camp_id'),
+    CounterSpec('operations.DonationItem', []),
+    CounterSpec('operations.HelpRequest', [
+        Dimension('status', 'status'),
+    ], disaster='disasters_id'),
+    CounterSpec('operations.TaskAssignment', [
+        Dimension('status', 'status'),
+        Dimension('volunteer', 'volunteer_id'),
+    ]),
+    CounterSpec('alerts.Alert', [
+        Dimension('status', 'status'),
+        Dimension('active_severity', _when('status', 'active', 'severity'), reads=('status', 'severity')),
+    ], disaster='Disasters_id'),
+    CounterSpec('alerts.WeatherAlert', [
+        Dimension('status', 'status'),
+        Dimension('risk_level', 'risk_level'),
+    ], disaster='related_disaster_id'),
+]}
+
+
+def spec_for(model):
+    return COUNTER_SPECS.get(model._meta.label_lower)
+
+
+def row_counters(instance):
+    """Counters of a saved model instance (empty for untracked models)"""
+    spec = spec_for(type(instance))
+    return spec.counters(instance) if spec else {}
+
+
+def apply_changes(before=(), after=()):
+    """
+    Move the counters from the 'before' counter dicts to the 'after' ones.
+    For writes that send no signals (bulk_create, bulk_update)
+    """
+    delta = defaultdict(Decimal)
+    for counters in before:
+        for key, amount in counters.items():
+            delta[key] -= amount
+    for counters in after:
+        for key, amount in counters.items():
+            delta[key] += amount
+    apply_delta(delta)
+
+
+def apply_delta(delta):
+    from .models import StatCounter
+
+    with transaction.atomic():
+        for (model, dimension, bucket, disaster_id, camp_id), amount in delta.items():
+            if not amount:
+                continue
+            counter = StatCounter.objects.filter(
+                model=model, dimension=dimension, bucket=bucket, disaster_id=disaster_id, camp_id=camp_id
+            )
+            if counter.update(value=F('value') + amount):
+                continue
+            try:
+                with transaction.atomic():
+                    StatCounter.objects.create(
+                        model=model, dimension=dimension, bucket=bucket,
+                        disaster_id=disaster_id, camp_id=camp_id, value=amount
+                    )
+            except IntegrityError:
+                # Created concurrently
+                counter.update(value=F('value') + amount)
+
+
+def compute_counters(spec, chunk_size=2000):
+    """Counters of a model recomputed from its rows"""
+    totals = defaultdict(Decimal)
+    for values in spec.model.objects.values(*spec.reads).iterator(chunk_size=chunk_size):
+        for key, amount in spec.counters(SimpleNamespace(**values)).items():
+            totals[key] += amount
+    return totals
+
+
+def rebuild_counters(spec):
+    """Replace a model's counters with ones recomputed from its rows; returns the number of counters"""
+    from .models import StatCounter
+
+    with transaction.atomic():
+        counters = [
+            StatCounter(model=model, dimension=dimension, bucket=bucket,
+                        disaster_id=disaster_id, camp_id=camp_id, value=amount)
+            for (model, dimension, bucket, disaster_id, camp_id), amount in compute_counters(spec).items()
+            if amount
+        ]
+        counters.append(StatCounter(model=spec.label, dimension=BUILT, bucket='', value=0))
+        StatCounter.objects.filter(model=spec.label).delete()
+        StatCounter.objects.bulk_create(counters, batch_size=1000)
+    return len(counters) - 1
+
+
+class CounterSnapshot:
+    """Counters of some models as read in one query"""
+
+    def __init__(self, rows):
+        # {(model, dimension): [(bucket, disaster_id, camp_id, value)]}
+        self._rows = defaultdict(list)
+        for model, dimension, bucket, disaster_id, camp_id, value in rows:
+            self._rows[(model, dimension)].append((bucket, disaster_id, camp_id, value))
+
+    def _matching(self, model, dimension, disaster_id, camp_id):
+        for bucket, row_disaster_id, row_camp_id, value in self._rows[(model, dimension)]:
+            if disaster_id is not None and row_disaster_id != disaster_id:
+                continue
+            if camp_id is not None and row_camp_id != camp_id:
+                continue
+            yield bucket, row_disaster_id, row_camp_id, value
+
+    def total(self, model, dimension=ALL, bucket='', disaster_id=None, camp_id=None):
+        return sum((value for row_bucket, _, _, value in self._matching(model, dimension, disaster_id, camp_id)
+                    if row_bucket == bucket), Decimal(0))
+
+    def count(self, model, dimension=ALL, bucket='', disaster_id=None, camp_id=None):
+        return int(self.total(model, dimension, bucket, disaster_id, camp_id))
+
+    def buckets(self, model, dimension, disaster_id=None, camp_id=None):
+        """{bucket: value} for the non-zero buckets of a dimension"""
+        totals = defaultdict(Decimal)
+        for bucket, _, _, value in self._matching(model, dimension, disaster_id, camp_id):
+            totals[bucket] += value
+        return {bucket: value for bucket, value in totals.items() if value}
+
+    def by_disaster(self, model, dimension=ALL, bucket=''):
+        """{disaster_id: value} for the non-zero counters of a bucket"""
+        totals = defaultdict(Decimal)
+        for row_bucket, disaster_id, _, value in self._matching(model, dimension, None, None):
+            if row_bucket == bucket:
+                totals[disaster_id] += value
+        return {disaster_id: value for disaster_id, value in totals.items() if value}
+
+
+def read_counters(*models):
+    """
+    Load the counters of the given model labels ('app_label.modelname'),
+    building those of a model never counted before
+    """
+    from .models import StatCounter
+
+    labels = [model.lower() for model in models]
+    counters = StatCounter.objects.filter(model__in=labels).values_list(
+        'model', 'dimension', 'bucket', 'disaster_id', 'camp_id', 'value'
+    )
+    rows = list(counters)
+    built = {row[0] for row in rows if row[1] == BUILT}
+    unbuilt = [label for label in labels if label not in built and label in COUNTER_SPECS]
+    if unbuilt:
+        for label in unbuilt:
+            try:
+                rebuild_counters(COUNTER_SPECS[label])
+            except IntegrityError:
+                # Built concurrently by another request
+                pass
+        rows = list(counters.all())
+    return CounterSnapshot(rows)
+
+
+def ranked(buckets, key, limit=None, value_key='count'):
+    """[{key: bucket, value_key: n}] from a buckets() dict, largest first"""
+    items = sorted(buckets.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{key: bucket, value_key: int(value)} for bucket, value in items]
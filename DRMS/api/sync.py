@@ -0,0 +1,223 @@
+"""
+Delta sync for the mobile client.
+
+A client keeps a local copy of a few collections (help requests, tasks,
+donations, disasters, camps) and calls the sync endpoint with the token it
+got last time. Each collection returns only the rows whose updated_at moved
+since then, plus the ids deleted since then (from SyncTombstone). Without a
+token, or with one older than the tombstone retention, the collection is
+sent whole and flagged 'reset' so the client replaces its copy.
+
+Rows are read in (updated_at, id) keyset pages, so a large catch-up is split
+over several calls: while has_more is true the client calls again at once
+with the new token, and only the collections still paging are returned.
+Deletions are reported on the last page of a catch-up.
+
+updated_at is set when a row is saved, not when the transaction commits, so
+every window reaches SYNC_OVERLAP back past the previous sync. Rows may be
+sent twice; clients upsert by id.
+
+Usage:
+    try:
+        payload = collect_changes(request, request.GET.get('token'), names)
+    except SyncTokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from disasters.models import Disasters
+from operations.models import Donation, HelpRequest, TaskAssignment
+from shelters.models import Camp
+
+from .actor import actor_for_user
+from .models import SyncTombstone
+from .pagination import paginate_keyset, PaginationError
+from .serializers import (
+    CampSerializer, DisasterSerializer, DonationSerializer, HelpRequestSerializer,
+    TaskAssignmentSerializer, PREFETCHED_STATUS_HISTORY
+)
+
+
+SYNC_PAGE_SIZE = 500
+SYNC_OVERLAP = timedelta(seconds=10)
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+class SyncTokenError(ValueError):
+    """Raised for a malformed sync token or an unknown collection"""
+
+
+def _with_history(queryset):
+    history_model = queryset.model.status_history.rel.related_model
+    return queryset.prefetch_related(Prefetch(
+        'status_history',
+        queryset=history_model.objects.select_related('changed_by').order_by('-changed_at'),
+        to_attr=PREFETCHED_STATUS_HISTORY
+    ))
+
+
+def _help_requests(user):
+    queryset = _with_history(HelpRequest.objects.select_related('victim', 'disasters', 'assigned_volunteer'))
+    if user.role == 'victim':
+        return queryset.filter(victim=user)
+    return queryset
+
+
+def _tasks(user):
+    queryset = _with_history(TaskAssignment.objects.select_related('volunteer', 'help_request'))
+    if user.role == 'volunteer':
+        return queryset.filter(volunteer=user)
+    return queryset
+
+
+def _donations(user):
+    queryset = Donation.objects.select_related('camp', 'created_by').prefetch_related('items__resource')
+    if user.role == 'donor':
+        return queryset.filter(created_by=user)
+    if user.role == 'camp_admin':
+        camp_id = actor_for_user(user).camp_id
+        return queryset.filter(camp_id=camp_id) if camp_id else queryset.none()
+    return queryset
+
+
+def _disasters(user):
+    return Disasters.objects.all()
+
+
+def _camps(user):
+    return Camp.objects.select_related('disasters')
+
+
+class SyncCollection:
+    """A synced model: the rows a user sees and the serializer sending them"""
+
+    def __init__(self, model, serializer_class, queryset_for):
+        self.model = model
+        self.serializer_class = serializer_class
+        self.queryset_for = queryset_for
+
+    @property
+    def label(self):
+        return self.model._meta.label_lower
+
+
+SYNC_COLLECTIONS = {
+    'help_requests': SyncCollection(HelpRequest, HelpRequestSerializer, _help_requests),
+    'tasks': SyncCollection(TaskAssignment, TaskAssignmentSerializer, _tasks),
+    'donations': SyncCollection(Donation, DonationSerializer, _donations),
+    'disasters': SyncCollection(Disasters, DisasterSerializer, _disasters),
+    'camps': SyncCollection(Camp, CampSerializer, _camps),
+}
+
+
+def encode_sync_token(state):
+    payload = json.dumps(state, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _parse_moment(value):
+    if value is None:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    return moment
+
+
+def decode_sync_token(token):
+    """
+    Return {collection: (since, cursor, deleted_since)}: rows are read from
+    since (None for all rows), continuing after cursor, and deletions are
+    reported from deleted_since
+    """
+    if not token:
+        return {}
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        positions = {}
+        for name, entry in state.items():
+            since = _parse_moment(entry['s'])
+            positions[name] = (since, entry['c'], _parse_moment(entry.get('d')) or since)
+        return positions
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, AttributeError):
+        raise SyncTokenError('Invalid sync token')
+
+
+def parse_collections(value):
+    """Collection names from ?collections=a,b (all of them when empty)"""
+    if not value:
+        return list(SYNC_COLLECTIONS)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SYNC_COLLECTIONS]
+    if unknown:
+        raise SyncTokenError(f"Unknown collection: {', '.join(unknown)}")
+    return names
+
+
+def collect_changes(request, token, names):
+    """
+    Build the sync response for the collections in names. Raises
+    SyncTokenError for a token that cannot be decoded
+    """
+    now = timezone.now()
+    previous = decode_sync_token(token)
+    context = {'request': request, 'include_history': True}
+    state, changes = {}, {}
+    # While a catch-up is being paged, collections that are already done wait
+    # for the next regular sync instead of resending their overlap each call
+    continuing = any(cursor for _, cursor, _ in previous.values())
+
+    for name in names:
+        collection = SYNC_COLLECTIONS[name]
+        since, cursor, deleted_since = previous.get(name, (None, None, None))
+        if continuing and name in previous and not cursor:
+            state[name] = {'s': since.isoformat(), 'c': None}
+            continue
+        if deleted_since is not None and deleted_since < now - SYNC_TOMBSTONE_RETENTION:
+            # Deletions that old are no longer recorded
+            since, cursor, deleted_since = None, None, None
+        reset = since is None and cursor is None
+        if reset:
+            # Rows sent on this page may be deleted before the last page
+            deleted_since = now
+
+        queryset = collection.queryset_for(request.user)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since - SYNC_OVERLAP)
+        try:
+            page = paginate_keyset(queryset, {'cursor': cursor}, ('updated_at',), default_page_size=SYNC_PAGE_SIZE)
+        except PaginationError:
+            raise SyncTokenError('Invalid sync token')
+
+        deleted = []
+        if page.has_more:
+            state[name] = {
+                's': since.isoformat() if since else None,
+                'c': page.next_cursor,
+                'd': deleted_since.isoformat(),
+            }
+        else:
+            deleted = list(SyncTombstone.objects.filter(
+                model=collection.label, deleted_at__gt=deleted_since - SYNC_OVERLAP
+            ).values_list('object_id', flat=True))
+            state[name] = {'s': now.isoformat(), 'c': None}
+
+        changes[name] = {
+            'reset': reset,
+            'updated': collection.serializer_class(page.items, many=True, context=context).data,
+            'deleted': deleted,
+            'has_more': page.has_more,
+        }
+
+    return {
+        'sync_token': encode_sync_token(state),
+        'has_more': any(entry['has_more'] for entry in changes.values()),
+        'changes': changes,
+    }
@@ -1,3 +1,630 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from communication.models import Communication
+from disasters import views as disaster_views
+from disasters.models import Disasters
+from relief.models import Resource
+from shelters.models import Camp
+from users.models import CampAdmin, User, Volunteer, VolunteerSkill
+
+from .actor import actor_for_user
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from .dashboard import cached_snapshot
+from .models import StatCounter, SyncTombstone
+from .pagination import MAX_PAGE_SIZE, PaginationError, encode_cursor, get_page_size, paginate_keyset
+from .refdata import cached_reference, request_variant
+from .serializers import parse_field_paths
+from .stats import read_counters
+from .sync import SYNC_TOMBSTONE_RETENTION, encode_sync_token
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now().replace(microsecond=0)
+        # Three disasters share a start date, so the id tie-breaker matters
+        starts = [start, start, start, start - timedelta(days=1), start - timedelta(days=2),
+                  start + timedelta(microseconds=1), start - timedelta(days=3)]
+        for number, start_date in enumerate(starts):
+            Disasters.objects.create(
+                name=f'Disaster {number}', disaster_type='flood', severity=['low', 'high'][number % 2],
+                location='Kochi', description='River flood', start_date=start_date
+            )
+        cls.user = User.objects.create_user('coordinator', 'coordinator@example.com', 'pass', role='super_admin')
+
+    def walk(self, ordering, page_size):
+        ids, cursor = [], None
+        while True:
+            page = paginate_keyset(Disasters.objects.all(), {'cursor': cursor, 'page_size': page_size}, ordering)
+            ids.extend(disaster.id for disaster in page)
+            if not page.has_more:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Disasters.objects.order_by('-start_date', '-id').values_list('id', flat=True))
+        for page_size in (1, 2, 3, 7, 50):
+            self.assertEqual(self.walk(('-start_date',), page_size), expected)
+
+    def test_mixed_direction_ordering(self):
+        expected = list(Disasters.objects.order_by('severity', '-start_date', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(('severity', '-start_date'), 2), expected)
+
+    def test_rows_added_before_the_cursor_do_not_shift_later_pages(self):
+        first = paginate_keyset(Disasters.objects.all(), {'page_size': 3}, ('-start_date',))
+        second = [disaster.id for disaster in paginate_keyset(
+            Disasters.objects.all(), {'cursor': first.next_cursor, 'page_size': 3}, ('-start_date',)
+        )]
+        Disasters.objects.create(
+            name='Newest', disaster_type='fire', severity='low', location='Kochi',
+            description='Forest fire', start_date=timezone.now() + timedelta(days=1)
+        )
+        again = paginate_keyset(Disasters.objects.all(), {'cursor': first.next_cursor, 'page_size': 3}, ('-start_date',))
+        self.assertEqual([disaster.id for disaster in again], second)
+
+    def test_last_page_has_no_cursor(self):
+        page = paginate_keyset(Disasters.objects.all(), {'page_size': 7}, ('-start_date',))
+        self.assertEqual(len(page), 7)
+        self.assertIsNone(page.next_cursor)
+        self.assertFalse(page.has_more)
+
+    def test_bad_cursors_are_rejected(self):
+        other = encode_cursor(['name', 'id'], ['Disaster 1', 1])
+        for cursor in ('not-a-cursor!', 'e30', other, encode_cursor(['-start_date', '-id'], ['yesterday', 1])):
+            with self.subTest(cursor=cursor), self.assertRaises(PaginationError):
+                paginate_keyset(Disasters.objects.all(), {'cursor': cursor}, ('-start_date',))
+
+    def test_page_size(self):
+        self.assertEqual(get_page_size({}), 50)
+        self.assertEqual(get_page_size({'page_size': '10'}), 10)
+        self.assertEqual(get_page_size({'page_size': MAX_PAGE_SIZE * 10}), MAX_PAGE_SIZE)
+        for value in ('0', '-1', 'ten'):
+            with self.subTest(page_size=value), self.assertRaises(PaginationError):
+                get_page_size({'page_size': value})
+
+    def get_disasters(self, params):
+        # Called directly: the router's disaster routes shadow /api/disasters/
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        return disaster_views.list_disasters(request)
+
+    def test_list_view_follows_cursors(self):
+        ids, params = [], {'page_size': 3}
+        while True:
+            response = self.get_disasters(params)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            ids.extend(disaster['id'] for disaster in data['disasters'])
+            if not data['has_more']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(ids, list(Disasters.objects.order_by('-start_date', '-id').values_list('id', flat=True)))
+
+        response = self.get_disasters({'cursor': 'not-a-cursor!'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='super_admin')
+        cls.volunteer = User.objects.create_user('volunteer', 'volunteer@example.com', 'pass', role='volunteer')
+        now = timezone.now()
+        for days_ago in (3, 2, 1):
+            message = Communication.objects.create(
+                sender=cls.admin, receiver=cls.volunteer, content=f'Sent {days_ago} days ago, "quoted", with a comma'
+            )
+            Communication.objects.filter(pk=message.pk).update(sent_at=now - timedelta(days=days_ago))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, path, **params):
+        response = self.client.get(f'/api/exports/{path}', params)
+        if response.status_code == 200:
+            self.assertTrue(response.streaming)
+            response.text = b''.join(response.streaming_content).decode()
+        return response
+
+    def test_ndjson(self):
+        response = self.export('messages.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([row['content'][:15] for row in rows], ['Sent 3 days ago', 'Sent 2 days ago', 'Sent 1 days ago'])
+        self.assertEqual(rows[0]['sender_username'], 'admin')
+        self.assertEqual(rows[0]['receiver_id'], self.volunteer.id)
+
+    def test_csv(self):
+        response = self.export('messages.csv')
+        rows = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[0][:3], ['id', 'sender_id', 'sender_username'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][6], 'Sent 3 days ago, "quoted", with a comma')
+
+    def test_date_range(self):
+        today = timezone.localdate()
+        response = self.export(
+            'messages.ndjson',
+            since=(today - timedelta(days=2)).isoformat(), until=(today - timedelta(days=1)).isoformat()
+        )
+        contents = [json.loads(line)['content'][:15] for line in response.text.splitlines()]
+        self.assertEqual(contents, ['Sent 2 days ago', 'Sent 1 days ago'])
+
+    def test_errors(self):
+        self.assertEqual(self.export('unknown.ndjson').status_code, 404)
+        self.assertEqual(self.export('messages.xml').status_code, 400)
+        self.assertEqual(self.export('messages.ndjson', since='last week').status_code, 400)
+        # Messages are not tied to a disaster
+        self.assertEqual(self.export('messages.ndjson', disaster_id=1).status_code, 400)
+        self.client.force_authenticate(self.volunteer)
+        self.assertEqual(self.export('messages.ndjson').status_code, 403)
+
+
+class SparseFieldsetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            user = User.objects.create_user(f'volunteer{number}', f'v{number}@example.com', 'pass', role='volunteer')
+            volunteer = Volunteer.objects.create(user=user, experience='Ten years of rescue work')
+            VolunteerSkill.objects.create(volunteer=volunteer, skill='First aid', proficiency='expert')
+        cls.user = user
+        cls.volunteer = volunteer
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_parse_field_paths(self):
+        self.assertEqual(
+            parse_field_paths('id, user.username,user.email,,'),
+            {'id': {}, 'user': {'username': {}, 'email': {}}}
+        )
+        self.assertIsNone(parse_field_paths(''))
+        self.assertIsNone(parse_field_paths(None))
+
+    def test_fields_select_nested_fields_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/volunteers/', {'fields': 'id,user.username'})
+        self.assertEqual(response.status_code, 200)
+        for row in response.data['results']:
+            self.assertEqual(set(row), {'id', 'user'})
+            self.assertEqual(set(row['user']), {'username'})
+        # The count and the page: no skills prefetch, and only the selected columns
+        self.assertEqual(len(queries), 2)
+        page_sql = queries[1]['sql']
+        self.assertNotIn('experience', page_sql)
+        self.assertNotIn('"users"."email"', page_sql)
+
+    def test_omit(self):
+        response = self.client.get('/api/volunteers/', {'omit': 'skills,user.email'})
+        row = response.data['results'][0]
+        self.assertNotIn('skills', row)
+        self.assertIn('experience', row)
+        self.assertNotIn('email', row['user'])
+        self.assertIn('username', row['user'])
+
+    def test_writes_return_every_field(self):
+        response = self.client.patch(
+            f'/api/volunteers/{self.volunteer.id}/?fields=id', {'experience': 'Eleven years'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['experience'], 'Eleven years')
+        self.assertIn('skills', response.data)
+
+
+class DeltaSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('coordinator', 'coordinator@example.com', 'pass', role='super_admin')
+        cls.disasters = [
+            Disasters.objects.create(
+                name=f'Disaster {number}', disaster_type='flood', severity='high', location='Kochi',
+                description='River flood', start_date=timezone.now()
+            ) for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Well before the sync overlap, and all equal so the id tie-breaker is exercised
+        Disasters.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def sync(self, token=None, collections='disasters'):
+        params = {'collections': collections}
+        if token:
+            params['token'] = token
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_then_incremental_sync(self):
+        first = self.sync()
+        changes = first['changes']['disasters']
+        self.assertTrue(changes['reset'])
+        self.assertEqual(sorted(row['id'] for row in changes['updated']), [d.id for d in self.disasters])
+
+        changed = self.disasters[2]
+        changed.name = 'Renamed'
+        changed.save()
+        second = self.sync(first['sync_token'])['changes']['disasters']
+        self.assertFalse(second['reset'])
+        self.assertEqual([row['name'] for row in second['updated']], ['Renamed'])
+        self.assertEqual(second['deleted'], [])
+
+    def test_deletions_are_sent_as_tombstones(self):
+        token = self.sync()['sync_token']
+        deleted_id = self.disasters[0].id
+        self.disasters[0].delete()
+        self.assertTrue(SyncTombstone.objects.filter(model='disasters.disasters', object_id=deleted_id).exists())
+
+        changes = self.sync(token)['changes']['disasters']
+        self.assertEqual(changes['deleted'], [deleted_id])
+        self.assertEqual(changes['updated'], [])
+
+    def test_catch_up_is_paged_with_the_keyset_token(self):
+        token = self.sync()['sync_token']
+        Disasters.objects.update(updated_at=timezone.now())
+        seen, calls = [], 0
+        with mock.patch('api.sync.SYNC_PAGE_SIZE', 2):
+            while True:
+                data = self.sync(token, collections='disasters,camps')
+                calls += 1
+                token = data['sync_token']
+                seen.extend(row['id'] for row in data['changes']['disasters']['updated'])
+                if calls == 1:
+                    # The camps collection finished on the first page and waits for the next regular sync
+                    self.assertIn('camps', data['changes'])
+                    deleted_id = seen[0]
+                    Disasters.objects.filter(pk=deleted_id).delete()
+                else:
+                    self.assertNotIn('camps', data['changes'])
+                if not data['has_more']:
+                    break
+                self.assertEqual(data['changes']['disasters']['deleted'], [])
+        self.assertEqual(calls, 3)
+        self.assertEqual(sorted(seen), [d.id for d in self.disasters])
+        self.assertEqual(len(seen), len(set(seen)))
+        # Deletions made during the catch-up come with its last page
+        self.assertEqual(data['changes']['disasters']['deleted'], [deleted_id])
+
+    def test_token_older_than_the_tombstones_resets(self):
+        expired = (timezone.now() - SYNC_TOMBSTONE_RETENTION - timedelta(days=1)).isoformat()
+        changes = self.sync(encode_sync_token({'disasters': {'s': expired, 'c': None}}))['changes']['disasters']
+        self.assertTrue(changes['reset'])
+        self.assertEqual(len(changes['updated']), 5)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/sync/', {'token': 'not-a-token!'}).status_code, 400)
+        bad_cursor = encode_sync_token({'disasters': {'s': None, 'c': 'not-a-cursor!', 'd': timezone.now().isoformat()}})
+        self.assertEqual(self.client.get('/api/sync/', {'token': bad_cursor}).status_code, 400)
+        self.assertEqual(self.client.get('/api/sync/', {'collections': 'disasters,users'}).status_code, 400)
+
+
+class CachedSnapshotTests(SimpleTestCase):
+    key = 'tests:snapshot'
+
+    def setUp(self):
+        cache.delete_many([self.key, f'{self.key}:lock'])
+
+    def run_concurrently(self, calls):
+        results, errors = [None] * len(calls), [None] * len(calls)
+
+        def run(index):
+            try:
+                results[index] = calls[index]()
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(len(calls))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        return results, errors
+
+    def test_single_flight(self):
+        computed = []
+
+        def compute():
+            computed.append(1)
+            time.sleep(0.2)
+            return {'total': 42}
+
+        results, errors = self.run_concurrently([lambda: cached_snapshot(self.key, compute, ttl=30)] * 8)
+        self.assertEqual(errors, [None] * 8)
+        self.assertEqual(results, [{'total': 42}] * 8)
+        self.assertEqual(len(computed), 1)
+
+    def test_stale_snapshot_served_while_recomputing(self):
+        cache.set(self.key, {'value': 'stale', 'fresh_until': time.time() - 1}, timeout=60)
+        cache.add(f'{self.key}:lock', 1)
+        self.assertEqual(cached_snapshot(self.key, lambda: 'fresh', ttl=30), 'stale')
+
+    def test_waiters_take_over_a_failed_recompute(self):
+        holding = threading.Event()
+
+        def failing():
+            holding.set()
+            time.sleep(0.2)
+            raise RuntimeError('database unavailable')
+
+        def waiter():
+            holding.wait()
+            return cached_snapshot(self.key, lambda: 'recomputed', ttl=30)
+
+        started = time.monotonic()
+        results, errors = self.run_concurrently([lambda: cached_snapshot(self.key, failing, ttl=30), waiter, waiter])
+        self.assertIsInstance(errors[0], RuntimeError)
+        self.assertEqual(results[1:], ['recomputed', 'recomputed'])
+        # Well inside the 30 s the waiters used to poll for
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class StatCounterTests(TestCase):
+
+    def create_disaster(self, status):
+        return Disasters.objects.create(
+            name='Flood', disaster_type='flood', severity='critical', status=status, location='Kochi',
+            description='River flood', start_date=timezone.now()
+        )
+
+    def test_counters_are_built_on_first_read(self):
+        for status in ('active', 'active', 'resolved'):
+            self.create_disaster(status)
+        # As on a database whose rows predate the counters
+        StatCounter.objects.all().delete()
+
+        counters = read_counters('disasters.disasters')
+        self.assertEqual(counters.count('disasters.disasters'), 3)
+        self.assertEqual(counters.count('disasters.disasters', 'status', 'active'), 2)
+
+        # Built once; signals keep them current from then on
+        self.create_disaster('contained')
+        with self.assertNumQueries(1):
+            counters = read_counters('disasters.disasters')
+        self.assertEqual(counters.count('disasters.disasters'), 4)
+        self.assertEqual(counters.count('disasters.disasters', 'status', 'contained'), 1)
+
+
+class SharedCacheMixin:
+    """Run the test against a file-based cache, which every worker process would share"""
+
+    def setUp(self):
+        super().setUp()
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+
+def create_camp(name, disaster=None):
+    disaster = disaster or Disasters.objects.create(
+        name='Flood', disaster_type='flood', severity='high', location='Kochi',
+        description='River flood', start_date=timezone.now()
+    )
+    return Camp.objects.create(
+        name=name, camp_type='shelter', disasters=disaster, location='Kochi',
+        capacity=100, contact_person='Asha', contact_phone='+919876543210'
+    )
+
+
+class ActorFixture:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.camp = create_camp('North Camp')
+        cls.other_camp = create_camp('South Camp', cls.camp.disasters)
+        cls.user = User.objects.create_user('campadmin', 'admin@example.com', 'pass', role='camp_admin')
+        cls.camp_admin = CampAdmin.objects.create(user=cls.user, camp=cls.camp)
+
+
+class ActorTests(ActorFixture, TestCase):
+
+    def test_profile_ids_in_one_query(self):
+        with self.assertNumQueries(1):
+            actor = actor_for_user(self.user)
+        self.assertEqual((actor.role, actor.camp_id, actor.camp_admin_id), ('camp_admin', self.camp.id, self.camp_admin.id))
+        self.assertIsNone(actor.volunteer_id)
+
+    def test_local_cache_reads_every_request(self):
+        actor_for_user(self.user)
+        # Another worker's signal could not clear a process-local entry, so nothing is kept
+        with self.assertNumQueries(1):
+            actor_for_user(self.user)
+
+
+class SharedCacheActorTests(SharedCacheMixin, ActorFixture, TestCase):
+
+    def test_cached_across_requests(self):
+        actor_for_user(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(actor_for_user(self.user).camp_id, self.camp.id)
+
+    def test_profile_changes_clear_the_cache(self):
+        actor_for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.camp_admin.camp = self.other_camp
+            self.camp_admin.save()
+        self.assertEqual(actor_for_user(self.user).camp_id, self.other_camp.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.camp_admin.delete()
+        self.assertIsNone(actor_for_user(self.user).camp_id)
+
+
+class ClaimsAuthenticationTests(SharedCacheMixin, ActorFixture, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self, method='get'):
+        request = getattr(RequestFactory(), method)('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def assert_from_claims(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertTrue(user.get_deferred_fields())
+        return user
+
+    def assert_from_database(self, method='get'):
+        with CaptureQueriesContext(connection) as queries:
+            user = self.authenticate(method)
+        self.assertTrue(any('FROM "users"' in query['sql'] for query in queries.captured_queries))
+        self.assertFalse(user.get_deferred_fields())
+        return user
+
+    def test_reads_use_the_claims_once_the_stamp_is_known(self):
+        self.assert_from_database()
+        user = self.assert_from_claims()
+        self.assertEqual((user.pk, user.role), (self.user.pk, 'camp_admin'))
+
+    def test_writes_always_load_the_user(self):
+        self.assert_from_database()
+        for method in ('post', 'patch', 'delete'):
+            self.assert_from_database(method)
+
+    def test_deactivation(self):
+        self.assert_from_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_role_change(self):
+        self.assert_from_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'volunteer'
+            self.user.save()
+        self.assertEqual(self.assert_from_database().role, 'volunteer')
+        # The token's claims are stale for good, not just for one request
+        self.assert_from_database()
+
+    def test_camp_move(self):
+        self.assert_from_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.camp_admin.camp = self.other_camp
+            self.camp_admin.save()
+        self.assert_from_database()
+        self.assert_from_database()
+
+    def test_unrelated_user_writes_keep_the_claims(self):
+        self.assert_from_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=['last_login'])
+        self.assert_from_claims()
+
+    def test_deactivated_user_gets_401(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(client.get('/api/volunteers/').status_code, 200)
+        self.assertEqual(client.get('/api/volunteers/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(client.get('/api/volunteers/').status_code, 401)
+
+
+class LocalCacheClaimsAuthenticationTests(ActorFixture, TestCase):
+
+    def test_reads_load_the_user(self):
+        token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+        for _ in range(2):
+            request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            with self.assertNumQueries(1):
+                user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertFalse(user.get_deferred_fields())
+
+
+class ReferenceCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return list(Disasters.objects.values_list('name', flat=True))
+
+    def cached(self, variant=''):
+        return cached_reference('tests.disasters', ('disasters.Disasters',), self.build, variant=variant)
+
+    def test_built_once_until_the_model_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            disaster = create_camp('North Camp').disasters
+        self.assertEqual(self.cached(), ['Flood'])
+        # A process-local cache reads the versions from the database
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cached(), ['Flood'])
+        self.assertEqual(self.builds, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            disaster.name = 'Cyclone'
+            disaster.save()
+        self.assertEqual(self.cached(), ['Cyclone'])
+        self.assertEqual(self.builds, 2)
+
+    def test_other_models_keep_the_entry(self):
+        self.cached()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('donor', 'donor@example.com', 'pass', role='donor')
+        self.cached()
+        self.assertEqual(self.builds, 1)
+
+    def test_variants_are_cached_apart(self):
+        factory = RequestFactory()
+        plain = request_variant(factory.get('/', {'page': 2}), 'fields', 'omit')
+        fields = request_variant(factory.get('/', {'fields': 'id'}), 'fields', 'omit')
+        self.assertEqual(plain, '')
+        self.assertNotEqual(fields, '')
+
+        self.cached(plain)
+        self.cached(fields)
+        self.cached(fields)
+        self.assertEqual(self.builds, 2)
+
+
+class SharedReferenceCacheTests(SharedCacheMixin, TestCase):
+
+    def test_hit_runs_no_query(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('donor', 'donor@example.com', 'pass', role='donor'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Resource.objects.create(name='Rice', category='food', unit='kg')
+        first = client.get('/api/resources/active/', {'fields': 'id,name'})
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = client.get('/api/resources/active/', {'fields': 'id,name'})
+        self.assertEqual(second.json(), first.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Resource.objects.create(name='Water', category='water', unit='l')
+        self.assertEqual(len(client.get('/api/resources/active/', {'fields': 'id,name'}).json()), 2)
@@ -11,6 +11,7 @@ from .views import (
     register_user,
     protected_route,
     user_profile,
+    location_ping,
     system_summary,
 
     # ViewSets
@@ -34,6 +35,12 @@ from .views import (
     resource_analytics,
     donation_matching,
     volunteer_coordination,
+
+    # Data exports
+    export_dataset,
+
+    # Delta sync
+    sync_changes,
 )
 
 # -------------------------
@@ -74,6 +81,7 @@ urlpatterns = [
     # Protected user routes
     path('protected/', protected_route, name='protected'),
     path('user/profile/', user_profile, name='user_profile'),
+    path('user/location/ping/', location_ping, name='location_ping'),
 
     # Admin dashboard
     path('admin/dashboard/', admin_dashboard, name='admin_dashboard'),
@@ -82,6 +90,12 @@ urlpatterns = [
     path('admin/donation-matching/', donation_matching, name='donation_matching'),
     path('admin/volunteer-coordination/', volunteer_coordination, name='volunteer_coordination'),
 
+    # Streaming data exports
+    path('exports/<str:dataset>.<str:export_format>', export_dataset, name='export_dataset'),
+
+    # Delta sync for the mobile client
+    path('sync/', sync_changes, name='sync_changes'),
+
     # API ViewSets
     path('', include(router.urls)),
 ]
@@ -1,4 +1,4 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth import get_user_model, authenticate
 from django.conf import settings
 from rest_framework.decorators import api_view, permission_classes, action
@@ -6,16 +6,16 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework import status, viewsets, permissions
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Count, Sum, Avg, Prefetch
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta
 
-from users.models import User, Volunteer, Victim, CampAdmin, VolunteerSkill
+from users.models import User, Volunteer, Victim, CampAdmin
+from users.location_buffer import location_buffer
 from relief.models import Resource, ResourceRequest, ResourceInventoryTransaction
 from operations.models import (
     Donation,
-    DonationItem,
     DonationAcknowledgment,
     HelpRequest,
     TaskAssignment,
@@ -26,13 +26,21 @@ from disasters.models import Disasters
 from alerts.models import Alert, WeatherAlert
 from shelters.models import Camp
 
+from .authentication import ClaimsRefreshToken
+from .conditional import ConditionalGetMixin
+from .dashboard import admin_dashboard_stats
+from .refdata import cached_reference, request_variant
+from .sync import SyncTokenError, collect_changes, parse_collections
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, parse_export_bound, stream_rows
+from .stats import read_counters, ranked
 from .serializers import (
     UserSerializer, VolunteerSerializer, VictimSerializer, CampAdminSerializer,
     DisasterSerializer, CampSerializer, AlertSerializer, WeatherAlertSerializer,
     ResourceSerializer, ResourceRequestSerializer, ResourceInventoryTransactionSerializer,
     DonationSerializer, DonationItemSerializer,
     DonationAcknowledgmentSerializer, HelpRequestSerializer, TaskAssignmentSerializer,
-    TransportSerializer, TransportTripSerializer
+    TransportSerializer, TransportTripSerializer, PREFETCHED_STATUS_HISTORY,
+    parse_field_paths, field_selected
 )
 
 User = get_user_model()
@@ -94,16 +102,30 @@ def register_user(request):
         # If victim, automatically find nearest camp and create camp admin assignment suggestion
         nearest_camp_info = None
         if role == 'victim' and latitude and longitude:
-            from operations.utils import find_nearest_camp
+            from operations.utils import find_nearest_camp, calculate_distance, rounded_distance
             nearest_camp = find_nearest_camp(float(latitude), float(longitude), radius_km=100)
             if nearest_camp:
                 nearest_camp_info = {
                     'camp_id': nearest_camp.id,
                     'camp_name': nearest_camp.name,
-                    'distance_km': None  # Can calculate if needed
+                    'distance_km': rounded_distance(calculate_distance(
+                        latitude, longitude, nearest_camp.latitude, nearest_camp.longitude
+                    ))
                 }
 
-        refresh = RefreshToken.for_user(user)
+        # Tag the registration with the active disaster zone it falls in, if any
+        disaster_info = None
+        if latitude and longitude:
+            from disasters.utils import locate_disaster
+            disaster = locate_disaster(latitude, longitude)
+            if disaster:
+                disaster_info = {
+                    'disaster_id': disaster.id,
+                    'disaster_name': disaster.name,
+                    'disaster_type': disaster.disaster_type
+                }
+
+        refresh = ClaimsRefreshToken.for_user(user)
         
         return Response({
             "message": "User registered successfully",
@@ -112,6 +134,7 @@ def register_user(request):
             "role": user.role,
             "location_saved": bool(latitude and longitude),
             "nearest_camp": nearest_camp_info,
+            "disaster": disaster_info,
             "access": str(refresh.access_token),
             "refresh": str(refresh)
         }, status=status.HTTP_201_CREATED)
@@ -137,7 +160,7 @@ def login_user(request):
 
     user = authenticate(username=username, password=password)
     if user is not None:
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response({
             "message": "Login successful",
             "user_id": user.id,
@@ -234,12 +257,141 @@ def user_profile(request):
         })
 
 
+MAX_LOCATION_PINGS = 500
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def location_ping(request):
+    """
+    Record the caller's GPS position without a full profile save
+    - Body is one ping {latitude, longitude, timestamp?} or {pings: [...]}
+    - Pings are buffered (newest wins) and flushed to the database in batches
+    """
+    pings = request.data.get('pings') if isinstance(request.data, dict) and 'pings' in request.data else [request.data]
+    if not isinstance(pings, list) or not pings:
+        return Response({'error': 'pings must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(pings) > MAX_LOCATION_PINGS:
+        return Response({'error': f'At most {MAX_LOCATION_PINGS} pings per request'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    now = timezone.now()
+    latest = None
+    rejected = 0
+    for ping in pings:
+        try:
+            latitude = float(ping['latitude'])
+            longitude = float(ping['longitude'])
+        except (KeyError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            rejected += 1
+            continue
+        try:
+            timestamp = parse_datetime(str(ping['timestamp'])) if ping.get('timestamp') else now
+        except ValueError:
+            # Well formed but impossible, e.g. month 13
+            timestamp = None
+        if timestamp is None:
+            rejected += 1
+            continue
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        # Device clocks drift; never accept a position from the future
+        timestamp = min(timestamp, now)
+        if latest is None or timestamp >= latest[2]:
+            latest = (latitude, longitude, timestamp)
+    
+    if latest is None:
+        return Response({'error': 'No valid pings', 'rejected': rejected}, status=status.HTTP_400_BAD_REQUEST)
+    
+    location_buffer.record(request.user.id, *latest)
+    location_buffer.maybe_flush()
+    
+    return Response({
+        'accepted': len(pings) - rejected,
+        'rejected': rejected,
+        'latitude': latest[0],
+        'longitude': latest[1],
+        'timestamp': latest[2].isoformat()
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 # ========================================
 # VIEWSETS FOR ALL MODELS
 # ========================================
 
-class VolunteerViewSet(viewsets.ModelViewSet):
-    queryset = Volunteer.objects.all()
+class SparseFieldsetMixin:
+    """
+    ?fields=id,user.username and ?omit=skills on GET requests: the serializer
+    drops the other fields and the queryset loads only the columns, joins
+    and prefetches the remaining fields read
+    """
+
+    def sparse_fieldset(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None, None
+        return (
+            parse_field_paths(request.query_params.get('fields')),
+            parse_field_paths(request.query_params.get('omit'))
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['omit'] = self.sparse_fieldset()
+        return context
+
+    def prepare_queryset(self, queryset):
+        fields, omit = self.sparse_fieldset()
+        if not fields and not omit:
+            return queryset
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return serializer.narrow_queryset(queryset)
+
+    def get_queryset(self):
+        return self.prepare_queryset(super().get_queryset())
+
+
+class StatusHistoryPrefetchMixin(SparseFieldsetMixin):
+    """
+    Prefetches each row's status history, newest first and with changed_by,
+    into the attribute the serializers read, so a list page costs a fixed
+    number of queries. ?include_history=0 leaves the history out
+    """
+
+    def include_history(self):
+        request = getattr(self, 'request', None)
+        if request is None:
+            return True
+        if request.query_params.get('include_history', '1').lower() in ('0', 'false', 'no'):
+            return False
+        return field_selected('status_history', *self.sparse_fieldset())
+
+    def prepare_queryset(self, queryset):
+        queryset = super().prepare_queryset(queryset)
+        if not self.include_history():
+            return queryset
+        history_model = queryset.model.status_history.rel.related_model
+        return queryset.prefetch_related(Prefetch(
+            'status_history',
+            queryset=history_model.objects.select_related('changed_by').order_by('-changed_at'),
+            to_attr=PREFETCHED_STATUS_HISTORY
+        ))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_history'] = self.include_history()
+        return context
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Saving a status change appends history the prefetched list does not have
+        serializer.instance.__dict__.pop(PREFETCHED_STATUS_HISTORY, None)
+
+
+class VolunteerViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Volunteer.objects.select_related('user').prefetch_related('skills')
     serializer_class = VolunteerSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -249,12 +401,13 @@ class VolunteerViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get all available volunteers"""
-        available_volunteers = self.queryset.filter(availability=True)
+        available_volunteers = self.prepare_queryset(self.queryset.filter(availability=True))
         serializer = self.get_serializer(available_volunteers, many=True)
         return Response(serializer.data)
 
 
-class DisasterViewSet(viewsets.ModelViewSet):
+class DisasterViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
+    version_models = ('disasters.Disasters',)
     queryset = Disasters.objects.all()
     serializer_class = DisasterSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -262,45 +415,56 @@ class DisasterViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active disasters"""
-        active_disasters = self.queryset.filter(status='active')
-        serializer = self.get_serializer(active_disasters, many=True)
-        return Response(serializer.data)
+        def build():
+            active_disasters = self.prepare_queryset(self.queryset.filter(status='active'))
+            return list(self.get_serializer(active_disasters, many=True).data)
 
+        return Response(cached_reference(
+            'api.disasters.active', self.version_models, build, variant=request_variant(request, 'fields', 'omit')
+        ))
 
-class CampViewSet(viewsets.ModelViewSet):
-    queryset = Camp.objects.all()
+
+class CampViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
+    version_models = ('shelters.Camp', 'disasters.Disasters')
+    queryset = Camp.objects.select_related('disasters')
     serializer_class = CampSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active camps"""
-        active_camps = self.queryset.filter(status='active')
-        serializer = self.get_serializer(active_camps, many=True)
-        return Response(serializer.data)
+        def build():
+            active_camps = self.prepare_queryset(self.queryset.filter(status='active'))
+            return list(self.get_serializer(active_camps, many=True).data)
 
+        return Response(cached_reference(
+            'api.camps.active', self.version_models, build, variant=request_variant(request, 'fields', 'omit')
+        ))
 
-class AlertViewSet(viewsets.ModelViewSet):
-    queryset = Alert.objects.all()
+
+class AlertViewSet(ConditionalGetMixin, StatusHistoryPrefetchMixin, viewsets.ModelViewSet):
+    version_models = ('alerts.Alert', 'alerts.AlertStatusHistory', 'disasters.Disasters')
+    queryset = Alert.objects.select_related('Disasters')
     serializer_class = AlertSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active alerts"""
-        active_alerts = self.queryset.filter(status='active')
+        active_alerts = self.prepare_queryset(self.queryset.filter(status='active'))
         serializer = self.get_serializer(active_alerts, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def critical(self, request):
         """Get all critical alerts"""
-        critical_alerts = self.queryset.filter(severity='critical', status='active')
+        critical_alerts = self.prepare_queryset(self.queryset.filter(severity='critical', status='active'))
         serializer = self.get_serializer(critical_alerts, many=True)
         return Response(serializer.data)
 
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
+    version_models = ('relief.Resource',)
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -308,39 +472,45 @@ class ResourceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active resources"""
-        active_resources = self.queryset.filter(is_active=True)
-        serializer = self.get_serializer(active_resources, many=True)
-        return Response(serializer.data)
+        def build():
+            active_resources = self.prepare_queryset(self.queryset.filter(is_active=True))
+            return list(self.get_serializer(active_resources, many=True).data)
 
+        return Response(cached_reference(
+            'api.resources.active', self.version_models, build, variant=request_variant(request, 'fields', 'omit')
+        ))
 
-class ResourceInventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ResourceInventoryTransaction.objects.all().order_by('-created_at')
+
+class ResourceInventoryTransactionViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ResourceInventoryTransaction.objects.select_related('resource', 'created_by').order_by('-created_at')
     serializer_class = ResourceInventoryTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ResourceRequestViewSet(viewsets.ModelViewSet):
-    queryset = ResourceRequest.objects.all()
+class ResourceRequestViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = ResourceRequest.objects.select_related(
+        'resource', 'camp', 'requested_by'
+    ).prefetch_related('status_history__changed_by')
     serializer_class = ResourceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending resource requests"""
-        pending_requests = self.queryset.filter(status='pending')
+        pending_requests = self.prepare_queryset(self.queryset.filter(status='pending'))
         serializer = self.get_serializer(pending_requests, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def urgent(self, request):
         """Get all urgent resource requests"""
-        urgent_requests = self.queryset.filter(priority='urgent', status='pending')
+        urgent_requests = self.prepare_queryset(self.queryset.filter(priority='urgent', status='pending'))
         serializer = self.get_serializer(urgent_requests, many=True)
         return Response(serializer.data)
 
 
-class DonationViewSet(viewsets.ModelViewSet):
-    queryset = Donation.objects.all()
+class DonationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Donation.objects.select_related('camp', 'created_by').prefetch_related('items__resource')
     serializer_class = DonationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -365,16 +535,17 @@ class DonationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class HelpRequestViewSet(viewsets.ModelViewSet):
-    queryset = HelpRequest.objects.all()
+class HelpRequestViewSet(StatusHistoryPrefetchMixin, viewsets.ModelViewSet):
+    queryset = HelpRequest.objects.select_related('victim', 'disasters', 'assigned_volunteer')
     serializer_class = HelpRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         user = self.request.user
         if user.role == 'victim':
-            return HelpRequest.objects.filter(victim=user)
-        return HelpRequest.objects.all()
+            return queryset.filter(victim=user)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(victim=self.request.user)
@@ -382,7 +553,7 @@ class HelpRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending SOS requests"""
-        pending_requests = self.queryset.filter(status='pending')
+        pending_requests = self.prepare_queryset(self.queryset.filter(status='pending'))
         serializer = self.get_serializer(pending_requests, many=True)
         return Response(serializer.data)
 
@@ -408,8 +579,8 @@ class HelpRequestViewSet(viewsets.ModelViewSet):
             return Response({"error": "Volunteer not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class TaskAssignmentViewSet(viewsets.ModelViewSet):
-    queryset = TaskAssignment.objects.all()
+class TaskAssignmentViewSet(StatusHistoryPrefetchMixin, viewsets.ModelViewSet):
+    queryset = TaskAssignment.objects.select_related('volunteer', 'help_request')
     serializer_class = TaskAssignmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -417,40 +588,41 @@ class TaskAssignmentViewSet(viewsets.ModelViewSet):
     def my_tasks(self, request):
         """Get tasks assigned to current user"""
         if request.user.role == 'volunteer':
-            tasks = self.queryset.filter(volunteer=request.user)
+            tasks = self.prepare_queryset(self.queryset.filter(volunteer=request.user))
             serializer = self.get_serializer(tasks, many=True)
             return Response(serializer.data)
         return Response({"error": "Only volunteers can view their tasks"}, status=status.HTTP_403_FORBIDDEN)
 
 
-class TransportViewSet(viewsets.ModelViewSet):
-    queryset = Transport.objects.all()
+class TransportViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Transport.objects.select_related('assigned_to_camp')
     serializer_class = TransportSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get all available transports"""
-        available_transports = self.queryset.filter(status='available')
+        available_transports = self.prepare_queryset(self.queryset.filter(status='available'))
         serializer = self.get_serializer(available_transports, many=True)
         return Response(serializer.data)
 
 
-class TransportTripViewSet(viewsets.ModelViewSet):
-    queryset = TransportTrip.objects.all()
+class TransportTripViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = TransportTrip.objects.select_related('transport').prefetch_related('assigned_resources', 'assigned_volunteers')
     serializer_class = TransportTripSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get scheduled or en route trips."""
-        trips = self.queryset.filter(status__in=['scheduled', 'en_route']).order_by('departure_time')
+        trips = self.prepare_queryset(self.queryset.filter(status__in=['scheduled', 'en_route']).order_by('departure_time'))
         serializer = self.get_serializer(trips, many=True)
         return Response(serializer.data)
 
 
-class WeatherAlertViewSet(viewsets.ModelViewSet):
-    queryset = WeatherAlert.objects.all()
+class WeatherAlertViewSet(ConditionalGetMixin, StatusHistoryPrefetchMixin, viewsets.ModelViewSet):
+    version_models = ('alerts.WeatherAlert', 'alerts.WeatherAlertStatusHistory', 'disasters.Disasters')
+    queryset = WeatherAlert.objects.select_related('related_disaster', 'issued_by')
     serializer_class = WeatherAlertSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -460,14 +632,16 @@ class WeatherAlertViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active weather alerts"""
-        active_alerts = self.queryset.filter(status__in=['forecast', 'active', 'warning'])
+        active_alerts = self.prepare_queryset(self.queryset.filter(status__in=['forecast', 'active', 'warning']))
         serializer = self.get_serializer(active_alerts, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def high_risk(self, request):
         """Get all high/extreme risk weather alerts"""
-        high_risk_alerts = self.queryset.filter(risk_level__in=['high', 'extreme'], status__in=['forecast', 'active', 'warning'])
+        high_risk_alerts = self.prepare_queryset(
+            self.queryset.filter(risk_level__in=['high', 'extreme'], status__in=['forecast', 'active', 'warning'])
+        )
         serializer = self.get_serializer(high_risk_alerts, many=True)
         return Response(serializer.data)
 
@@ -476,7 +650,7 @@ class WeatherAlertViewSet(viewsets.ModelViewSet):
         """Get weather alerts filtered by weather type"""
         weather_type = request.query_params.get('type', None)
         if weather_type:
-            alerts = self.queryset.filter(weather_type=weather_type)
+            alerts = self.prepare_queryset(self.queryset.filter(weather_type=weather_type))
             serializer = self.get_serializer(alerts, many=True)
             return Response(serializer.data)
         return Response({"error": "Please provide 'type' query parameter"}, status=status.HTTP_400_BAD_REQUEST)
@@ -493,60 +667,8 @@ def admin_dashboard(request):
     if request.user.role not in ['super_admin', 'camp_admin']:
         return Response({"error": "Access denied. Admin role required."}, status=status.HTTP_403_FORBIDDEN)
 
-    # Statistics
-    stats = {
-        "users": {
-            "total": User.objects.count(),
-            "volunteers": User.objects.filter(role='volunteer').count(),
-            "victims": User.objects.filter(role='victim').count(),
-            "admins": User.objects.filter(role__in=['super_admin', 'camp_admin']).count(),
-        },
-        "disasters": {
-            "total": Disasters.objects.count(),
-            "active": Disasters.objects.filter(status='active').count(),
-            "critical": Disasters.objects.filter(severity='critical', status='active').count(),
-        },
-        "camps": {
-            "total": Camp.objects.count(),
-            "active": Camp.objects.filter(status='active').count(),
-            "capacity_used": Camp.objects.aggregate(Sum('capacity'))['capacity__sum'] or 0,
-        },
-        "resources": {
-            "total": Resource.objects.count(),
-            "active": Resource.objects.filter(is_active=True).count(),
-            "pending_requests": ResourceRequest.objects.filter(status='pending').count(),
-            "urgent_requests": ResourceRequest.objects.filter(priority='urgent', status='pending').count(),
-        },
-        "donations": {
-            "total": Donation.objects.count(),
-            "this_month": Donation.objects.filter(
-                donation_date__gte=timezone.now().replace(day=1)
-            ).count(),
-            "total_items": DonationItem.objects.count(),
-        },
-        "sos_requests": {
-            "total": HelpRequest.objects.count(),
-            "pending": HelpRequest.objects.filter(status='pending').count(),
-            "in_progress": HelpRequest.objects.filter(status='in_progress').count(),
-            "resolved": HelpRequest.objects.filter(status='resolved').count(),
-        },
-        "alerts": {
-            "total": Alert.objects.count(),
-            "active": Alert.objects.filter(status='active').count(),
-            "critical": Alert.objects.filter(severity='critical', status='active').count(),
-        },
-        "weather_alerts": {
-            "total": WeatherAlert.objects.count(),
-            "active": WeatherAlert.objects.filter(status__in=['forecast', 'active', 'warning']).count(),
-            "high_risk": WeatherAlert.objects.filter(risk_level__in=['high', 'extreme']).count(),
-        },
-        "tasks": {
-            "total": TaskAssignment.objects.count(),
-            "assigned": TaskAssignment.objects.filter(status='assigned').count(),
-            "in_progress": TaskAssignment.objects.filter(status='in_progress').count(),
-            "completed": TaskAssignment.objects.filter(status='completed').count(),
-        },
-    }
+    # One aggregate query per table, served from a short-lived per-role snapshot
+    stats = admin_dashboard_stats(request.user.role)
 
     return Response(stats)
 
@@ -558,10 +680,8 @@ def camp_admin_dashboard(request):
     if request.user.role != 'camp_admin':
         return Response({"error": "Camp admin role required"}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        camp_admin = CampAdmin.objects.get(user=request.user)
-        camp = camp_admin.camp
-    except CampAdmin.DoesNotExist:
+    camp = Camp.objects.filter(id=request.actor.camp_id).first() if request.actor.camp_id else None
+    if camp is None:
         return Response({"error": "No camp assigned to this admin"}, status=status.HTTP_404_NOT_FOUND)
 
     # Camp-specific stats
@@ -601,21 +721,25 @@ def resource_analytics(request):
     if request.user.role not in ['super_admin', 'camp_admin']:
         return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
 
+    counters = read_counters('relief.resource', 'relief.resourcerequest')
+    requests_per_resource = ranked(counters.buckets('relief.resourcerequest', 'resource'), 'resource_id', limit=10)
+    quantity_per_resource = counters.buckets('relief.resourcerequest', 'resource_quantity')
+    resources = Resource.objects.in_bulk([int(row['resource_id']) for row in requests_per_resource])
+    most_requested = []
+    for row in requests_per_resource:
+        resource = resources.get(int(row['resource_id']))
+        most_requested.append({
+            'resource__name': resource.name if resource else None,
+            'resource__category': resource.category if resource else None,
+            'total_requests': row['count'],
+            'total_quantity': quantity_per_resource.get(row['resource_id'], 0),
+        })
+
     analytics = {
-        "resource_distribution": list(
-            Resource.objects.values('category').annotate(count=Count('id'))
-        ),
-        "requests_by_priority": list(
-            ResourceRequest.objects.values('priority').annotate(count=Count('id'))
-        ),
-        "requests_by_status": list(
-            ResourceRequest.objects.values('status').annotate(count=Count('id'))
-        ),
-        "most_requested_resources": list(
-            ResourceRequest.objects.values('resource__name', 'resource__category')
-            .annotate(total_requests=Count('id'), total_quantity=Sum('quantity_requested'))
-            .order_by('-total_requests')[:10]
-        ),
+        "resource_distribution": ranked(counters.buckets('relief.resource', 'category'), 'category'),
+        "requests_by_priority": ranked(counters.buckets('relief.resourcerequest', 'priority'), 'priority'),
+        "requests_by_status": ranked(counters.buckets('relief.resourcerequest', 'status'), 'status'),
+        "most_requested_resources": most_requested,
     }
 
     return Response(analytics)
@@ -669,29 +793,90 @@ def volunteer_coordination(request):
     if request.user.role not in ['super_admin', 'camp_admin']:
         return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
 
+    counters = read_counters('users.volunteer', 'users.volunteerskill', 'operations.taskassignment')
+    tasks_per_volunteer = ranked(counters.buckets('operations.taskassignment', 'volunteer'), 'volunteer_id', limit=10)
+    usernames = dict(User.objects.filter(
+        id__in=[int(row['volunteer_id']) for row in tasks_per_volunteer]
+    ).values_list('id', 'username'))
+
     coordination_data = {
-        "available_volunteers": Volunteer.objects.filter(availability=True).count(),
-        "volunteers_by_skill": list(
-            VolunteerSkill.objects.values('skill')
-            .annotate(count=Count('volunteer'))
-            .order_by('-count')
-        ),
-        "active_tasks": TaskAssignment.objects.filter(
-            status__in=['assigned', 'in_progress']
-        ).count(),
-        "volunteer_task_distribution": list(
-            TaskAssignment.objects.values('volunteer__user__username')
-            .annotate(task_count=Count('id'))
-            .order_by('-task_count')[:10]
-        ),
-        "task_status_breakdown": list(
-            TaskAssignment.objects.values('status').annotate(count=Count('id'))
+        "available_volunteers": counters.count('users.volunteer', 'availability', 'True'),
+        "volunteers_by_skill": ranked(counters.buckets('users.volunteerskill', 'skill'), 'skill'),
+        "active_tasks": (
+            counters.count('operations.taskassignment', 'status', 'assigned')
+            + counters.count('operations.taskassignment', 'status', 'in_progress')
         ),
+        "volunteer_task_distribution": [
+            {'volunteer__username': usernames.get(int(row['volunteer_id'])), 'task_count': row['count']}
+            for row in tasks_per_volunteer
+        ],
+        "task_status_breakdown": ranked(counters.buckets('operations.taskassignment', 'status'), 'status'),
     }
 
     return Response(coordination_data)
 
 
+# ========================================
+# DATA EXPORT ENDPOINTS
+# ========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_dataset(request, dataset, export_format):
+    """
+    Stream a table as NDJSON or CSV for after-action reports (super admin only)
+    - since / until: ISO date or datetime range on the row timestamp
+    - disaster_id / camp_id: restrict to one disaster or camp where the table supports it
+    """
+    if request.user.role != 'super_admin':
+        return Response({"error": "Access denied. Super admin role required."}, status=status.HTTP_403_FORBIDDEN)
+
+    export = EXPORT_DATASETS.get(dataset)
+    if export is None:
+        return Response({"error": f"Unknown export. Choose one of: {sorted(EXPORT_DATASETS)}"}, status=status.HTTP_404_NOT_FOUND)
+    if export_format not in EXPORT_FORMATS:
+        return Response({"error": f"Unknown format. Choose one of: {sorted(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        queryset = export.queryset(
+            since=parse_export_bound(request.GET.get('since')),
+            until=parse_export_bound(request.GET.get('until'), end=True),
+            disaster_id=request.GET.get('disaster_id'),
+            camp_id=request.GET.get('camp_id')
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        stream_rows(export, queryset, export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ========================================
+# DELTA SYNC ENDPOINT
+# ========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    Rows created, updated or deleted since the client's last sync
+    - token: sync_token from the previous response (omit for a full sync)
+    - collections: comma-separated subset of help_requests, tasks, donations, disasters, camps
+    Call again with the new token while has_more is true
+    """
+    try:
+        names = parse_collections(request.GET.get('collections'))
+        payload = collect_changes(request, request.GET.get('token'), names)
+    except SyncTokenError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(payload)
+
+
 # ========================================
 # SYSTEM STATUS & SUMMARY ENDPOINT
 # ========================================
@@ -772,7 +957,8 @@ def system_summary(request):
                     "GET /api/admin/dashboard/",
                     "GET /api/admin/resource-analytics/",
                     "GET /api/admin/donation-matching/",
-                    "GET /api/admin/volunteer-coordination/"
+                    "GET /api/admin/volunteer-coordination/",
+                    "GET /api/exports/<dataset>.<ndjson|csv>"
                 ]
             }
         },
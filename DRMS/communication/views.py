@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -10,6 +10,8 @@ import json
 
 from .models import Communication
 from users.models import User
+from api.pagination import paginate_keyset, PaginationError
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -21,14 +23,19 @@ from users.models import User
 def list_messages(request):
     """
     List all messages for the current user (both sent and received)
+    Paginated with ?cursor= and ?page_size=
     """
     user = request.user
     messages = Communication.objects.filter(
         Q(sender=user) | Q(receiver=user)
-    ).order_by('-sent_at')
+    ).select_related('sender', 'receiver')
+    try:
+        page = paginate_keyset(messages, request.GET, ('-sent_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     message_list = []
-    for msg in messages:
+    for msg in page:
         message_list.append({
             'id': msg.id,
             'sender': msg.sender.username,
@@ -37,10 +44,10 @@ def list_messages(request):
             'content': msg.content,
             'sent_at': msg.sent_at.isoformat(),
             'status': msg.status,
-            'is_sent_by_me': msg.sender == user
+            'is_sent_by_me': msg.sender_id == user.id
         })
     
-    return JsonResponse({'messages': message_list}, safe=False)
+    return JsonResponse({'messages': message_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -48,6 +55,7 @@ def list_messages(request):
 def get_conversation(request, user_id):
     """
     Get conversation between current user and another user
+    Oldest first; paginated with ?cursor= and ?page_size=
     """
     current_user = request.user
     other_user = get_object_or_404(User, id=user_id)
@@ -55,10 +63,14 @@ def get_conversation(request, user_id):
     messages = Communication.objects.filter(
         (Q(sender=current_user) & Q(receiver=other_user)) |
         (Q(sender=other_user) & Q(receiver=current_user))
-    ).order_by('sent_at')
+    ).select_related('sender')
+    try:
+        page = paginate_keyset(messages, request.GET, ('sent_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     conversation = []
-    for msg in messages:
+    for msg in page:
         conversation.append({
             'id': msg.id,
             'sender': msg.sender.username,
@@ -69,7 +81,7 @@ def get_conversation(request, user_id):
             'status': msg.status
         })
     
-    return JsonResponse({'conversation': conversation}, safe=False)
+    return JsonResponse({'conversation': conversation, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -226,15 +238,20 @@ def message_statistics(request):
 def unread_messages(request):
     """
     Get all unread messages for the current user
+    Paginated with ?cursor= and ?page_size=; count covers every page
     """
     user = request.user
     unread = Communication.objects.filter(
         receiver=user,
         status__in=['sent', 'delivered']
-    ).order_by('-sent_at')
+    )
+    try:
+        page = paginate_keyset(unread.select_related('sender'), request.GET, ('-sent_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     unread_list = []
-    for msg in unread:
+    for msg in page:
         unread_list.append({
             'id': msg.id,
             'sender': msg.sender.username,
@@ -245,7 +262,12 @@ def unread_messages(request):
             'status': msg.status
         })
     
-    return JsonResponse({'unread_messages': unread_list, 'count': len(unread_list)}, safe=False)
+    return JsonResponse({
+        'unread_messages': unread_list,
+        'count': unread.count(),
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more
+    }, safe=False)
 
 
 @login_required
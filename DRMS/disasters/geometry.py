@@ -0,0 +1,182 @@
+"""
+GeoJSON boundary parsing, simplification and point-in-polygon tests.
+
+Boundaries are normalised to a list of polygons, each polygon a list of
+rings (the outer ring first, then holes) and each ring a list of
+[lon, lat] positions, matching GeoJSON coordinate order.
+"""
+import json
+
+from django.core.exceptions import ValidationError
+
+
+# Douglas-Peucker tolerances in degrees stored for every boundary,
+# from street level (~10 m) to country level (~5 km)
+SIMPLIFY_TOLERANCES = [0.0001, 0.001, 0.01, 0.05]
+# Boundaries with more vertices than this are rejected when parsing
+MAX_BOUNDARY_VERTICES = 100000
+
+
+def _parse_ring(ring):
+    if not isinstance(ring, list) or len(ring) < 4:
+        raise ValidationError('Each polygon ring must have at least 4 positions')
+    positions = []
+    for position in ring:
+        if not isinstance(position, (list, tuple)) or len(position) < 2:
+            raise ValidationError('Each position must be a [longitude, latitude] pair')
+        try:
+            lon, lat = float(position[0]), float(position[1])
+        except (TypeError, ValueError):
+            raise ValidationError('Positions must contain numbers')
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValidationError(f'Position {[lon, lat]} is out of range')
+        positions.append([lon, lat])
+    if positions[0] != positions[-1]:
+        raise ValidationError('Polygon rings must be closed (first and last positions equal)')
+    return positions
+
+
+def _parse_polygon(coordinates):
+    if not isinstance(coordinates, list) or not coordinates:
+        raise ValidationError('Polygon coordinates must be a non-empty list of rings')
+    return [_parse_ring(ring) for ring in coordinates]
+
+
+def _collect_polygons(geometry, polygons):
+    if not isinstance(geometry, dict):
+        raise ValidationError('GeoJSON boundary must be an object')
+    geometry_type = geometry.get('type')
+    if geometry_type == 'FeatureCollection':
+        for feature in geometry.get('features') or []:
+            _collect_polygons(feature, polygons)
+    elif geometry_type == 'Feature':
+        _collect_polygons(geometry.get('geometry'), polygons)
+    elif geometry_type == 'Polygon':
+        polygons.append(_parse_polygon(geometry.get('coordinates')))
+    elif geometry_type == 'MultiPolygon':
+        coordinates = geometry.get('coordinates')
+        if not isinstance(coordinates, list):
+            raise ValidationError('MultiPolygon coordinates must be a list of polygons')
+        polygons.extend(_parse_polygon(polygon) for polygon in coordinates)
+    else:
+        raise ValidationError(f'Unsupported GeoJSON type: {geometry_type}. Use Polygon, MultiPolygon, Feature or FeatureCollection')
+
+
+def parse_boundary(text):
+    """
+    Parse and validate a GeoJSON boundary string.
+    Returns a list of polygons, or an empty list for a blank boundary.
+    Raises ValidationError if the boundary is not a valid polygonal GeoJSON
+    """
+    if not text or not text.strip():
+        return []
+    try:
+        geometry = json.loads(text)
+    except (TypeError, ValueError):
+        raise ValidationError('GeoJSON boundary is not valid JSON')
+
+    polygons = []
+    _collect_polygons(geometry, polygons)
+    if not polygons:
+        raise ValidationError('GeoJSON boundary does not contain any polygon')
+    if sum(len(ring) for polygon in polygons for ring in polygon) > MAX_BOUNDARY_VERTICES:
+        raise ValidationError(f'GeoJSON boundary has more than {MAX_BOUNDARY_VERTICES} vertices')
+    return polygons
+
+
+def polygons_bbox(polygons):
+    """Return (min_lat, max_lat, min_lon, max_lon) of the outer rings, or None"""
+    outer = [position for polygon in polygons for position in polygon[0]]
+    if not outer:
+        return None
+    lons = [position[0] for position in outer]
+    lats = [position[1] for position in outer]
+    return min(lats), max(lats), min(lons), max(lons)
+
+
+def _perpendicular_distance(point, start, end):
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return ((point[0] - start[0]) ** 2 + (point[1] - start[1]) ** 2) ** 0.5
+    return abs(dy * point[0] - dx * point[1] + end[0] * start[1] - end[1] * start[0]) / (dx * dx + dy * dy) ** 0.5
+
+
+def simplify_ring(ring, tolerance):
+    """
+    Douglas-Peucker simplification of a closed ring.
+    Rings that would collapse below a triangle are returned unchanged
+    """
+    if len(ring) <= 4:
+        return ring
+    keep = [False] * len(ring)
+    keep[0] = keep[-1] = True
+    # Split at the vertex farthest from the start so both halves are open polylines
+    farthest = max(range(1, len(ring) - 1), key=lambda i: _perpendicular_distance(ring[i], ring[0], ring[0]))
+    keep[farthest] = True
+    stack = [(0, farthest), (farthest, len(ring) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _perpendicular_distance(ring[i], ring[first], ring[last])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    simplified = [position for position, kept in zip(ring, keep) if kept]
+    return simplified if len(simplified) >= 4 else ring
+
+
+def simplify_polygons(polygons, tolerance):
+    """Simplify the outer ring and holes of every polygon"""
+    simplified = []
+    for polygon in polygons:
+        rings = [simplify_ring(polygon[0], tolerance)]
+        rings.extend(simplify_ring(hole, tolerance) for hole in polygon[1:])
+        simplified.append(rings)
+    return simplified
+
+
+def _in_ring(lon, lat, ring):
+    """Even-odd ray casting test"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygons(lat, lon, polygons, bbox=None):
+    """
+    Whether (lat, lon) lies inside any polygon (and outside its holes).
+    bbox, as returned by polygons_bbox, rejects far-away points before any
+    ring is scanned
+    """
+    lat, lon = float(lat), float(lon)
+    if bbox is not None:
+        min_lat, max_lat, min_lon, max_lon = bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+    for polygon in polygons:
+        if _in_ring(lon, lat, polygon[0]) and not any(_in_ring(lon, lat, hole) for hole in polygon[1:]):
+            return True
+    return False
+
+
+def tolerance_for_zoom(zoom):
+    """Largest stored tolerance not coarser than one 256px-tile pixel at this zoom"""
+    pixel_degrees = 360.0 / (256 * 2 ** zoom)
+    suitable = [tolerance for tolerance in SIMPLIFY_TOLERANCES if tolerance <= pixel_degrees]
+    return max(suitable) if suitable else None
+
+
+def to_geojson(polygons):
+    """Return a GeoJSON MultiPolygon geometry for the polygons"""
+    return {'type': 'MultiPolygon', 'coordinates': polygons}
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-17 12:10
+
+from django.core.exceptions import ValidationError
+from django.db import migrations, models
+
+
+def index_boundaries(apps, schema_editor):
+    from disasters.geometry import SIMPLIFY_TOLERANCES, parse_boundary, polygons_bbox, simplify_polygons
+
+    Disasters = apps.get_model('disasters', 'Disasters')
+    disasters = []
+    for disaster in Disasters.objects.exclude(geojson_boundary=''):
+        try:
+            polygons = parse_boundary(disaster.geojson_boundary)
+        except ValidationError:
+            # Leave invalid legacy boundaries unindexed; they are validated on the next save
+            continue
+        bbox = polygons_bbox(polygons)
+        if bbox is None:
+            continue
+        disaster.boundary_min_lat, disaster.boundary_max_lat, disaster.boundary_min_lon, disaster.boundary_max_lon = bbox
+        disaster.boundary_polygons = polygons
+        disaster.boundary_simplified = {
+            str(tolerance): simplify_polygons(polygons, tolerance) for tolerance in SIMPLIFY_TOLERANCES
+        }
+        disasters.append(disaster)
+    Disasters.objects.bulk_update(disasters, [
+        'boundary_min_lat', 'boundary_max_lat', 'boundary_min_lon', 'boundary_max_lon',
+        'boundary_polygons', 'boundary_simplified',
+    ], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disasters', '0002_disasters_affected_population_estimate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_max_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_max_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_min_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_min_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_polygons',
+            field=models.JSONField(blank=True, editable=False, help_text='Parsed boundary polygons', null=True),
+        ),
+        migrations.AddField(
+            model_name='disasters',
+            name='boundary_simplified',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Simplified boundary polygons keyed by tolerance'),
+        ),
+        migrations.AddIndex(
+            model_name='disasters',
+            index=models.Index(fields=['boundary_min_lat', 'boundary_max_lat'], name='disasters_boundar_b6d34c_idx'),
+        ),
+        migrations.RunPython(index_boundaries, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.core.validators import MinLengthValidator, MinValueValidator
 
+from .geometry import (
+    SIMPLIFY_TOLERANCES, parse_boundary, point_in_polygons, polygons_bbox, simplify_polygons
+)
+
 class Disasters(models.Model):
     DISASTER_TYPES = [
         ('earthquake', 'Earthquake'),
@@ -41,6 +45,13 @@ class Disasters(models.Model):
     impact_radius_km = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(0)])
     impact_area_description = models.TextField(blank=True)
     geojson_boundary = models.TextField(blank=True, help_text="Optional GeoJSON polygon for mapping.")
+    # Derived from geojson_boundary on save
+    boundary_min_lat = models.FloatField(null=True, blank=True, editable=False)
+    boundary_max_lat = models.FloatField(null=True, blank=True, editable=False)
+    boundary_min_lon = models.FloatField(null=True, blank=True, editable=False)
+    boundary_max_lon = models.FloatField(null=True, blank=True, editable=False)
+    boundary_polygons = models.JSONField(null=True, blank=True, editable=False, help_text="Parsed boundary polygons")
+    boundary_simplified = models.JSONField(default=dict, blank=True, editable=False, help_text="Simplified boundary polygons keyed by tolerance")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -51,6 +62,7 @@ class Disasters(models.Model):
             models.Index(fields=['disaster_type', 'status']),
             models.Index(fields=['severity']),
             models.Index(fields=['start_date']),
+            models.Index(fields=['boundary_min_lat', 'boundary_max_lat']),  # For point-in-boundary lookups
         ]
         constraints = [
             models.CheckConstraint(
@@ -73,4 +85,61 @@ class Disasters(models.Model):
         ordering = ['-start_date']
 
     def __str__(self):  # Fixed: double underscores
-        return f"{self.name} ({self.disaster_type})"
\ No newline at end of file
+        return f"{self.name} ({self.disaster_type})"
+
+    BOUNDARY_FIELDS = [
+        'boundary_min_lat', 'boundary_max_lat', 'boundary_min_lon', 'boundary_max_lon',
+        'boundary_polygons', 'boundary_simplified',
+    ]
+
+    def clean(self):
+        super().clean()
+        parse_boundary(self.geojson_boundary)
+
+    def index_boundary(self):
+        """Parse geojson_boundary and refresh the bbox and simplified polygons"""
+        polygons = parse_boundary(self.geojson_boundary)
+        bbox = polygons_bbox(polygons)
+        self.boundary_min_lat, self.boundary_max_lat, self.boundary_min_lon, self.boundary_max_lon = bbox or (None,) * 4
+        self.boundary_polygons = polygons or None
+        self.boundary_simplified = {
+            str(tolerance): simplify_polygons(polygons, tolerance) for tolerance in SIMPLIFY_TOLERANCES
+        } if polygons else {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored boundary, so save() only re-indexes a changed one
+        instance._loaded_boundary = instance.__dict__.get('geojson_boundary')
+        return instance
+
+    def boundary_changed(self):
+        """Whether geojson_boundary differs from the stored one (always True for a new row)"""
+        if self._state.adding:
+            return True
+        if 'geojson_boundary' not in self.__dict__:
+            # Deferred, so it cannot have been assigned
+            return False
+        return getattr(self, '_loaded_boundary', None) != self.geojson_boundary
+
+    def save(self, *args, **kwargs):
+        # Validate and index a new or changed boundary so point lookups never parse JSON
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or 'geojson_boundary' in update_fields) and self.boundary_changed():
+            self.index_boundary()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.BOUNDARY_FIELDS)
+        super().save(*args, **kwargs)
+        self._loaded_boundary = self.__dict__.get('geojson_boundary')
+
+    @property
+    def boundary_bbox(self):
+        if self.boundary_min_lat is None:
+            return None
+        return (self.boundary_min_lat, self.boundary_max_lat, self.boundary_min_lon, self.boundary_max_lon)
+
+    def contains_point(self, lat, lon):
+        """Whether (lat, lon) lies inside the disaster boundary"""
+        if not self.boundary_polygons:
+            return False
+        return point_in_polygons(lat, lon, self.boundary_polygons, self.boundary_bbox)
@@ -8,6 +8,8 @@ urlpatterns = [
     path('disasters/<int:disaster_id>/update/', views.update_disaster, name='update_disaster'),
     path('disasters/active/', views.active_disasters, name='active_disasters'),
     path('disasters/critical/', views.critical_disasters, name='critical_disasters'),
+    path('disaster-boundaries/locate/', views.locate_disasters, name='locate_disasters'),
+    path('disasters/<int:disaster_id>/boundary/', views.disaster_boundary, name='disaster_boundary'),
     path('disasters/statistics/', views.disaster_statistics, name='disaster_statistics'),
 ]
 
@@ -0,0 +1,47 @@
+"""
+Point-in-boundary lookups against the indexed disaster boundaries
+"""
+from api.refdata import cached_reference
+
+from .models import Disasters
+
+
+def find_disasters_at(lat, lon, statuses=('active',)):
+    """
+    Return the disasters whose boundary contains (lat, lon), newest first.
+    The stored bounding boxes are filtered in the database, so only the
+    few candidate boundaries are tested polygon by polygon
+    """
+    if lat is None or lon is None:
+        return []
+    lat, lon = float(lat), float(lon)
+    candidates = Disasters.objects.filter(
+        boundary_min_lat__lte=lat,
+        boundary_max_lat__gte=lat,
+        boundary_min_lon__lte=lon,
+        boundary_max_lon__gte=lon
+    )
+    if statuses:
+        candidates = candidates.filter(status__in=statuses)
+    candidates = candidates.defer('boundary_simplified').order_by('-start_date', '-id')
+    return [disaster for disaster in candidates if disaster.contains_point(lat, lon)]
+
+
+def active_disaster_boundaries():
+    """The active disasters with a boundary, newest first, from the reference-data cache"""
+    return cached_reference('disasters.active_boundaries', ('disasters.Disasters',), lambda: list(
+        Disasters.objects.filter(status='active', boundary_polygons__isnull=False)
+        .defer('geojson_boundary', 'boundary_simplified')
+        .order_by('-start_date', '-id')
+    ))
+
+
+def locate_disaster(lat, lon):
+    """Return the most recent active disaster whose boundary contains (lat, lon), or None"""
+    if lat is None or lon is None:
+        return None
+    lat, lon = float(lat), float(lon)
+    for disaster in active_disaster_boundaries():
+        if disaster.contains_point(lat, lon):
+            return disaster
+    return None
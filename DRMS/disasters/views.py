@@ -1,17 +1,25 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import timedelta
 import json
 
 from .models import Disasters
+from .geometry import to_geojson, tolerance_for_zoom
+from .utils import find_disasters_at
 from shelters.models import Camp
 from alerts.models import Alert
 from operations.models import HelpRequest
+from api.conditional import conditional_get
+from api.pagination import paginate_keyset, PaginationError
+from api.refdata import cached_reference
+from api.stats import read_counters, ranked
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -20,9 +28,11 @@ from operations.models import HelpRequest
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('disasters.Disasters')
 def list_disasters(request):
     """
     List all disasters with optional filtering
+    Paginated with ?cursor= and ?page_size=
     """
     disasters = Disasters.objects.all()
     
@@ -41,10 +51,13 @@ def list_disasters(request):
     if severity:
         disasters = disasters.filter(severity=severity)
     
-    disasters = disasters.order_by('-start_date')
+    try:
+        page = paginate_keyset(disasters, request.GET, ('-start_date',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     disaster_list = []
-    for disaster in disasters:
+    for disaster in page:
         disaster_list.append({
             'id': disaster.id,
             'name': disaster.name,
@@ -65,11 +78,12 @@ def list_disasters(request):
             'updated_at': disaster.updated_at.isoformat()
         })
     
-    return JsonResponse({'disasters': disaster_list}, safe=False)
+    return JsonResponse({'disasters': disaster_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('disasters.Disasters', 'shelters.Camp', 'alerts.Alert', 'operations.HelpRequest')
 def get_disaster(request, disaster_id):
     """
     Get a specific disaster by ID with related information
@@ -206,6 +220,8 @@ def create_disaster(request):
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': f"Invalid geojson_boundary: {'; '.join(e.messages)}"}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -213,6 +229,7 @@ def create_disaster(request):
 @login_required
 @require_http_methods(["PUT", "PATCH"])
 @csrf_exempt
+@transaction.atomic
 def update_disaster(request, disaster_id):
     """
     Update a disaster (admin only)
@@ -269,6 +286,8 @@ def update_disaster(request, disaster_id):
             disaster.impact_radius_km = data['impact_radius_km']
         if 'impact_area_description' in data:
             disaster.impact_area_description = data['impact_area_description']
+        if 'geojson_boundary' in data:
+            disaster.geojson_boundary = data['geojson_boundary'] or ''
         
         disaster.save()
         
@@ -280,6 +299,8 @@ def update_disaster(request, disaster_id):
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': f"Invalid geojson_boundary: {'; '.join(e.messages)}"}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -290,11 +311,9 @@ def active_disasters(request):
     """
     Get all active disasters
     """
-    disasters = Disasters.objects.filter(status='active').order_by('-start_date', '-severity')
-    
-    disaster_list = []
-    for disaster in disasters:
-        disaster_list.append({
+    def build():
+        disasters = Disasters.objects.filter(status='active').order_by('-start_date', '-severity')
+        return [{
             'id': disaster.id,
             'name': disaster.name,
             'disaster_type': disaster.disaster_type,
@@ -302,8 +321,9 @@ def active_disasters(request):
             'location': disaster.location,
             'start_date': disaster.start_date.isoformat(),
             'affected_population_estimate': disaster.affected_population_estimate
-        })
-    
+        } for disaster in disasters]
+
+    disaster_list = cached_reference('disasters.active_disasters', ('disasters.Disasters',), build)
     return JsonResponse({'active_disasters': disaster_list}, safe=False)
 
 
@@ -335,27 +355,89 @@ def disaster_statistics(request):
     """
     Get disaster statistics
     """
+    counters = read_counters('disasters.disasters')
     stats = {
-        'total_disasters': Disasters.objects.count(),
-        'active_disasters': Disasters.objects.filter(status='active').count(),
-        'resolved_disasters': Disasters.objects.filter(status='resolved').count(),
-        'contained_disasters': Disasters.objects.filter(status='contained').count(),
-        'disasters_by_type': list(
-            Disasters.objects.values('disaster_type')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        ),
-        'disasters_by_severity': list(
-            Disasters.objects.values('severity')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        ),
-        'total_affected_population': Disasters.objects.aggregate(
-            total=Sum('affected_population_estimate')
-        )['total'] or 0,
-        'total_estimated_damage': float(
-            Disasters.objects.aggregate(total=Sum('estimated_damage'))['total'] or 0
-        )
+        'total_disasters': counters.count('disasters.disasters'),
+        'active_disasters': counters.count('disasters.disasters', 'status', 'active'),
+        'resolved_disasters': counters.count('disasters.disasters', 'status', 'resolved'),
+        'contained_disasters': counters.count('disasters.disasters', 'status', 'contained'),
+        'disasters_by_type': ranked(counters.buckets('disasters.disasters', 'disaster_type'), 'disaster_type'),
+        'disasters_by_severity': ranked(counters.buckets('disasters.disasters', 'severity'), 'severity'),
+        'total_affected_population': counters.count('disasters.disasters', 'affected_population'),
+        'total_estimated_damage': float(counters.total('disasters.disasters', 'estimated_damage'))
     }
     
     return JsonResponse(stats)
+
+
+@login_required
+@require_http_methods(["GET"])
+def locate_disasters(request):
+    """
+    Find the disasters whose boundary contains a point
+    - latitude, longitude: the point to test
+    - include_inactive=true also matches contained and resolved disasters
+    """
+    try:
+        latitude = float(request.GET.get('latitude'))
+        longitude = float(request.GET.get('longitude'))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'latitude and longitude are required numbers'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return JsonResponse({'error': 'latitude or longitude out of range'}, status=400)
+    
+    statuses = None if request.GET.get('include_inactive') == 'true' else ('active',)
+    disasters = find_disasters_at(latitude, longitude, statuses=statuses)
+    
+    disaster_list = [{
+        'id': disaster.id,
+        'name': disaster.name,
+        'disaster_type': disaster.disaster_type,
+        'severity': disaster.severity,
+        'status': disaster.status,
+        'start_date': disaster.start_date.isoformat()
+    } for disaster in disasters]
+    
+    return JsonResponse({'latitude': latitude, 'longitude': longitude, 'disasters': disaster_list})
+
+
+@login_required
+@require_http_methods(["GET"])
+def disaster_boundary(request, disaster_id):
+    """
+    Get a disaster boundary as GeoJSON, simplified for the map zoom level
+    - zoom: web map zoom level; omit it for the full-resolution boundary
+    """
+    if 'zoom' in request.GET:
+        try:
+            zoom = int(request.GET['zoom'])
+        except ValueError:
+            return JsonResponse({'error': 'zoom must be a number'}, status=400)
+        tolerance = tolerance_for_zoom(min(max(zoom, 0), 22))
+    else:
+        tolerance = None
+    
+    fields = ['id', 'name', 'boundary_min_lat', 'boundary_max_lat', 'boundary_min_lon', 'boundary_max_lon']
+    fields.append('boundary_simplified' if tolerance is not None else 'boundary_polygons')
+    disaster = get_object_or_404(Disasters.objects.only(*fields), id=disaster_id)
+    
+    if disaster.boundary_bbox is None:
+        return JsonResponse({'error': 'Disaster has no boundary'}, status=404)
+    
+    if tolerance is not None:
+        polygons = disaster.boundary_simplified.get(str(tolerance))
+    else:
+        polygons = disaster.boundary_polygons
+    min_lat, max_lat, min_lon, max_lon = disaster.boundary_bbox
+    
+    return JsonResponse({
+        'type': 'Feature',
+        'bbox': [min_lon, min_lat, max_lon, max_lat],
+        'geometry': to_geojson(polygons),
+        'properties': {
+            'disaster_id': disaster.id,
+            'name': disaster.name,
+            'tolerance': tolerance,
+            'vertices': sum(len(ring) for polygon in polygons for ring in polygon)
+        }
+    })
@@ -0,0 +1,192 @@
+"""
+Server-side map clustering of help requests, camps and volunteers.
+
+Points are bucketed into a square grid whose cell size halves with every
+zoom level, and the buckets are counted in the database with a GROUP BY on
+the cell indexes, so the payload size depends on the viewport and zoom
+rather than on the number of rows. Results are cached per tile: layer,
+disaster, zoom and the viewport snapped outward to the cell grid.
+
+Help requests and volunteers are people's positions. Unless the caller
+asks for exact clusters (admins), their clusters are placed at the centre
+of their grid cell and carry no row id, the cells are never finer than
+PRIVATE_MAX_ZOOM allows (about 1 km), and cells holding fewer than
+MIN_PRIVATE_CLUSTER_SIZE points are left out, so zooming in cannot
+single out one person.
+"""
+from math import floor, ceil
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, FloatField, Min, Q
+from django.db.models.functions import Cast, Floor
+
+
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+# Clusters per 256px map tile edge, i.e. one cluster per 64px square
+CLUSTER_CELLS_PER_TILE = 4
+# Viewports needing more cells than this are clustered at a coarser zoom
+MAX_CLUSTER_CELLS = 4096
+MAP_CLUSTER_CACHE_SECONDS = 30
+
+MAP_LAYERS = ['help_requests', 'camps', 'volunteers']
+# Layers only admins may see
+ADMIN_MAP_LAYERS = ['volunteers']
+# Layers whose points are snapped to their cell unless exact clusters are asked for
+PRIVATE_MAP_LAYERS = ['help_requests', 'volunteers']
+# Finest zoom for those layers: cells of 0.011 degrees, about 1.2 km
+PRIVATE_MAX_ZOOM = 13
+# Cells of those layers with fewer points than this are not returned
+MIN_PRIVATE_CLUSTER_SIZE = 3
+
+
+def cell_size_for_zoom(zoom):
+    """Grid cell edge in degrees for a web map zoom level"""
+    return 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+
+
+def parse_bbox(value):
+    """
+    Parse "min_lon,min_lat,max_lon,max_lat" into floats.
+    min_lon may exceed max_lon for viewports crossing the antimeridian.
+    Raises ValueError on malformed input
+    """
+    if not value:
+        return (-180.0, -90.0, 180.0, 90.0)
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be "min_lon,min_lat,max_lon,max_lat"')
+    min_lon, min_lat, max_lon, max_lat = parts
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError('bbox is out of range')
+    return (min_lon, min_lat, max_lon, max_lat)
+
+
+def snap_bbox(bbox, zoom):
+    """
+    Expand a bbox outward to whole grid cells, coarsening the zoom until the
+    viewport fits in MAX_CLUSTER_CELLS. Returns (zoom, cell_size, snapped bbox)
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    while True:
+        cell = cell_size_for_zoom(zoom)
+        rows = max(ceil((max_lat + 90) / cell) - floor((min_lat + 90) / cell), 1)
+        lon_span = max_lon - min_lon if min_lon <= max_lon else 360 - (min_lon - max_lon)
+        cols = min(ceil(lon_span / cell) + 1, ceil(360 / cell))
+        if rows * cols <= MAX_CLUSTER_CELLS or zoom == MIN_ZOOM:
+            break
+        zoom -= 1
+
+    snapped = (
+        max(floor((min_lon + 180) / cell) * cell - 180, -180.0),
+        max(floor((min_lat + 90) / cell) * cell - 90, -90.0),
+        min(ceil((max_lon + 180) / cell) * cell - 180, 180.0),
+        min(ceil((max_lat + 90) / cell) * cell - 90, 90.0),
+    )
+    if min_lon > max_lon and snapped[0] <= snapped[2]:
+        # Snapping closed the gap of a wrapped viewport; it now spans every longitude
+        snapped = (-180.0, snapped[1], 180.0, snapped[3])
+    return zoom, cell, tuple(round(value, 9) for value in snapped)
+
+
+def _bbox_q(bbox, lat_field, lon_field):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    query = Q(**{f'{lat_field}__gte': min_lat, f'{lat_field}__lte': max_lat})
+    if min_lon <= max_lon:
+        return query & Q(**{f'{lon_field}__gte': min_lon, f'{lon_field}__lte': max_lon})
+    # Viewport wraps around the antimeridian
+    return query & (Q(**{f'{lon_field}__gte': min_lon}) | Q(**{f'{lon_field}__lte': max_lon}))
+
+
+def cluster_queryset(queryset, cell, bbox, status_choices=None, status_field='status', exact=True):
+    """
+    GROUP BY grid cell inside the bbox.
+    Returns a list of cluster dicts with count, centroid and status breakdown.
+    With exact=False each cluster is placed at its cell centre and has no id,
+    and cells with fewer than MIN_PRIVATE_CLUSTER_SIZE points are dropped
+    """
+    annotations = {
+        'count': Count('id'),
+        'centroid_lat': Avg(Cast('latitude', FloatField())),
+        'centroid_lon': Avg(Cast('longitude', FloatField())),
+        'first_id': Min('id'),
+    }
+    for value, _ in status_choices or []:
+        annotations[f'status_{value}'] = Count('id', filter=Q(**{status_field: value}))
+
+    rows = queryset.filter(
+        _bbox_q(bbox, 'latitude', 'longitude')
+    ).annotate(
+        cell_row=Floor((Cast('latitude', FloatField()) + 90.0) / cell),
+        cell_col=Floor((Cast('longitude', FloatField()) + 180.0) / cell),
+    ).values('cell_row', 'cell_col').annotate(**annotations).order_by('cell_row', 'cell_col')
+    if not exact:
+        rows = rows.filter(count__gte=MIN_PRIVATE_CLUSTER_SIZE)
+
+    clusters = []
+    for row in rows:
+        if exact:
+            latitude, longitude = row['centroid_lat'], row['centroid_lon']
+        else:
+            latitude = min((row['cell_row'] + 0.5) * cell - 90, 90.0)
+            longitude = min((row['cell_col'] + 0.5) * cell - 180, 180.0)
+        cluster = {
+            'cell': f"{int(row['cell_row'])}:{int(row['cell_col'])}",
+            'count': row['count'],
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            # Single points are sent with their id so the client can draw a pin
+            'id': row['first_id'] if exact and row['count'] == 1 else None,
+        }
+        if status_choices:
+            cluster['status_breakdown'] = {
+                value: row[f'status_{value}'] for value, _ in status_choices if row[f'status_{value}']
+            }
+        clusters.append(cluster)
+    return clusters
+
+
+def _layer_clusters(layer, cell, bbox, disaster_id, exact):
+    from users.models import User
+    from shelters.models import Camp
+    from .models import HelpRequest
+
+    if layer == 'help_requests':
+        queryset = HelpRequest.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        if disaster_id:
+            queryset = queryset.filter(disasters_id=disaster_id)
+        return cluster_queryset(queryset, cell, bbox, HelpRequest.STATUS_CHOICES, exact=exact)
+    if layer == 'camps':
+        queryset = Camp.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        if disaster_id:
+            queryset = queryset.filter(disasters_id=disaster_id)
+        return cluster_queryset(queryset, cell, bbox, Camp.STATUS_CHOICES)
+    queryset = User.objects.filter(role='volunteer', latitude__isnull=False, longitude__isnull=False)
+    return cluster_queryset(queryset, cell, bbox, exact=exact)
+
+
+def map_clusters(layers, zoom, bbox, disaster_id=None, exact=False):
+    """
+    Return {'zoom', 'cell_size', 'bbox', 'cell_sizes', <layer>: [clusters]}
+    for the viewport, serving each layer from the tile cache when possible.
+    cell_sizes gives each layer's cell, coarser than cell_size for the
+    private layers past PRIVATE_MAX_ZOOM. exact=True keeps the centroids,
+    ids and full resolution of the private layers; only pass it for admins
+    """
+    zoom, cell, snapped = snap_bbox(bbox, zoom)
+    result = {'zoom': zoom, 'cell_size': cell, 'bbox': list(snapped), 'cell_sizes': {}}
+    for layer in layers:
+        layer_exact = exact or layer not in PRIVATE_MAP_LAYERS
+        layer_zoom, layer_cell, layer_bbox = zoom, cell, snapped
+        if not layer_exact and zoom > PRIVATE_MAX_ZOOM:
+            layer_zoom, layer_cell, layer_bbox = snap_bbox(bbox, PRIVATE_MAX_ZOOM)
+        key = 'map_clusters:{}:{}:{}:{}:{}'.format(
+            layer, 'exact' if layer_exact else 'cell', disaster_id or 'all', layer_zoom, ','.join(map(str, layer_bbox))
+        )
+        clusters = cache.get(key)
+        if clusters is None:
+            clusters = _layer_clusters(layer, layer_cell, layer_bbox, disaster_id, layer_exact)
+            cache.set(key, clusters, MAP_CLUSTER_CACHE_SECONDS)
+        result['cell_sizes'][layer] = layer_cell
+        result[layer] = clusters
+    return result
@@ -0,0 +1,238 @@
+"""
+Batch dispatch of pending help requests to available volunteers.
+
+Rather than assigning one request at a time to whoever is nearest (which
+hands the same volunteer every request in a surge), all pending requests
+of a disaster are matched against all available volunteers in one pass.
+Candidate (request, volunteer) pairs within the search radius are taken
+in order of increasing distance and accepted while the request is still
+unassigned and the volunteer still has capacity. Capacity is the number
+of open tasks a volunteer may hold, less the tasks they already have.
+Before anything is written the matched volunteers are locked and their
+open tasks recounted, so two dispatches sharing volunteers (e.g. for
+overlapping disasters) cannot both fill the same free slot.
+"""
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .utils import calculate_distance_matrix, grid_cells_covering
+
+
+DEFAULT_DISPATCH_RADIUS_KM = 50
+DEFAULT_VOLUNTEER_CAPACITY = 2
+OPEN_TASK_STATUSES = ['assigned', 'in_progress']
+
+# Requests are matched against the volunteers in blocks sized so each
+# distance matrix holds at most this many cells (8 bytes each, plus a few
+# temporaries of the same shape while it is computed)
+DISTANCE_MATRIX_BUDGET = 2_000_000
+# Above this many grid cells the volunteer prefilter is not worth the query size
+MAX_PREFILTER_CELLS = 900
+
+
+def _candidate_volunteers(help_requests, radius_km):
+    """Available, geolocated volunteers in the grid cells around the requests"""
+    from users.models import Volunteer
+
+    volunteers = Volunteer.objects.filter(
+        availability=True,
+        user__role='volunteer',
+        user__latitude__isnull=False,
+        user__longitude__isnull=False
+    )
+    cells = set()
+    for help_request in help_requests:
+        request_cells = grid_cells_covering(help_request.latitude, help_request.longitude, radius_km)
+        if request_cells is None:
+            cells = None
+            break
+        cells.update(request_cells)
+    if cells is not None and len(cells) <= MAX_PREFILTER_CELLS:
+        volunteers = volunteers.filter(user__grid_cell__in=cells)
+
+    return list(volunteers.select_related('user').annotate(
+        open_tasks=Count('user__taskassignment', filter=Q(user__taskassignment__status__in=OPEN_TASK_STATUSES))
+    ).order_by('id'))
+
+
+def solve_assignment(help_requests, volunteers, capacities, radius_km):
+    """
+    Greedy minimum-distance assignment.
+    Returns a list of (request_index, volunteer_index, distance_km)
+    """
+    if not help_requests or not volunteers:
+        return []
+
+    volunteer_lats = [volunteer.user.latitude for volunteer in volunteers]
+    volunteer_lons = [volunteer.user.longitude for volunteer in volunteers]
+
+    block_size = max(1, DISTANCE_MATRIX_BUDGET // len(volunteers))
+    request_indexes, volunteer_indexes, distances = [], [], []
+    for start in range(0, len(help_requests), block_size):
+        block = help_requests[start:start + block_size]
+        matrix = calculate_distance_matrix(
+            [help_request.latitude for help_request in block],
+            [help_request.longitude for help_request in block],
+            volunteer_lats, volunteer_lons
+        )
+        rows, columns = np.nonzero(matrix <= radius_km)
+        request_indexes.append(rows + start)
+        volunteer_indexes.append(columns)
+        distances.append(matrix[rows, columns])
+
+    request_indexes = np.concatenate(request_indexes)
+    volunteer_indexes = np.concatenate(volunteer_indexes)
+    distances = np.concatenate(distances)
+
+    # Nearest pairs first; ties broken by request then volunteer order
+    order = np.lexsort((volunteer_indexes, request_indexes, distances))
+
+    remaining = list(capacities)
+    assigned = [False] * len(help_requests)
+    left = min(len(help_requests), sum(remaining))
+    matches = []
+    for pair in order:
+        if left == 0:
+            break
+        request_index = int(request_indexes[pair])
+        volunteer_index = int(volunteer_indexes[pair])
+        if assigned[request_index] or remaining[volunteer_index] <= 0:
+            continue
+        assigned[request_index] = True
+        remaining[volunteer_index] -= 1
+        left -= 1
+        matches.append((request_index, volunteer_index, float(distances[pair])))
+    return matches
+
+
+def _confirm_capacity(matches, volunteers, capacity):
+    """
+    Lock the matched volunteers and recount their open tasks, dropping the
+    matches that no longer fit (those requests stay pending for the next
+    dispatch). The counts read when matching were not taken under a lock
+    """
+    from users.models import Volunteer
+    from .models import TaskAssignment
+
+    volunteer_ids = sorted({volunteers[volunteer_index].id for _, volunteer_index, _ in matches})
+    # Locked in id order so concurrent dispatches cannot deadlock
+    available = list(Volunteer.objects.select_for_update().filter(
+        id__in=volunteer_ids, availability=True
+    ).order_by('id').values_list('user_id', flat=True))
+    open_tasks = dict(TaskAssignment.objects.filter(
+        volunteer_id__in=available,
+        status__in=OPEN_TASK_STATUSES
+    ).values_list('volunteer_id').annotate(count=Count('id')).order_by())
+
+    remaining = {user_id: capacity - open_tasks.get(user_id, 0) for user_id in available}
+    confirmed = []
+    for match in matches:
+        user_id = volunteers[match[1]].user_id
+        if remaining.get(user_id, 0) > 0:
+            remaining[user_id] -= 1
+            confirmed.append(match)
+    return confirmed
+
+
+def dispatch_help_requests(disaster, changed_by=None, radius_km=DEFAULT_DISPATCH_RADIUS_KM,
+                           capacity=DEFAULT_VOLUNTEER_CAPACITY, dry_run=False):
+    """
+    Assign every pending help request of a disaster in one pass.
+    Returns a summary dict with the assignments made and the solve time
+    """
+    from api import stats
+    from users.location_buffer import buffered_location, location_buffer
+    from .models import HelpRequest, HelpRequestStatusHistory, TaskAssignment, VolunteerFeedEntry
+
+    # Match against the latest pings rather than the last flushed positions.
+    # A dry run writes nothing, so it only reads the buffered pings; other
+    # processes' pings are read from the shared cache either way
+    if not dry_run:
+        location_buffer.flush()
+
+    with transaction.atomic():
+        help_requests = list(HelpRequest.objects.select_for_update().filter(
+            disasters=disaster,
+            status='pending',
+            assigned_volunteer__isnull=True,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).order_by('requested_at', 'id'))
+        volunteers = _candidate_volunteers(help_requests, radius_km) if help_requests else []
+        positions = location_buffer.snapshot()
+        if positions:
+            for volunteer in volunteers:
+                volunteer.user.latitude, volunteer.user.longitude = buffered_location(volunteer.user, positions)
+        capacities = [max(capacity - volunteer.open_tasks, 0) for volunteer in volunteers]
+
+        started = time.perf_counter()
+        matches = solve_assignment(help_requests, volunteers, capacities, radius_km)
+        solve_seconds = time.perf_counter() - started
+        if matches and not dry_run:
+            matches = _confirm_capacity(matches, volunteers, capacity)
+
+        assignments = []
+        counters_before = []
+        for request_index, volunteer_index, distance in matches:
+            help_request = help_requests[request_index]
+            volunteer = volunteers[volunteer_index]
+            counters_before.append(stats.row_counters(help_request))
+            help_request.assigned_volunteer = volunteer.user
+            help_request.status = 'in_progress'
+            assignments.append({
+                'help_request_id': help_request.id,
+                'volunteer_id': volunteer.user.id,
+                'volunteer_username': volunteer.user.username,
+                'distance_km': round(distance, 2),
+            })
+
+        if matches and not dry_run:
+            assigned_requests = [help_requests[request_index] for request_index, _, _ in matches]
+            # bulk_update does not fill auto_now fields, which delta sync relies on
+            updated_at = timezone.now()
+            for help_request in assigned_requests:
+                help_request.updated_at = updated_at
+            HelpRequest.objects.bulk_update(
+                assigned_requests, ['assigned_volunteer', 'status', 'updated_at'], batch_size=500
+            )
+            tasks = TaskAssignment.objects.bulk_create([
+                TaskAssignment(
+                    volunteer=help_request.assigned_volunteer,
+                    help_request=help_request,
+                    task_description=f"Help victim: {help_request.description[:100]}",
+                    status='assigned'
+                ) for help_request in assigned_requests
+            ], batch_size=500)
+            HelpRequestStatusHistory.objects.bulk_create([
+                HelpRequestStatusHistory(
+                    help_request=help_request,
+                    previous_status='pending',
+                    new_status='in_progress',
+                    changed_by=changed_by,
+                    note=f'Dispatched to volunteer: {help_request.assigned_volunteer.username}'
+                ) for help_request in assigned_requests
+            ], batch_size=500)
+            # bulk_update skips the post_save feed signal, so drop the feed rows here
+            VolunteerFeedEntry.objects.filter(
+                help_request_id__in=[help_request.id for help_request in assigned_requests]
+            ).delete()
+            # Nor do bulk_update and bulk_create move the stat counters
+            stats.apply_changes(
+                counters_before,
+                [stats.row_counters(row) for row in assigned_requests + tasks]
+            )
+
+    return {
+        'disaster_id': disaster.id,
+        'pending_requests': len(help_requests),
+        'available_volunteers': sum(1 for remaining in capacities if remaining > 0),
+        'assigned': len(assignments),
+        'unassigned': len(help_requests) - len(assignments),
+        'solve_seconds': round(solve_seconds, 6),
+        'dry_run': dry_run,
+        'assignments': assignments,
+    }
@@ -0,0 +1,63 @@
+"""
+Donation read model shared by the donation list endpoints.
+
+donation_queryset() loads a donation page with a fixed number of queries
+(one for the donations with their camp, creator and acknowledgment, one
+for all their items with resources), and serialize_donation() turns each
+row into the API dict without touching the database again.
+"""
+from django.db.models import Prefetch
+
+from .models import Donation, DonationAcknowledgment, DonationItem
+
+
+def donation_queryset(queryset=None):
+    """Attach every relation the donation serializer reads to a Donation queryset"""
+    if queryset is None:
+        queryset = Donation.objects.all()
+    return queryset.select_related(
+        'camp',
+        'created_by',
+        'donationacknowledgment__acknowledged_by'
+    ).prefetch_related(
+        Prefetch('items', queryset=DonationItem.objects.select_related('resource').order_by('id'))
+    )
+
+
+def _acknowledgment(donation):
+    try:
+        return donation.donationacknowledgment
+    except DonationAcknowledgment.DoesNotExist:
+        return None
+
+
+def serialize_donation(donation):
+    """Serialize a donation loaded through donation_queryset()"""
+    camp = donation.camp
+    acknowledgment = _acknowledgment(donation)
+    return {
+        'id': donation.id,
+        'donor_name': donation.donor_name,
+        'donor_type': donation.donor_type,
+        'contact_email': donation.contact_email,
+        'contact_phone': donation.contact_phone,
+        'camp_id': camp.id if camp else None,
+        'camp_name': camp.name if camp else None,
+        'camp_location': camp.location if camp else None,
+        'status': donation.status,
+        'donation_date': donation.donation_date.isoformat(),
+        'created_by': donation.created_by.username if donation.created_by else None,
+        'items': [{
+            'id': item.id,
+            'resource_name': item.resource.name if item.resource else None,
+            'resource_id': item.resource.id if item.resource else None,
+            'quantity': float(item.quantity),
+            'unit': item.resource.unit if item.resource else None
+        } for item in donation.items.all()],
+        'has_acknowledgment': acknowledgment is not None,
+        'acknowledgment': {
+            'text': acknowledgment.acknowledgment_text,
+            'acknowledged_by': acknowledgment.acknowledged_by.username if acknowledgment.acknowledged_by else None,
+            'acknowledged_at': acknowledgment.acknowledged_at.isoformat()
+        } if acknowledgment else None
+    }
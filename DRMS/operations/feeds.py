@@ -0,0 +1,93 @@
+"""
+Per-volunteer feeds of nearby pending help requests.
+
+Each volunteer's feed is a set of VolunteerFeedEntry rows holding the
+distance to every pending, geolocated help request within FEED_RADIUS_KM.
+The rows are kept up to date incrementally (see operations.signals), so
+reading a feed is a single indexed lookup on (volunteer, distance_km).
+"""
+from django.db import transaction
+
+from .utils import grid_cells_covering, within_radius
+
+
+FEED_RADIUS_KM = 50
+
+
+def _is_feed_volunteer(user):
+    return user.role == 'volunteer' and user.latitude is not None and user.longitude is not None
+
+
+def _is_feed_request(help_request):
+    return (
+        help_request.status == 'pending'
+        and help_request.latitude is not None
+        and help_request.longitude is not None
+    )
+
+
+def remove_request_from_feeds(help_request_id):
+    """Drop a help request from every volunteer feed"""
+    from .models import VolunteerFeedEntry
+
+    VolunteerFeedEntry.objects.filter(help_request_id=help_request_id).delete()
+
+
+def refresh_request_feeds(help_request):
+    """Add or remove a help request in the feeds of the volunteers around it"""
+    from users.models import User
+    from .models import VolunteerFeedEntry
+
+    if not _is_feed_request(help_request):
+        remove_request_from_feeds(help_request.pk)
+        return
+
+    volunteers = User.objects.filter(
+        role='volunteer',
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('id', 'latitude', 'longitude')
+    cells = grid_cells_covering(help_request.latitude, help_request.longitude, FEED_RADIUS_KM)
+    if cells is not None:
+        volunteers = volunteers.filter(grid_cell__in=cells)
+    nearby = within_radius(volunteers, help_request.latitude, help_request.longitude, FEED_RADIUS_KM)
+
+    with transaction.atomic():
+        VolunteerFeedEntry.objects.filter(help_request_id=help_request.pk).delete()
+        VolunteerFeedEntry.objects.bulk_create([
+            VolunteerFeedEntry(volunteer_id=volunteer.pk, help_request_id=help_request.pk, distance_km=distance)
+            for volunteer, distance in nearby
+        ], ignore_conflicts=True)
+
+
+def refresh_volunteer_feed(user):
+    """Rebuild one volunteer's feed from their current location"""
+    from .models import HelpRequest, VolunteerFeedEntry
+
+    nearby = []
+    if _is_feed_volunteer(user):
+        pending = HelpRequest.objects.filter(status='pending').only('id', 'latitude', 'longitude')
+        nearby = within_radius(pending, user.latitude, user.longitude, FEED_RADIUS_KM)
+
+    with transaction.atomic():
+        VolunteerFeedEntry.objects.filter(volunteer_id=user.pk).delete()
+        VolunteerFeedEntry.objects.bulk_create([
+            VolunteerFeedEntry(volunteer_id=user.pk, help_request_id=help_request.pk, distance_km=distance)
+            for help_request, distance in nearby
+        ], ignore_conflicts=True)
+
+
+def rebuild_all_feeds():
+    """Recompute every volunteer feed from scratch, returning the number of entries"""
+    from users.models import User
+    from .models import VolunteerFeedEntry
+
+    VolunteerFeedEntry.objects.all().delete()
+    volunteers = User.objects.filter(
+        role='volunteer',
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('id', 'role', 'latitude', 'longitude')
+    for volunteer in volunteers.iterator(chunk_size=500):
+        refresh_volunteer_feed(volunteer)
+    return VolunteerFeedEntry.objects.count()
@@ -0,0 +1,22 @@
+"""
+Django management command to rebuild every volunteer's nearby help request feed.
+
+The feeds are maintained incrementally by signals; run this after deploying
+the feed table or after bulk changes that bypass model saves.
+
+Usage:
+    python manage.py rebuild_volunteer_feeds
+"""
+
+from django.core.management.base import BaseCommand
+
+from operations.feeds import FEED_RADIUS_KM, rebuild_all_feeds
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the nearby help request feeds of all volunteers'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Rebuilding volunteer feeds ({FEED_RADIUS_KM} km radius)...')
+        total = rebuild_all_feeds()
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] {total} feed entries written'))
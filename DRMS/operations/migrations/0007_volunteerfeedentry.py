@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0006_merge_20260110_1350'),
+        ('users', '0003_user_grid_cell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerFeedEntry',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('distance_km', models.FloatField()),
+                ('help_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='operations.helprequest')),
+                ('volunteer', models.ForeignKey(limit_choices_to={'role': 'volunteer'}, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'volunteer_feed_entries',
+                'indexes': [models.Index(fields=['volunteer', 'distance_km'], name='volunteer_f_volunte_de177e_idx')],
+                'unique_together': {('volunteer', 'help_request')},
+            },
+        ),
+    ]
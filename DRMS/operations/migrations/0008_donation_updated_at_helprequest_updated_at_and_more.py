@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-17 14:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0007_volunteerfeedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='helprequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='taskassignment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['updated_at'], name='donations_updated_cfd9fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='helprequest',
+            index=models.Index(fields=['updated_at'], name='help_reques_updated_6a9750_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskassignment',
+            index=models.Index(fields=['updated_at'], name='task_assign_updated_5cfe6a_idx'),
+        ),
+    ]
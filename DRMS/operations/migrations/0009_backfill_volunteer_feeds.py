@@ -0,0 +1,64 @@
+from math import asin, cos, degrees, radians, sin, sqrt
+
+from django.db import migrations
+
+# Frozen copies of operations.feeds.FEED_RADIUS_KM and the radius search in
+# operations.utils as of this migration, so later changes to the live code
+# cannot change what the migration writes
+FEED_RADIUS_KM = 50
+EARTH_RADIUS_KM = 6371
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0)))
+
+
+def within_radius(queryset, lat, lon, radius_km):
+    """(row, distance_km) for the rows of queryset within radius_km, nearest first"""
+    angular = degrees(radius_km / EARTH_RADIUS_KM)
+    rows = queryset.filter(latitude__gte=float(lat) - angular, latitude__lte=float(lat) + angular)
+    matches = [(row, distance_km(lat, lon, row.latitude, row.longitude)) for row in rows]
+    matches = [(row, distance) for row, distance in matches if distance <= radius_km]
+    matches.sort(key=lambda match: (match[1], match[0].pk))
+    return matches
+
+
+def backfill_volunteer_feeds(apps, schema_editor):
+    """Fill the feed of every geolocated volunteer, as rebuild_volunteer_feeds does"""
+    User = apps.get_model('users', 'User')
+    HelpRequest = apps.get_model('operations', 'HelpRequest')
+    VolunteerFeedEntry = apps.get_model('operations', 'VolunteerFeedEntry')
+
+    pending = HelpRequest.objects.filter(
+        status='pending',
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('id', 'latitude', 'longitude')
+    volunteers = User.objects.filter(
+        role='volunteer',
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('id', 'latitude', 'longitude')
+
+    VolunteerFeedEntry.objects.all().delete()
+    for volunteer in volunteers.iterator(chunk_size=500):
+        VolunteerFeedEntry.objects.bulk_create([
+            VolunteerFeedEntry(volunteer_id=volunteer.pk, help_request_id=help_request.pk, distance_km=distance)
+            for help_request, distance in within_radius(
+                pending, volunteer.latitude, volunteer.longitude, FEED_RADIUS_KM
+            )
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0008_donation_updated_at_helprequest_updated_at_and_more'),
+        ('users', '0003_user_grid_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_volunteer_feeds, migrations.RunPython.noop),
+    ]
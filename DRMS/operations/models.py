@@ -20,6 +20,7 @@ class Donation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     donation_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'donations'
@@ -27,6 +28,7 @@ class Donation(models.Model):
             models.Index(fields=['donor_type', 'donation_date']),
             models.Index(fields=['camp', 'status']),
             models.Index(fields=['created_by', 'donation_date']),
+            models.Index(fields=['updated_at']),  # For delta sync
         ]
         constraints = [
             models.CheckConstraint(
@@ -144,6 +146,7 @@ class HelpRequest(models.Model):
     )
     requested_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'help_requests'
@@ -151,6 +154,7 @@ class HelpRequest(models.Model):
             models.Index(fields=['status', 'requested_at']),
             models.Index(fields=['latitude', 'longitude']),  # For location-based queries
             models.Index(fields=['assigned_volunteer', 'status']),
+            models.Index(fields=['updated_at']),  # For delta sync
         ]
         constraints = [
             models.CheckConstraint(
@@ -187,11 +191,13 @@ class TaskAssignment(models.Model):
     help_request = models.ForeignKey(HelpRequest, on_delete=models.CASCADE, null=True, blank=True)
     assigned_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='assigned')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'task_assignments'
         indexes = [
             models.Index(fields=['status', 'assigned_at']),
+            models.Index(fields=['updated_at']),  # For delta sync
         ]
         constraints = [
             models.CheckConstraint(
@@ -288,4 +294,21 @@ class TransportTrip(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.transport.vehicle_number}: {self.origin} -> {self.destination} ({self.status})"
\ No newline at end of file
+        return f"{self.transport.vehicle_number}: {self.origin} -> {self.destination} ({self.status})"
+
+class VolunteerFeedEntry(models.Model):
+    """Pending help request near a volunteer, with the distance precomputed."""
+    id = models.AutoField(primary_key=True)
+    volunteer = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='feed_entries', limit_choices_to={'role': 'volunteer'})
+    help_request = models.ForeignKey(HelpRequest, on_delete=models.CASCADE, related_name='feed_entries')
+    distance_km = models.FloatField()
+
+    class Meta:
+        db_table = 'volunteer_feed_entries'
+        unique_together = ['volunteer', 'help_request']
+        indexes = [
+            models.Index(fields=['volunteer', 'distance_km']),
+        ]
+
+    def __str__(self):
+        return f"HelpRequest {self.help_request_id} for volunteer {self.volunteer_id} ({self.distance_km:.2f} km)"
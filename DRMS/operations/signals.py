@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_init, pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import User
+from .feeds import refresh_request_feeds, refresh_volunteer_feed
+from .models import Donation, DonationItem, HelpRequest
+
+
+FEED_REQUEST_FIELDS = {'status', 'latitude', 'longitude'}
+FEED_VOLUNTEER_FIELDS = {'role', 'latitude', 'longitude'}
+
+_DEFERRED = object()
+
+
+@receiver(post_save, sender=HelpRequest)
+def help_request_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Keep volunteer feeds in sync when a help request is created, moves or changes status"""
+    if update_fields is not None and not FEED_REQUEST_FIELDS & set(update_fields):
+        return
+    refresh_request_feeds(instance)
+
+
+def _feed_values(instance):
+    """The instance's (role, latitude, longitude), or None when one of them is deferred"""
+    values = tuple(instance.__dict__.get(name, _DEFERRED) for name in ('role', 'latitude', 'longitude'))
+    return None if _DEFERRED in values else values
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_location(sender, instance, **kwargs):
+    """Keep the loaded role and location, so a save can tell whether they changed without a query"""
+    instance._feed_values = _feed_values(instance)
+
+
+@receiver(pre_save, sender=User)
+def remember_volunteer_location(sender, instance, update_fields=None, **kwargs):
+    """Flag users whose location or role is changing so their feed is refreshed after saving"""
+    instance._feed_changed = False
+    if update_fields is not None and not FEED_VOLUNTEER_FIELDS & set(update_fields):
+        return
+    if not instance.pk:
+        instance._feed_changed = instance.role == 'volunteer'
+        return
+    previous = getattr(instance, '_feed_values', None)
+    if previous is None or instance._state.adding:
+        # Not loaded from the database, or loaded with some of the fields deferred
+        row = User.objects.filter(pk=instance.pk).values_list('role', 'latitude', 'longitude').first()
+        previous = tuple(row) if row is not None else None
+    if previous is None:
+        instance._feed_changed = instance.role == 'volunteer'
+    elif 'volunteer' in (previous[0], instance.role):
+        instance._feed_changed = previous != (instance.role, instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=User)
+def volunteer_saved(sender, instance, update_fields=None, **kwargs):
+    """Rebuild a volunteer's feed after they move"""
+    if getattr(instance, '_feed_changed', False):
+        refresh_volunteer_feed(instance)
+    if update_fields is None or FEED_VOLUNTEER_FIELDS & set(update_fields):
+        instance._feed_values = _feed_values(instance)
+
+
+@receiver(post_save, sender=DonationItem)
+@receiver(post_delete, sender=DonationItem)
+def donation_item_changed(sender, instance, **kwargs):
+    """
+    Items are part of their donation: move its updated_at, which delta sync
+    and the donation ETags (api.conditional.STATE_MODELS) read
+    """
+    Donation.objects.filter(pk=instance.donation_id).update(updated_at=timezone.now())
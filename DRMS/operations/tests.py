@@ -1,3 +1,117 @@
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from api.actor import actor_for_user
+from disasters.models import Disasters
+from relief.inventory import MAX_QUANTITY
+from relief.models import Resource, ResourceInventoryTransaction
+from shelters.models import Camp
+from users.models import CampAdmin, User
+
+from . import views
+from .models import Donation, DonationAcknowledgment, DonationItem
+
+
+class DonationListQueryCountTests(TestCase):
+    """
+    The donation list endpoints run the same number of queries whatever the
+    page length. The views are called directly: the router's donation
+    routes shadow the donations/ and donations/my-donations/ paths
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        disaster = Disasters.objects.create(
+            name='Flood', disaster_type='flood', severity='high', location='Kochi',
+            description='River flood', start_date=timezone.now()
+        )
+        cls.camp = Camp.objects.create(
+            name='North Camp', camp_type='shelter', disasters=disaster, location='Kochi',
+            capacity=100, contact_person='Asha', contact_phone='+919876543210'
+        )
+        cls.resources = [
+            Resource.objects.create(name='Rice', category='food', unit='kg'),
+            Resource.objects.create(name='Water', category='water', unit='l'),
+        ]
+        cls.donor = User.objects.create_user('donor', 'donor@example.com', 'pass', role='donor')
+        cls.camp_admin = User.objects.create_user('campadmin', 'admin@example.com', 'pass', role='camp_admin')
+        CampAdmin.objects.create(user=cls.camp_admin, camp=cls.camp)
+
+    def add_donations(self, count):
+        for number in range(count):
+            donation = Donation.objects.create(
+                donor_name=f'Donor {number}', donor_type='individual', camp=self.camp, created_by=self.donor
+            )
+            for resource in self.resources:
+                DonationItem.objects.create(donation=donation, resource=resource, quantity=5)
+            if number % 2:
+                DonationAcknowledgment.objects.create(
+                    donation=donation, acknowledgment_text='Thank you', acknowledged_by=self.camp_admin
+                )
+
+    def assert_constant_queries(self, queries, view, user, key, *args):
+        for count in (2, 20):
+            self.add_donations(count - Donation.objects.count())
+            request = APIRequestFactory().get('/', {'page_size': 100})
+            # Resolved before the view runs, as ActorMiddleware does
+            request.actor = actor_for_user(user)
+            force_authenticate(request, user=user)
+            with self.assertNumQueries(queries):
+                response = view(request, *args)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data[key]), count)
+
+    def test_list_donations(self):
+        # Donations with camp, creator and acknowledgment; items with resources
+        self.assert_constant_queries(2, views.list_donations, self.camp_admin, 'donations')
+
+    def test_my_donations(self):
+        # As list_donations, plus the total
+        self.assert_constant_queries(3, views.my_donations, self.donor, 'my_donations')
+
+    def test_camp_donations(self):
+        # The camp, the page, its items and the status totals
+        self.assert_constant_queries(4, views.camp_donations, self.camp_admin, 'donations', self.camp.id)
+
+
+class DonationStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        disaster = Disasters.objects.create(
+            name='Flood', disaster_type='flood', severity='high', location='Kochi',
+            description='River flood', start_date=timezone.now()
+        )
+        camp = Camp.objects.create(
+            name='North Camp', camp_type='shelter', disasters=disaster, location='Kochi',
+            capacity=100, contact_person='Asha', contact_phone='+919876543210'
+        )
+        cls.rice = Resource.objects.create(name='Rice', category='food', unit='kg')
+        # One more unit would take the total past what the column stores
+        full = MAX_QUANTITY - 1
+        cls.water = Resource.objects.create(
+            name='Water', category='water', unit='l', total_quantity=full, available_quantity=full
+        )
+        cls.camp_admin = User.objects.create_user('campadmin', 'admin@example.com', 'pass', role='camp_admin')
+        CampAdmin.objects.create(user=cls.camp_admin, camp=camp)
+        donor = User.objects.create_user('donor', 'donor@example.com', 'pass', role='donor')
+        cls.donation = Donation.objects.create(
+            donor_name='Donor', donor_type='individual', camp=camp, created_by=donor
+        )
+        for resource in (cls.rice, cls.water):
+            DonationItem.objects.create(donation=cls.donation, resource=resource, quantity=5)
+
+    def test_failed_acceptance_writes_nothing(self):
+        request = APIRequestFactory().patch('/', {'status': 'accepted'}, format='json')
+        request.actor = actor_for_user(self.camp_admin)
+        force_authenticate(request, user=self.camp_admin)
+        response = views.update_donation_status(request, self.donation.id)
+
+        self.assertEqual(response.status_code, 400)
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, 'pending')
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.total_quantity, 0)
+        self.assertFalse(ResourceInventoryTransaction.objects.exists())
+        self.assertFalse(DonationAcknowledgment.objects.exists())
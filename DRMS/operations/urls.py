@@ -12,7 +12,9 @@ urlpatterns = [
     
     # Help Requests (SOS)
     path('help-requests/', views.list_help_requests, name='list_help_requests'),
+    path('help-requests/nearby-feed/', views.nearby_help_request_feed, name='nearby_help_request_feed'),
     path('help-requests/create/', views.create_help_request, name='create_help_request'),
+    path('help-requests/dispatch/', views.dispatch_help_requests, name='dispatch_help_requests'),
     path('help-requests/<int:request_id>/status/', views.update_help_request_status, name='update_help_request_status'),
     path('help-requests/<int:request_id>/assign-volunteer/', views.assign_volunteer_to_help_request, name='assign_volunteer_to_help_request'),
     
@@ -21,6 +23,9 @@ urlpatterns = [
     path('tasks/create/', views.create_task_assignment, name='create_task_assignment'),
     path('tasks/<int:task_id>/status/', views.update_task_status, name='update_task_status'),
     
+    # Map
+    path('map/clusters/', views.map_clusters, name='map_clusters'),
+    
     # Transport
     path('transports/', views.list_transports, name='list_transports'),
     path('transports/available/', views.available_transports, name='available_transports'),
@@ -2,8 +2,27 @@
 Utility functions for location-based matching and operations
 """
 from django.db.models import Q
-from math import radians, cos, sin, asin, sqrt
+from math import radians, degrees, cos, sin, asin, sqrt, floor, pi
 from decimal import Decimal
+import heapq
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371
+
+# Size of one spatial grid cell in degrees (~55km of latitude). Users are
+# bucketed into these cells so radius searches only scan a handful of buckets.
+GRID_CELL_DEGREES = 0.5
+GRID_LAT_CELLS = int(180 / GRID_CELL_DEGREES)
+GRID_LON_CELLS = int(360 / GRID_CELL_DEGREES)
+
+# Above this many cells a radius search is broad enough that scanning the
+# location index directly is cheaper than a huge IN (...) list.
+MAX_GRID_CELLS = 64
+
+# Small margin (in degrees) added to bounding boxes to absorb float rounding
+BBOX_MARGIN_DEGREES = 1e-6
 
 
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -23,15 +42,297 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     dlat = lat2 - lat1
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     c = 2 * asin(sqrt(a))
-    r = 6371  # Radius of earth in kilometers
+    r = EARTH_RADIUS_KM  # Radius of earth in kilometers
     return c * r
 
 
+def rounded_distance(distance):
+    """Round a distance in km for API output; missing distances (None/NaN) become None"""
+    if distance is None or np.isnan(distance):
+        return None
+    return round(float(distance), 2)
+
+
+def _radians_array(values):
+    """Convert a sequence of decimal degrees (None allowed) to a float radian array"""
+    return np.radians(np.asarray(values, dtype=np.float64))
+
+
+def calculate_distances(origin_lat, origin_lon, latitudes, longitudes):
+    """
+    Calculate the great circle distance from one origin to N points
+    in a single vectorized pass.
+    latitudes/longitudes are equal-length sequences of decimal degrees;
+    missing coordinates (None) produce NaN.
+    Returns a float array of distances in kilometers
+    """
+    lat1, lon1 = radians(float(origin_lat)), radians(float(origin_lon))
+    lat2 = _radians_array(latitudes)
+    lon2 = _radians_array(longitudes)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def calculate_distance_matrix(latitudes1, longitudes1, latitudes2, longitudes2):
+    """
+    Calculate great circle distances between N origins and M points.
+    Returns an N x M float array of distances in kilometers (NaN where a
+    coordinate is missing)
+    """
+    lat1 = _radians_array(latitudes1)[:, np.newaxis]
+    lon1 = _radians_array(longitudes1)[:, np.newaxis]
+    lat2 = _radians_array(latitudes2)[np.newaxis, :]
+    lon2 = _radians_array(longitudes2)[np.newaxis, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _grid_indexes(lat, lon):
+    """Return the (row, column) grid indexes for a coordinate"""
+    lat_idx = min(int(floor((lat + 90) / GRID_CELL_DEGREES)), GRID_LAT_CELLS - 1)
+    lon_idx = int(floor((lon + 180) / GRID_CELL_DEGREES)) % GRID_LON_CELLS
+    return max(lat_idx, 0), lon_idx
+
+
+def grid_cell_for(lat, lon):
+    """
+    Return the grid cell key ("row:col") containing a coordinate,
+    or an empty string if the location is missing or invalid
+    """
+    if lat is None or lon is None or lat == '' or lon == '':
+        return ''
+    try:
+        lat_idx, lon_idx = _grid_indexes(float(lat), float(lon))
+    except (TypeError, ValueError):
+        return ''
+    return f"{lat_idx}:{lon_idx}"
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return the (min_lat, max_lat, min_lon, max_lon) box in decimal degrees
+    that contains every point within radius_km of (lat, lon).
+    When the box crosses the antimeridian, min_lon is greater than max_lon.
+    """
+    lat_r, lon_r = radians(float(lat)), radians(float(lon))
+    angular = float(radius_km) / EARTH_RADIUS_KM
+
+    min_lat = lat_r - angular
+    max_lat = lat_r + angular
+    if min_lat > -pi / 2 and max_lat < pi / 2:
+        delta_lon = asin(min(1.0, sin(angular) / cos(lat_r)))
+        min_lon = lon_r - delta_lon
+        if min_lon < -pi:
+            min_lon += 2 * pi
+        max_lon = lon_r + delta_lon
+        if max_lon > pi:
+            max_lon -= 2 * pi
+    else:
+        # The circle covers a pole, so every longitude is in range
+        min_lat = max(min_lat, -pi / 2)
+        max_lat = min(max_lat, pi / 2)
+        min_lon, max_lon = -pi, pi
+
+    return (
+        max(degrees(min_lat) - BBOX_MARGIN_DEGREES, -90),
+        min(degrees(max_lat) + BBOX_MARGIN_DEGREES, 90),
+        degrees(min_lon) - BBOX_MARGIN_DEGREES,
+        degrees(max_lon) + BBOX_MARGIN_DEGREES,
+    )
+
+
+def grid_cells_covering(lat, lon, radius_km):
+    """
+    Return the grid cell keys that together cover the circle of radius_km
+    around (lat, lon), or None if the circle is too large to be worth it
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    first_row, first_col = _grid_indexes(min_lat, max(min_lon, -180))
+    last_row, last_col = _grid_indexes(max_lat, min(max_lon, 180))
+
+    if max_lon - min_lon >= 360 - 2 * BBOX_MARGIN_DEGREES:
+        columns = range(GRID_LON_CELLS)
+    elif first_col <= last_col:
+        columns = range(first_col, last_col + 1)
+    else:
+        # Box wraps around the antimeridian
+        columns = list(range(first_col, GRID_LON_CELLS)) + list(range(0, last_col + 1))
+
+    if (last_row - first_row + 1) * len(columns) > MAX_GRID_CELLS:
+        return None
+
+    return [f"{row}:{col}" for row in range(first_row, last_row + 1) for col in columns]
+
+
+def _unit_vector(lat, lon):
+    """Convert decimal degrees to a 3D unit vector on the sphere"""
+    lat_r, lon_r = radians(float(lat)), radians(float(lon))
+    return (cos(lat_r) * cos(lon_r), cos(lat_r) * sin(lon_r), sin(lat_r))
+
+
+class SphericalKDTree:
+    """
+    Static KD-tree over points on the earth's surface.
+    Points are stored as 3D unit vectors, so straight-line (chord) distance
+    orders them exactly like great-circle distance and the usual KD-tree
+    pruning applies. Queries run in O(log n) on average.
+    """
+
+    def __init__(self, points, items):
+        """points is a list of (lat, lon) pairs; items are returned by queries"""
+        self._items = list(items)
+        self._vectors = [_unit_vector(lat, lon) for lat, lon in points]
+        self._root = self._build(list(range(len(self._items))), 0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, indexes, depth):
+        if not indexes:
+            return None
+        axis = depth % 3
+        indexes.sort(key=lambda i: self._vectors[i][axis])
+        middle = len(indexes) // 2
+        return (
+            indexes[middle], axis,
+            self._build(indexes[:middle], depth + 1),
+            self._build(indexes[middle + 1:], depth + 1),
+        )
+
+    def query(self, lat, lon, k=1, radius_km=None):
+        """
+        Return up to k (item, distance_km) pairs nearest to (lat, lon),
+        optionally limited to radius_km, sorted by distance
+        """
+        if k < 1 or self._root is None:
+            return []
+        target = _unit_vector(lat, lon)
+        if radius_km is None or radius_km >= pi * EARTH_RADIUS_KM:
+            max_chord2 = float('inf')
+        else:
+            max_chord2 = (2 * sin(float(radius_km) / (2 * EARTH_RADIUS_KM))) ** 2 + 1e-12
+
+        best = []  # max-heap of (-chord2, -index) holding the k nearest so far
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            point = self._vectors[index]
+            chord2 = (
+                (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            )
+            if chord2 <= max_chord2:
+                if len(best) < k:
+                    heapq.heappush(best, (-chord2, -index))
+                elif chord2 < -best[0][0]:
+                    heapq.heapreplace(best, (-chord2, -index))
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            bound = max_chord2 if len(best) < k else min(max_chord2, -best[0][0])
+            if diff * diff <= bound:
+                visit(far)
+
+        visit(self._root)
+
+        results = []
+        for neg_chord2, neg_index in sorted(best, key=lambda entry: (-entry[0], -entry[1])):
+            distance = 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(-neg_chord2) / 2))
+            if radius_km is None or distance <= radius_km:
+                results.append((self._items[-neg_index], distance))
+        return results
+
+
+def bounding_box_filter(lat, lon, radius_km, lat_field='latitude', lon_field='longitude'):
+    """
+    Return a Q object limiting lat_field/lon_field to the bounding box
+    of the circle of radius_km around (lat, lon), so the database can
+    answer the coarse part of a radius search from its location index
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    query = Q(**{f'{lat_field}__gte': min_lat, f'{lat_field}__lte': max_lat})
+
+    if max_lon - min_lon >= 360 - 2 * BBOX_MARGIN_DEGREES:
+        return query
+    if min_lon <= max_lon:
+        return query & Q(**{f'{lon_field}__gte': min_lon, f'{lon_field}__lte': max_lon})
+    # Box wraps around the antimeridian
+    return query & (Q(**{f'{lon_field}__gte': min_lon}) | Q(**{f'{lon_field}__lte': max_lon}))
+
+
+def _resolve_field(obj, field_path):
+    """Follow a Django-style field path ('user__latitude') on an instance"""
+    for name in field_path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def within_radius(queryset, lat, lon, radius_km, lat_field='latitude', lon_field='longitude'):
+    """
+    Radius search shared by every location lookup.
+    Pushes a bounding box into the query so only nearby rows are fetched,
+    then runs exact haversine on the survivors.
+    Returns a list of (instance, distance_km) sorted by distance
+    """
+    rows = list(queryset.filter(bounding_box_filter(lat, lon, radius_km, lat_field, lon_field)))
+    distances = calculate_distances(
+        lat, lon,
+        [_resolve_field(row, lat_field) for row in rows],
+        [_resolve_field(row, lon_field) for row in rows]
+    )
+    matches = [(rows[i], float(distances[i])) for i in np.flatnonzero(distances <= radius_km)]
+    # Sort by distance (ties broken by primary key so results are deterministic)
+    matches.sort(key=lambda match: (match[1], match[0].pk))
+    return matches
+
+
+def _overlay_buffered_locations(matches, buffered, lat, lon, radius_km, volunteers):
+    """
+    Re-rank (volunteer, distance_km) matches using buffered pings that are
+    newer than the stored locations: volunteers who moved out of the radius
+    are dropped and those who moved into it are fetched from volunteers
+    """
+    user_ids = list(buffered)
+    distances = calculate_distances(
+        lat, lon,
+        [buffered[user_id][0] for user_id in user_ids],
+        [buffered[user_id][1] for user_id in user_ids]
+    )
+    inside = {user_ids[i]: float(distances[i]) for i in np.flatnonzero(distances <= radius_km)}
+
+    candidates = {volunteer.user_id: (volunteer, distance) for volunteer, distance in matches}
+    missing = [user_id for user_id in inside if user_id not in candidates]
+    if missing:
+        for volunteer in volunteers.filter(user_id__in=missing):
+            candidates[volunteer.user_id] = (volunteer, None)
+
+    results = []
+    for user_id, (volunteer, distance) in candidates.items():
+        ping = buffered.get(user_id)
+        updated_at = volunteer.user.location_updated_at
+        if ping and (updated_at is None or ping[2] >= updated_at):
+            if user_id not in inside:
+                continue
+            volunteer.user.latitude, volunteer.user.longitude = ping[0], ping[1]
+            distance = inside[user_id]
+        elif distance is None:
+            # Only fetched for a ping that turned out older than the stored location
+            continue
+        results.append((volunteer, distance))
+    results.sort(key=lambda match: (match[1], match[0].pk))
+    return results
+
+
 def find_nearby_volunteers(victim_lat, victim_lon, radius_km=50, max_results=10):
     """
     Find available volunteers within a certain radius of the victim
     """
     from users.models import User, Volunteer
+    from users.location_buffer import location_buffer
     
     if not victim_lat or not victim_lon:
         return Volunteer.objects.none()
@@ -43,23 +344,26 @@ def find_nearby_volunteers(victim_lat, victim_lon, radius_km=50, max_results=10)
         user__longitude__isnull=False
     ).select_related('user')
     
-    nearby_volunteers = []
-    for volunteer in volunteers:
-        distance = calculate_distance(
-            victim_lat, victim_lon,
-            float(volunteer.user.latitude), float(volunteer.user.longitude)
-        )
-        if distance and distance <= radius_km:
-            nearby_volunteers.append({
-                'volunteer': volunteer,
-                'distance_km': round(distance, 2)
-            })
+    # Only look at volunteers in the grid cells that cover the search radius
+    cells = grid_cells_covering(victim_lat, victim_lon, radius_km)
+    if cells is not None:
+        volunteers = volunteers.filter(user__grid_cell__in=cells)
     
-    # Sort by distance
-    nearby_volunteers.sort(key=lambda x: x['distance_km'])
+    nearby_volunteers = within_radius(
+        volunteers, victim_lat, victim_lon, radius_km,
+        lat_field='user__latitude', lon_field='user__longitude'
+    )
+    
+    # Apply location pings that have not been flushed to the database yet
+    buffered = location_buffer.snapshot()
+    if buffered:
+        nearby_volunteers = _overlay_buffered_locations(
+            nearby_volunteers, buffered, victim_lat, victim_lon, radius_km,
+            Volunteer.objects.filter(availability=True).select_related('user')
+        )
     
     # Return top N volunteers
-    return [v['volunteer'] for v in nearby_volunteers[:max_results]]
+    return [volunteer for volunteer, _ in nearby_volunteers[:max_results]]
 
 
 def find_nearest_camp_admin(user_lat, user_lon, radius_km=100):
@@ -67,7 +371,6 @@ def find_nearest_camp_admin(user_lat, user_lon, radius_km=100):
     Find the nearest camp admin to a user's location
     """
     from users.models import CampAdmin
-    from shelters.models import Camp
     
     if not user_lat or not user_lon:
         return None
@@ -78,47 +381,29 @@ def find_nearest_camp_admin(user_lat, user_lon, radius_km=100):
         camp__longitude__isnull=False
     ).select_related('camp', 'user')
     
-    nearest = None
-    min_distance = float('inf')
-    
-    for camp_admin in camp_admins:
-        distance = calculate_distance(
-            user_lat, user_lon,
-            float(camp_admin.camp.latitude), float(camp_admin.camp.longitude)
-        )
-        if distance and distance <= radius_km and distance < min_distance:
-            min_distance = distance
-            nearest = camp_admin
-    
-    return nearest
+    matches = within_radius(
+        camp_admins, user_lat, user_lon, radius_km,
+        lat_field='camp__latitude', lon_field='camp__longitude'
+    )
+    return matches[0][0] if matches else None
 
 
 def find_nearest_camp(user_lat, user_lon, radius_km=100):
     """
-    Find the nearest camp to a user's location
+    Find the nearest active camp to a user's location
+    """
+    matches = find_nearest_camps(user_lat, user_lon, k=1, radius_km=radius_km)
+    return matches[0][0] if matches else None
+
+
+def find_nearest_camps(user_lat, user_lon, k=5, radius_km=100):
+    """
+    Find the k nearest active camps to a user's location.
+    Answered from the in-memory camp index; returns (camp, distance_km) pairs
     """
-    from shelters.models import Camp
+    from shelters.utils import get_active_camp_index
     
     if not user_lat or not user_lon:
-        return None
+        return []
     
-    camps = Camp.objects.filter(
-        latitude__isnull=False,
-        longitude__isnull=False,
-        status='active'
-    )
-    
-    nearest = None
-    min_distance = float('inf')
-    
-    for camp in camps:
-        distance = calculate_distance(
-            user_lat, user_lon,
-            float(camp.latitude), float(camp.longitude)
-        )
-        if distance and distance <= radius_km and distance < min_distance:
-            min_distance = distance
-            nearest = camp
-    
-    return nearest
-
+    return get_active_camp_index().nearest(user_lat, user_lon, k=k, radius_km=radius_km)
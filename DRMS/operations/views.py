@@ -1,8 +1,8 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from datetime import timedelta
@@ -11,19 +11,37 @@ import json
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
 
 from .models import (
     Donation, DonationItem, DonationAcknowledgment,
     HelpRequest, HelpRequestStatusHistory,
     TaskAssignment, TaskAssignmentStatusHistory,
-    Transport, TransportTrip
+    Transport, TransportTrip, VolunteerFeedEntry
 )
-from .utils import find_nearby_volunteers, find_nearest_camp_admin, find_nearest_camp, calculate_distance
+from .utils import (
+    find_nearby_volunteers, find_nearest_camp_admin, find_nearest_camp,
+    calculate_distances, rounded_distance
+)
+from .donations import donation_queryset, serialize_donation
+from .dispatch import (
+    dispatch_help_requests as dispatch_batch,
+    DEFAULT_DISPATCH_RADIUS_KM, DEFAULT_VOLUNTEER_CAPACITY
+)
+from .clustering import (
+    map_clusters as build_map_clusters, parse_bbox,
+    ADMIN_MAP_LAYERS, MAP_LAYERS, MIN_ZOOM, MAX_ZOOM
+)
+from relief.inventory import InventoryError, change_inventory
 from relief.models import Resource, ResourceRequest
 from disasters.models import Disasters
+from disasters.utils import locate_disaster
+from api.pagination import paginate_keyset, PaginationError
+from api.renderers import FastJsonResponse as JsonResponse
 from shelters.models import Camp
-from users.models import User, CampAdmin, Volunteer
+from users.models import User, Volunteer
+from users.location_buffer import buffered_location
 
 
 # ========================================
@@ -38,6 +56,7 @@ def list_donations(request):
     - Donors see only their donations
     - Camp admins see donations for their camp
     - Super admins see all donations
+    Paginated with ?cursor= and ?page_size=
     """
     donations = Donation.objects.all()
     
@@ -46,43 +65,18 @@ def list_donations(request):
         donations = donations.filter(created_by=request.user)
     # If user is camp_admin, show only donations for their camp
     elif request.user.role == 'camp_admin':
-        try:
-            camp_admin = CampAdmin.objects.get(user=request.user)
-            donations = donations.filter(camp=camp_admin.camp)
-        except CampAdmin.DoesNotExist:
+        if request.actor.camp_id is None:
             donations = Donation.objects.none()
+        else:
+            donations = donations.filter(camp_id=request.actor.camp_id)
     
-    donations = donations.order_by('-donation_date')
-    
-    donation_list = []
-    for donation in donations:
-        items = donation.items.all()
-        donation_list.append({
-            'id': donation.id,
-            'donor_name': donation.donor_name,
-            'donor_type': donation.donor_type,
-            'contact_email': donation.contact_email,
-            'contact_phone': donation.contact_phone,
-            'camp_id': donation.camp.id if donation.camp else None,
-            'camp_name': donation.camp.name if donation.camp else None,
-            'status': donation.status,
-            'donation_date': donation.donation_date.isoformat(),
-            'created_by': donation.created_by.username if donation.created_by else None,
-            'items': [{
-                'id': item.id,
-                'resource_name': item.resource.name if item.resource else None,
-                'resource_id': item.resource.id if item.resource else None,
-                'quantity': float(item.quantity)
-            } for item in items],
-            'has_acknowledgment': hasattr(donation, 'donationacknowledgment'),
-            'acknowledgment': {
-                'text': donation.donationacknowledgment.acknowledgment_text,
-                'acknowledged_by': donation.donationacknowledgment.acknowledged_by.username if hasattr(donation, 'donationacknowledgment') and donation.donationacknowledgment.acknowledged_by else None,
-                'acknowledged_at': donation.donationacknowledgment.acknowledged_at.isoformat() if hasattr(donation, 'donationacknowledgment') else None
-            } if hasattr(donation, 'donationacknowledgment') else None
-        })
+    try:
+        page = paginate_keyset(donation_queryset(donations), request.GET, ('-donation_date',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    donation_list = [serialize_donation(donation) for donation in page]
     
-    return Response({'donations': donation_list})
+    return Response({'donations': donation_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
 
 
 @api_view(['POST'])
@@ -167,6 +161,7 @@ def create_donation(request):
 
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_donation_status(request, donation_id):
     """
     Update donation status - Accept or Reject (camp admin only for their camp)
@@ -181,18 +176,17 @@ def update_donation_status(request, donation_id):
         if not new_status:
             return Response({'error': 'status is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        donation = get_object_or_404(Donation, id=donation_id)
+        # Locked, so a concurrent acceptance waits and then sees the new status
+        donation = get_object_or_404(Donation.objects.select_for_update(), id=donation_id)
         
         # If camp_admin, ensure they can only manage donations for their camp
         if request.user.role == 'camp_admin':
-            try:
-                camp_admin = CampAdmin.objects.get(user=request.user)
-                if donation.camp != camp_admin.camp:
-                    return JsonResponse({
-                        'error': 'You can only manage donations for your own camp'
-                    }, status=403)
-            except CampAdmin.DoesNotExist:
+            if request.actor.camp_admin_id is None:
                 return JsonResponse({'error': 'Camp admin profile not found'}, status=403)
+            if donation.camp_id != request.actor.camp_id:
+                return JsonResponse({
+                    'error': 'You can only manage donations for your own camp'
+                }, status=403)
         
         # Validate status
         valid_statuses = ['pending', 'accepted', 'rejected']
@@ -205,23 +199,14 @@ def update_donation_status(request, donation_id):
         
         # If accepted, update resource inventory
         if new_status == 'accepted' and previous_status != 'accepted':
-            for item in donation.items.all():
-                if item.resource:
-                    resource = item.resource
-                    resource.total_quantity += item.quantity
-                    resource.available_quantity += item.quantity
-                    resource.save()
-                    
-                    # Create inventory transaction
-                    from relief.models import ResourceInventoryTransaction
-                    ResourceInventoryTransaction.objects.create(
-                        resource=resource,
-                        transaction_type='donation',
-                        quantity_delta=item.quantity,
-                        reason=f'Donation {donation.id} accepted from {donation.donor_name}',
-                        related_donation_item=item,
-                        created_by=request.user
-                    )
+            # In resource order, so concurrent acceptances lock the rows in the same order
+            for item in donation.items.filter(resource__isnull=False).order_by('resource_id', 'id'):
+                change_inventory(
+                    item.resource_id, 'donation', item.quantity, item.quantity,
+                    reason=f'Donation {donation.id} accepted from {donation.donor_name}',
+                    related_donation_item=item,
+                    created_by=request.user
+                )
         
         # Create or update acknowledgment
         acknowledgment, created = DonationAcknowledgment.objects.get_or_create(
@@ -246,7 +231,12 @@ def update_donation_status(request, donation_id):
             'acknowledged_at': acknowledgment.acknowledged_at.isoformat()
         })
         
+    except InventoryError as e:
+        # Keep neither the status change nor the items already added to the inventory
+        transaction.set_rollback(True)
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
+        transaction.set_rollback(True)
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -266,14 +256,12 @@ def acknowledge_donation(request, donation_id):
         
         # If camp_admin, ensure they can only acknowledge donations for their camp
         if request.user.role == 'camp_admin':
-            try:
-                camp_admin = CampAdmin.objects.get(user=request.user)
-                if donation.camp != camp_admin.camp:
-                    return Response({
-                        'error': 'You can only acknowledge donations for your own camp'
-                    }, status=status.HTTP_403_FORBIDDEN)
-            except CampAdmin.DoesNotExist:
+            if request.actor.camp_admin_id is None:
                 return Response({'error': 'Camp admin profile not found'}, status=status.HTTP_403_FORBIDDEN)
+            if donation.camp_id != request.actor.camp_id:
+                return Response({
+                    'error': 'You can only acknowledge donations for your own camp'
+                }, status=status.HTTP_403_FORBIDDEN)
         
         acknowledgment, created = DonationAcknowledgment.objects.get_or_create(
             donation=donation,
@@ -310,6 +298,7 @@ def list_help_requests(request):
     - Victims see only their requests
     - Volunteers see requests assigned to them and nearby requests
     - Admins see all requests
+    Paginated with ?cursor= and ?page_size=
     """
     requests = HelpRequest.objects.all()
     
@@ -317,26 +306,9 @@ def list_help_requests(request):
     if request.user.role == 'victim':
         requests = requests.filter(victim=request.user)
     elif request.user.role == 'volunteer':
-        # Volunteers see assigned requests and nearby pending requests
-        assigned_requests = requests.filter(assigned_volunteer=request.user)
-        if request.user.latitude and request.user.longitude:
-            # Get nearby pending requests within 50km
-            nearby_requests = requests.filter(
-                status='pending',
-                latitude__isnull=False,
-                longitude__isnull=False
-            )
-            nearby_list = []
-            for req in nearby_requests:
-                distance = calculate_distance(
-                    float(request.user.latitude), float(request.user.longitude),
-                    float(req.latitude), float(req.longitude)
-                ) if req.latitude and req.longitude else None
-                if distance and distance <= 50:
-                    nearby_list.append(req.id)
-            requests = assigned_requests | requests.filter(id__in=nearby_list)
-        else:
-            requests = assigned_requests
+        # Volunteers see assigned requests and nearby pending requests (from their feed)
+        feed_request_ids = VolunteerFeedEntry.objects.filter(volunteer=request.user).values('help_request_id')
+        requests = requests.filter(Q(assigned_volunteer=request.user) | Q(id__in=feed_request_ids))
     
     # Filter by status
     status_filter = request.GET.get('status')
@@ -348,17 +320,25 @@ def list_help_requests(request):
     if disaster_id:
         requests = requests.filter(disasters_id=disaster_id)
     
-    requests = requests.order_by('-requested_at')
+    try:
+        page = paginate_keyset(
+            requests.select_related('victim', 'disasters', 'assigned_volunteer'), request.GET, ('-requested_at',)
+        )
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    requests = page.items
+    
+    distances = [None] * len(requests)
+    user_lat, user_lon = buffered_location(request.user)
+    if user_lat and user_lon:
+        distances = calculate_distances(
+            user_lat, user_lon,
+            [req.latitude for req in requests],
+            [req.longitude for req in requests]
+        )
     
     request_list = []
-    for req in requests:
-        distance = None
-        if request.user.latitude and request.user.longitude and req.latitude and req.longitude:
-            distance = calculate_distance(
-                float(request.user.latitude), float(request.user.longitude),
-                float(req.latitude), float(req.longitude)
-            )
-        
+    for req, distance in zip(requests, distances):
         request_list.append({
             'id': req.id,
             'victim': req.victim.username,
@@ -373,10 +353,55 @@ def list_help_requests(request):
             'assigned_volunteer_username': req.assigned_volunteer.username if req.assigned_volunteer else None,
             'status': req.status,
             'requested_at': req.requested_at.isoformat(),
-            'distance_km': round(distance, 2) if distance else None
+            'distance_km': rounded_distance(distance)
         })
     
-    return Response({'help_requests': request_list})
+    return Response({'help_requests': request_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def nearby_help_request_feed(request):
+    """
+    Paginated feed of pending help requests near the volunteer, nearest first
+    Distances are precomputed whenever a request or the volunteer moves
+    """
+    if request.user.role != 'volunteer':
+        return Response({'error': 'Only volunteers have a nearby help request feed'}, status=status.HTTP_403_FORBIDDEN)
+    
+    entries = VolunteerFeedEntry.objects.filter(volunteer=request.user)
+    
+    # Filter by disaster
+    disaster_id = request.GET.get('disaster_id')
+    if disaster_id:
+        entries = entries.filter(help_request__disasters_id=disaster_id)
+    
+    entries = entries.select_related(
+        'help_request__victim', 'help_request__disasters'
+    ).order_by('distance_km', 'help_request_id')
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(entries, request)
+    
+    request_list = []
+    for entry in page:
+        req = entry.help_request
+        request_list.append({
+            'id': req.id,
+            'victim': req.victim.username,
+            'victim_id': req.victim.id,
+            'disaster_id': req.disasters.id,
+            'disaster_name': req.disasters.name,
+            'description': req.description,
+            'location': req.location,
+            'latitude': float(req.latitude) if req.latitude else None,
+            'longitude': float(req.longitude) if req.longitude else None,
+            'status': req.status,
+            'requested_at': req.requested_at.isoformat(),
+            'distance_km': rounded_distance(entry.distance_km)
+        })
+    
+    return paginator.get_paginated_response(request_list)
 
 
 @api_view(['POST'])
@@ -396,10 +421,8 @@ def create_help_request(request):
         latitude = request.data.get('latitude')
         longitude = request.data.get('longitude')
         
-        if not disaster_id or not description or not location:
-            return Response({'error': 'disaster_id, description, and location are required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        disaster = get_object_or_404(Disasters, id=disaster_id)
+        if not description or not location:
+            return Response({'error': 'description and location are required'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Use victim's location if not provided in request
         if not latitude and request.user.latitude:
@@ -407,6 +430,16 @@ def create_help_request(request):
         if not longitude and request.user.longitude:
             longitude = float(request.user.longitude)
         
+        if disaster_id:
+            disaster = get_object_or_404(Disasters, id=disaster_id)
+        else:
+            # Tag the request with the active disaster whose boundary contains it
+            disaster = locate_disaster(latitude, longitude) if latitude and longitude else None
+            if disaster is None:
+                return Response({
+                    'error': 'disaster_id is required when the location is not inside a known disaster boundary'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
         help_request = HelpRequest.objects.create(
             victim=request.user,
             disasters=disaster,
@@ -421,15 +454,17 @@ def create_help_request(request):
         nearby_volunteers = []
         if latitude and longitude:
             volunteers = find_nearby_volunteers(float(latitude), float(longitude), radius_km=50, max_results=5)
+            distances = calculate_distances(
+                latitude, longitude,
+                [v.user.latitude for v in volunteers],
+                [v.user.longitude for v in volunteers]
+            )
             nearby_volunteers = [{
                 'id': v.id,
                 'user_id': v.user.id,
                 'username': v.user.username,
-                'distance_km': round(calculate_distance(
-                    float(latitude), float(longitude),
-                    float(v.user.latitude), float(v.user.longitude)
-                ), 2) if v.user.latitude and v.user.longitude else None
-            } for v in volunteers]
+                'distance_km': rounded_distance(distance)
+            } for v, distance in zip(volunteers, distances)]
         
         # Create status history
         HelpRequestStatusHistory.objects.create(
@@ -443,6 +478,7 @@ def create_help_request(request):
         return Response({
             'message': 'Help request created successfully',
             'help_request_id': help_request.id,
+            'disaster_id': disaster.id,
             'requested_at': help_request.requested_at.isoformat(),
             'nearby_volunteers': nearby_volunteers,
             'suggestion': 'You can assign a volunteer from the nearby volunteers list'
@@ -454,6 +490,7 @@ def create_help_request(request):
 
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_help_request_status(request, request_id):
     """
     Update help request status
@@ -511,6 +548,7 @@ def update_help_request_status(request, request_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def assign_volunteer_to_help_request(request, request_id):
     """
     Assign a volunteer to a help request
@@ -586,6 +624,89 @@ def assign_volunteer_to_help_request(request, request_id):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def dispatch_help_requests(request):
+    """
+    Batch-assign all pending help requests of a disaster to nearby volunteers
+    - Nearest pairs are matched first, respecting each volunteer's capacity
+    - Pass dry_run=true to preview the assignments without saving them
+    """
+    if request.user.role not in ['super_admin', 'camp_admin']:
+        return Response({'error': 'Unauthorized. Admin role required.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        disaster_id = request.data.get('disaster_id')
+        if not disaster_id:
+            return Response({'error': 'disaster_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            radius_km = float(request.data.get('radius_km', DEFAULT_DISPATCH_RADIUS_KM))
+            capacity = int(request.data.get('max_tasks_per_volunteer', DEFAULT_VOLUNTEER_CAPACITY))
+        except (TypeError, ValueError):
+            return Response({'error': 'radius_km and max_tasks_per_volunteer must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if radius_km <= 0 or capacity < 1:
+            return Response({'error': 'radius_km must be positive and max_tasks_per_volunteer at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', False)).lower() in ['true', '1']
+        disaster = get_object_or_404(Disasters, id=disaster_id)
+        
+        result = dispatch_batch(
+            disaster,
+            changed_by=request.user,
+            radius_km=radius_km,
+            capacity=capacity,
+            dry_run=dry_run
+        )
+        
+        return Response({
+            'message': 'Dispatch preview generated' if dry_run else 'Help requests dispatched successfully',
+            **result
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ========================================
+# MAP VIEWS
+# ========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def map_clusters(request):
+    """
+    Clustered map markers for the viewport
+    - zoom: web map zoom level (0-20)
+    - bbox: min_lon,min_lat,max_lon,max_lat (defaults to the whole world)
+    - layers: comma separated subset of help_requests, camps, volunteers
+      (volunteers for admins only)
+    - disaster_id: limit help requests and camps to one disaster
+    Help requests are clustered to their grid cell, without ids, at no finer
+    than about 1 km and only in cells with a few requests, except for admins
+    """
+    try:
+        zoom = int(request.GET.get('zoom', 10))
+        bbox = parse_bbox(request.GET.get('bbox'))
+    except ValueError as e:
+        return Response({'error': f'Invalid zoom or bbox: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+    
+    layers = [layer for layer in request.GET.get('layers', 'help_requests,camps').split(',') if layer]
+    invalid_layers = [layer for layer in layers if layer not in MAP_LAYERS]
+    if invalid_layers:
+        return Response({'error': f'Invalid layers {invalid_layers}. Must be any of: {MAP_LAYERS}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    is_admin = request.user.role in ['super_admin', 'camp_admin']
+    if not is_admin and any(layer in ADMIN_MAP_LAYERS for layer in layers):
+        return Response({'error': 'Only admins can view the volunteers layer'}, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        return Response(build_map_clusters(layers, zoom, bbox, request.GET.get('disaster_id'), exact=is_admin))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # ========================================
 # TASK ASSIGNMENT MANAGEMENT VIEWS
 # ========================================
@@ -595,6 +716,7 @@ def assign_volunteer_to_help_request(request, request_id):
 def list_task_assignments(request):
     """
     List all task assignments
+    Paginated with ?cursor= and ?page_size=
     """
     tasks = TaskAssignment.objects.all()
     
@@ -612,21 +734,24 @@ def list_task_assignments(request):
     if request.user.role == 'volunteer':
         tasks = tasks.filter(volunteer=request.user)
     
-    tasks = tasks.order_by('-assigned_at')
+    try:
+        page = paginate_keyset(tasks.select_related('volunteer'), request.GET, ('-assigned_at',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     task_list = []
-    for task in tasks:
+    for task in page:
         task_list.append({
             'id': task.id,
             'volunteer': task.volunteer.username,
             'volunteer_id': task.volunteer.id,
             'task_description': task.task_description,
-            'help_request_id': task.help_request.id if task.help_request else None,
+            'help_request_id': task.help_request_id,
             'status': task.status,
             'assigned_at': task.assigned_at.isoformat()
         })
     
-    return Response({'task_assignments': task_list})
+    return Response({'task_assignments': task_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
 
 
 @api_view(['POST'])
@@ -679,6 +804,7 @@ def create_task_assignment(request):
 
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_task_status(request, task_id):
     """
     Update task status (volunteer can update their own tasks, admin can update any)
@@ -737,6 +863,7 @@ def update_task_status(request, task_id):
 def list_transports(request):
     """
     List all transports
+    Paginated with ?cursor= and ?page_size=
     """
     transports = Transport.objects.all()
     
@@ -750,8 +877,13 @@ def list_transports(request):
     if transport_type:
         transports = transports.filter(transport_type=transport_type)
     
+    try:
+        page = paginate_keyset(transports.select_related('assigned_to_camp'), request.GET, ('id',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
     transport_list = []
-    for transport in transports:
+    for transport in page:
         transport_list.append({
             'id': transport.id,
             'vehicle_number': transport.vehicle_number,
@@ -765,7 +897,7 @@ def list_transports(request):
             'created_at': transport.created_at.isoformat()
         })
     
-    return Response({'transports': transport_list})
+    return Response({'transports': transport_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
 
 
 @api_view(['GET'])
@@ -798,36 +930,19 @@ def my_donations(request):
     if request.user.role != 'donor':
         return Response({'error': 'Only donors can view their donations'}, status=status.HTTP_403_FORBIDDEN)
     
-    donations = Donation.objects.filter(created_by=request.user).order_by('-donation_date')
-    
-    donation_list = []
-    for donation in donations:
-        items = donation.items.all()
-        donation_list.append({
-            'id': donation.id,
-            'donor_name': donation.donor_name,
-            'donor_type': donation.donor_type,
-            'camp_id': donation.camp.id if donation.camp else None,
-            'camp_name': donation.camp.name if donation.camp else None,
-            'camp_location': donation.camp.location if donation.camp else None,
-            'status': donation.status,
-            'donation_date': donation.donation_date.isoformat(),
-            'items': [{
-                'id': item.id,
-                'resource_name': item.resource.name if item.resource else None,
-                'resource_id': item.resource.id if item.resource else None,
-                'quantity': float(item.quantity),
-                'unit': item.resource.unit if item.resource else None
-            } for item in items],
-            'has_acknowledgment': hasattr(donation, 'donationacknowledgment'),
-            'acknowledgment': {
-                'text': donation.donationacknowledgment.acknowledgment_text,
-                'acknowledged_by': donation.donationacknowledgment.acknowledged_by.username if hasattr(donation, 'donationacknowledgment') and donation.donationacknowledgment.acknowledged_by else None,
-                'acknowledged_at': donation.donationacknowledgment.acknowledged_at.isoformat() if hasattr(donation, 'donationacknowledgment') else None
-            } if hasattr(donation, 'donationacknowledgment') else None
-        })
+    donations = Donation.objects.filter(created_by=request.user)
+    try:
+        page = paginate_keyset(donation_queryset(donations), request.GET, ('-donation_date',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    donation_list = [serialize_donation(donation) for donation in page]
     
-    return Response({'my_donations': donation_list, 'total': len(donation_list)})
+    return Response({
+        'my_donations': donation_list,
+        'total': donations.count(),
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more
+    })
 
 
 @api_view(['GET'])
@@ -835,63 +950,50 @@ def my_donations(request):
 def camp_donations(request, camp_id):
     """
     Get all donations for a specific camp (camp admin can see donations for their camp)
+    Paginated with ?cursor= and ?page_size=; the totals cover every page
     """
     camp = get_object_or_404(Camp, id=camp_id)
     
     # If camp_admin, ensure they can only see donations for their camp
     if request.user.role == 'camp_admin':
-        try:
-            camp_admin = CampAdmin.objects.get(user=request.user)
-            if camp_admin.camp != camp:
-                return Response({
-                    'error': 'You can only view donations for your own camp'
-                }, status=status.HTTP_403_FORBIDDEN)
-        except CampAdmin.DoesNotExist:
+        if request.actor.camp_admin_id is None:
             return Response({'error': 'Camp admin profile not found'}, status=status.HTTP_403_FORBIDDEN)
+        if request.actor.camp_id != camp.id:
+            return Response({
+                'error': 'You can only view donations for your own camp'
+            }, status=status.HTTP_403_FORBIDDEN)
     elif request.user.role not in ['super_admin', 'camp_admin', 'donor']:
         return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
     
-    donations = Donation.objects.filter(camp=camp).order_by('-donation_date')
+    donations = Donation.objects.filter(camp=camp)
     
     # Filter by status if provided
     status_filter = request.GET.get('status')
     if status_filter:
         donations = donations.filter(status=status_filter)
     
-    donation_list = []
-    for donation in donations:
-        items = donation.items.all()
-        donation_list.append({
-            'id': donation.id,
-            'donor_name': donation.donor_name,
-            'donor_type': donation.donor_type,
-            'contact_email': donation.contact_email,
-            'contact_phone': donation.contact_phone,
-            'status': donation.status,
-            'donation_date': donation.donation_date.isoformat(),
-            'items': [{
-                'id': item.id,
-                'resource_name': item.resource.name if item.resource else None,
-                'resource_id': item.resource.id if item.resource else None,
-                'quantity': float(item.quantity),
-                'unit': item.resource.unit if item.resource else None
-            } for item in items],
-            'has_acknowledgment': hasattr(donation, 'donationacknowledgment'),
-            'acknowledgment': {
-                'text': donation.donationacknowledgment.acknowledgment_text,
-                'acknowledged_by': donation.donationacknowledgment.acknowledged_by.username if hasattr(donation, 'donationacknowledgment') and donation.donationacknowledgment.acknowledged_by else None,
-                'acknowledged_at': donation.donationacknowledgment.acknowledged_at.isoformat() if hasattr(donation, 'donationacknowledgment') else None
-            } if hasattr(donation, 'donationacknowledgment') else None
-        })
+    try:
+        page = paginate_keyset(donation_queryset(donations), request.GET, ('-donation_date',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    donation_list = [serialize_donation(donation) for donation in page]
+    totals = donations.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        accepted=Count('id', filter=Q(status='accepted')),
+        rejected=Count('id', filter=Q(status='rejected'))
+    )
     
     return Response({
         'camp_id': camp.id,
         'camp_name': camp.name,
         'donations': donation_list,
-        'total': len(donation_list),
-        'pending': donations.filter(status='pending').count(),
-        'accepted': donations.filter(status='accepted').count(),
-        'rejected': donations.filter(status='rejected').count()
+        'total': totals['total'],
+        'pending': totals['pending'],
+        'accepted': totals['accepted'],
+        'rejected': totals['rejected'],
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more
     })
 
 
@@ -900,6 +1002,7 @@ def camp_donations(request, camp_id):
 def list_transport_trips(request):
     """
     List all transport trips
+    Paginated with ?cursor= and ?page_size=
     """
     trips = TransportTrip.objects.all()
     
@@ -908,10 +1011,13 @@ def list_transport_trips(request):
     if status_filter:
         trips = trips.filter(status=status_filter)
     
-    trips = trips.order_by('-departure_time')
+    try:
+        page = paginate_keyset(trips.select_related('transport'), request.GET, ('-departure_time',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     trip_list = []
-    for trip in trips:
+    for trip in page:
         trip_list.append({
             'id': trip.id,
             'transport_id': trip.transport.id,
@@ -926,4 +1032,4 @@ def list_transport_trips(request):
             'created_at': trip.created_at.isoformat()
         })
     
-    return Response({'transport_trips': trip_list})
+    return Response({'transport_trips': trip_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
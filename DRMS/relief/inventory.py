@@ -0,0 +1,234 @@
+"""
+Inventory changes of Resource quantities.
+
+change_inventory() applies a change as a single UPDATE with F()
+expressions, so concurrent changes to the same resource are serialized by
+the database row lock instead of overwriting each other, and nothing is
+read first. The available_not_exceed_total check constraint is enforced
+by that UPDATE; a change breaking it raises InventoryError and leaves the
+resource untouched. The ResourceInventoryTransaction ledger row is written
+in the same transaction.
+
+change_inventory_bulk() does the same for a batch of changes, e.g. a
+warehouse intake: one locking read validates every entry, one CASE/WHEN
+UPDATE applies them and one bulk INSERT writes the ledger. The batch is
+applied whole or not at all.
+
+Usage:
+    try:
+        available, total = change_inventory(
+            resource.id, 'remove', available_delta=-quantity,
+            reason='Sent to camp', created_by=request.user
+        )
+    except InventoryError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+
+from api.conditional import bump_versions
+
+from .models import Resource, ResourceInventoryTransaction
+
+
+# Most entries change_inventory_bulk() accepts in one call
+MAX_BULK_CHANGES = 1000
+
+TRANSACTION_TYPES = [name for name, _ in ResourceInventoryTransaction.TRANSACTION_TYPES]
+
+# Shape of the quantity fields and of the ledger's quantity_delta
+_QUANTITY_FIELD = ResourceInventoryTransaction._meta.get_field('quantity_delta')
+QUANTITY_PLACES = _QUANTITY_FIELD.decimal_places
+MAX_QUANTITY = Decimal(10) ** (_QUANTITY_FIELD.max_digits - QUANTITY_PLACES)
+
+
+class InventoryError(ValueError):
+    """
+    Raised when a change would take available_quantity below 0 or above
+    total_quantity. errors lists the failing entries of a bulk change
+    """
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def parse_quantity_delta(value):
+    """
+    The Decimal of a requested quantity_delta. Raises ValueError unless it
+    is a finite number that the quantity fields store exactly
+    """
+    try:
+        quantity = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError('quantity_delta must be a number')
+    if not quantity.is_finite():
+        raise ValueError('quantity_delta must be a number')
+    if abs(quantity) >= MAX_QUANTITY:
+        raise ValueError(f'quantity_delta must be less than {MAX_QUANTITY} in absolute value')
+    if quantity != quantity.quantize(Decimal(1).scaleb(-QUANTITY_PLACES)):
+        raise ValueError(f'quantity_delta must have at most {QUANTITY_PLACES} decimal places')
+    return quantity
+
+
+def inventory_deltas(transaction_type, quantity_delta):
+    """(available_delta, total_delta) of an adjust-inventory entry"""
+    if transaction_type == 'add':
+        return quantity_delta, quantity_delta
+    if transaction_type == 'remove':
+        return -quantity_delta, Decimal(0)
+    return quantity_delta, Decimal(0)
+
+
+def change_inventory(resource_id, transaction_type, available_delta, total_delta=0, quantity_delta=None,
+                     floor_at_zero=False, reason='', created_by=None, related_request=None,
+                     related_donation_item=None):
+    """
+    Add available_delta and total_delta to a resource's quantities and
+    record the change in the ledger (as quantity_delta, by default
+    available_delta). floor_at_zero stops available_quantity at 0 instead
+    of failing. Returns (available_quantity, total_quantity) after the change
+    """
+    available_delta, total_delta = Decimal(available_delta), Decimal(total_delta)
+    available = F('available_quantity') + available_delta
+    if floor_at_zero:
+        available = Greatest(available, Value(Decimal(0)), output_field=models.DecimalField())
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                # The total (and so the available quantity) must still fit the column
+                updated = Resource.objects.filter(
+                    pk=resource_id, total_quantity__lt=MAX_QUANTITY - total_delta
+                ).update(
+                    available_quantity=available,
+                    total_quantity=F('total_quantity') + total_delta
+                )
+        except IntegrityError:
+            if available_delta < 0:
+                raise InventoryError('Insufficient available quantity')
+            raise InventoryError('Available quantity cannot exceed total quantity')
+        if not updated:
+            if Resource.objects.filter(pk=resource_id).exists():
+                raise InventoryError('Total quantity out of range')
+            raise Resource.DoesNotExist(f'Resource {resource_id} does not exist')
+
+        ResourceInventoryTransaction.objects.create(
+            resource_id=resource_id,
+            transaction_type=transaction_type,
+            quantity_delta=available_delta if quantity_delta is None else quantity_delta,
+            reason=reason,
+            related_request=related_request,
+            related_donation_item=related_donation_item,
+            created_by=created_by
+        )
+        # The UPDATE sends no signals
+        bump_versions('relief.Resource')
+        return Resource.objects.filter(pk=resource_id).values_list('available_quantity', 'total_quantity').get()
+
+
+def _parse_entry(entry, default_reason):
+    if not isinstance(entry, dict):
+        raise ValueError('Entry must be an object')
+    try:
+        resource_id = int(entry.get('resource_id'))
+    except (TypeError, ValueError):
+        raise ValueError('resource_id is required')
+    quantity_delta = parse_quantity_delta(entry.get('quantity_delta'))
+    transaction_type = entry.get('transaction_type', 'adjust')
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f'Invalid transaction_type. Must be one of: {TRANSACTION_TYPES}')
+    return {
+        'resource_id': resource_id,
+        'transaction_type': transaction_type,
+        'quantity_delta': quantity_delta,
+        'reason': entry.get('reason') or default_reason,
+    }
+
+
+def change_inventory_bulk(entries, created_by=None, default_reason='Bulk adjustment'):
+    """
+    Apply a batch of adjust-inventory entries ({resource_id, quantity_delta,
+    transaction_type, reason}) in one transaction. Entries are checked in
+    order against the locked quantities; if any fails, InventoryError lists
+    every failing entry and nothing is written. Returns
+    {resource_id: (available_quantity, total_quantity)} after the batch
+    """
+    changes, errors = [], []
+    for index, entry in enumerate(entries):
+        try:
+            changes.append(_parse_entry(entry, default_reason))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        raise InventoryError('Invalid entries', errors)
+
+    resource_ids = sorted({change['resource_id'] for change in changes})
+    with transaction.atomic():
+        # Locked in id order, so concurrent batches cannot deadlock
+        balances = {
+            pk: [available, total]
+            for pk, available, total in Resource.objects.select_for_update().filter(pk__in=resource_ids)
+            .order_by('pk').values_list('pk', 'available_quantity', 'total_quantity')
+        }
+        deltas = {pk: [Decimal(0), Decimal(0)] for pk in balances}
+        for index, change in enumerate(changes):
+            balance = balances.get(change['resource_id'])
+            if balance is None:
+                errors.append({'index': index, 'error': f"Resource {change['resource_id']} does not exist"})
+                continue
+            available_delta, total_delta = inventory_deltas(change['transaction_type'], change['quantity_delta'])
+            available, total = balance[0] + available_delta, balance[1] + total_delta
+            if available < 0:
+                errors.append({'index': index, 'error': 'Insufficient available quantity'})
+                continue
+            if available > total:
+                errors.append({'index': index, 'error': 'Available quantity cannot exceed total quantity'})
+                continue
+            if total >= MAX_QUANTITY:
+                errors.append({'index': index, 'error': 'Total quantity out of range'})
+                continue
+            balance[:] = available, total
+            deltas[change['resource_id']][0] += available_delta
+            deltas[change['resource_id']][1] += total_delta
+        if errors:
+            raise InventoryError('Inventory change rejected', errors)
+
+        decimal = models.DecimalField(max_digits=12, decimal_places=2)
+
+        def delta_case(position):
+            return Case(
+                *[When(pk=pk, then=Value(delta[position])) for pk, delta in deltas.items() if delta[position]],
+                default=Value(Decimal(0)), output_field=decimal
+            )
+
+        changed = [pk for pk, delta in deltas.items() if any(delta)]
+        try:
+            with transaction.atomic():
+                Resource.objects.filter(pk__in=changed).update(
+                    available_quantity=F('available_quantity') + delta_case(0),
+                    total_quantity=F('total_quantity') + delta_case(1)
+                )
+        except IntegrityError:
+            raise InventoryError('Inventory changed concurrently; retry the batch')
+
+        ResourceInventoryTransaction.objects.bulk_create([
+            ResourceInventoryTransaction(
+                resource_id=change['resource_id'],
+                transaction_type=change['transaction_type'],
+                quantity_delta=change['quantity_delta'],
+                reason=change['reason'],
+                created_by=created_by
+            )
+            for change in changes
+        ])
+        # Neither the UPDATE nor bulk_create sends signals
+        bump_versions('relief.Resource', 'relief.ResourceInventoryTransaction')
+        return {
+            pk: (available, total)
+            for pk, available, total in Resource.objects.filter(pk__in=resource_ids)
+            .values_list('pk', 'available_quantity', 'total_quantity')
+        }
@@ -0,0 +1,164 @@
+"""
+Django management command to stress concurrent inventory changes against
+the configured database (SQLite, switched to WAL, or PostgreSQL).
+
+Many threads apply random adjustments to one scratch resource at the same
+time. Afterwards the stored available_quantity is compared with the sum of
+the changes that were reported as applied, and with the ledger. The
+'ledger' mode goes through relief.inventory.change_inventory; the 'save'
+mode repeats the old read-modify-save pattern for comparison, which loses
+updates under contention.
+
+Usage:
+    python manage.py stress_inventory
+
+    # More threads and operations, only the inventory service:
+    python manage.py stress_inventory --threads 32 --operations 500 --mode ledger
+"""
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from relief.inventory import InventoryError, change_inventory
+from relief.models import Resource, ResourceInventoryTransaction
+
+
+START_AVAILABLE = Decimal(500)
+START_TOTAL = Decimal(1000)
+MAX_DELTA = 5
+LOCK_RETRIES = 50
+
+
+def _ledger_change(resource_id, delta):
+    change_inventory(resource_id, 'adjust', delta, reason='stress_inventory')
+
+
+def _save_change(resource_id, delta):
+    # The pattern the views used before the inventory service
+    resource = Resource.objects.get(pk=resource_id)
+    resource.available_quantity += delta
+    if resource.available_quantity < 0 or resource.available_quantity > resource.total_quantity:
+        raise InventoryError('Out of range')
+    resource.save()
+    ResourceInventoryTransaction.objects.create(
+        resource=resource, transaction_type='adjust', quantity_delta=delta, reason='stress_inventory'
+    )
+
+
+MODES = {'ledger': _ledger_change, 'save': _save_change}
+
+
+class Command(BaseCommand):
+    help = 'Stresses concurrent inventory changes and checks for lost updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Concurrent workers',
+        )
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=200,
+            help='Changes per worker',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['ledger', 'save', 'both'],
+            default='both',
+            help='Change path to stress (default: both, for comparison)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=24,
+            help='Random seed for the changes',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+                journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f'  database: sqlite (journal_mode={journal_mode})')
+        else:
+            self.stdout.write(f'  database: {connection.vendor}')
+
+        modes = ['ledger', 'save'] if options['mode'] == 'both' else [options['mode']]
+        lost = {}
+        for mode in modes:
+            lost[mode] = self._run(mode, options['threads'], options['operations'], options['seed'])
+
+        if lost.get('ledger'):
+            self.stdout.write(self.style.ERROR(f"[FAILED] {lost['ledger']} units lost through the inventory service"))
+        else:
+            self.stdout.write(self.style.SUCCESS('[SUCCESS] Inventory stress test complete'))
+
+    def _run(self, mode, threads, operations, seed):
+        resource = Resource.objects.create(
+            name=f'stress-{mode}-{time.time_ns()}', category='other', unit='unit',
+            total_quantity=START_TOTAL, available_quantity=START_AVAILABLE
+        )
+        change = MODES[mode]
+        lock = threading.Lock()
+        stats = {'applied': Decimal(0), 'ok': 0, 'rejected': 0, 'retries': 0, 'failed': 0}
+        start = threading.Barrier(threads)
+
+        def worker(index):
+            rng = random.Random(seed * 1000 + index)
+            applied, ok, rejected, retries, failed = Decimal(0), 0, 0, 0, 0
+            start.wait()
+            try:
+                for _ in range(operations):
+                    delta = Decimal(rng.randint(-MAX_DELTA, MAX_DELTA) or 1)
+                    for attempt in range(LOCK_RETRIES):
+                        try:
+                            change(resource.pk, delta)
+                            applied += delta
+                            ok += 1
+                        except InventoryError:
+                            rejected += 1
+                        except OperationalError:
+                            # SQLite: another writer holds the lock past the busy timeout
+                            retries += 1
+                            time.sleep(0.001 * (attempt + 1))
+                            continue
+                        break
+                    else:
+                        failed += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    for key, value in (('applied', applied), ('ok', ok), ('rejected', rejected),
+                                       ('retries', retries), ('failed', failed)):
+                        stats[key] += value
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        resource.refresh_from_db()
+        expected = START_AVAILABLE + stats['applied']
+        ledger = sum(resource.inventory_transactions.values_list('quantity_delta', flat=True), Decimal(0))
+        lost = abs(expected - resource.available_quantity)
+        self.stdout.write(
+            f"  {mode:<6} {threads} threads x {operations}: {stats['ok']} applied, {stats['rejected']} rejected, "
+            f"{stats['failed']} failed, {stats['retries']} lock retries, "
+            f"{(stats['ok'] + stats['rejected']) / elapsed:8.0f} ops/s"
+        )
+        self.stdout.write(
+            f"         available: expected {expected}, stored {resource.available_quantity}, "
+            f"ledger {START_AVAILABLE + ledger} -> {lost} units lost"
+        )
+        resource.delete()
+        return lost
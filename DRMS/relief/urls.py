@@ -8,6 +8,7 @@ urlpatterns = [
     path('resources/create/', views.create_resource, name='create_resource'),
     path('resources/<int:resource_id>/update/', views.update_resource, name='update_resource'),
     path('resources/<int:resource_id>/adjust-inventory/', views.adjust_inventory, name='adjust_inventory'),
+    path('resources/adjust-inventory/bulk/', views.bulk_adjust_inventory, name='bulk_adjust_inventory'),
     
     # Resource Requests
     path('resource-requests/', views.list_resource_requests, name='list_resource_requests'),
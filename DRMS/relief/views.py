@@ -1,11 +1,12 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 import json
 # DRF imports for JWT support
 from rest_framework.decorators import api_view, permission_classes
@@ -13,10 +14,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from .inventory import (
+    MAX_BULK_CHANGES, InventoryError, change_inventory, change_inventory_bulk, inventory_deltas, parse_quantity_delta
+)
 from .models import Resource, ResourceRequest, ResourceRequestStatusHistory, ResourceInventoryTransaction
 from operations.utils import find_nearest_camp_admin, find_nearest_camp
 from shelters.models import Camp
-from users.models import User, CampAdmin
+from users.models import User
+from api.conditional import conditional_get
+from api.pagination import paginate_keyset, PaginationError
+from api.refdata import cached_reference, request_variant
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -25,27 +33,27 @@ from users.models import User, CampAdmin
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('relief.Resource')
 def list_resources(request):
     """
     List all resources with optional filtering
+    Paginated with ?cursor= and ?page_size=
     """
-    resources = Resource.objects.all()
-    
-    # Filter by category
-    category = request.GET.get('category')
-    if category:
-        resources = resources.filter(category=category)
-    
-    # Filter by active status
-    is_active = request.GET.get('is_active')
-    if is_active is not None:
-        resources = resources.filter(is_active=is_active.lower() == 'true')
-    
-    resources = resources.order_by('category', 'name')
-    
-    resource_list = []
-    for resource in resources:
-        resource_list.append({
+    def build():
+        resources = Resource.objects.all()
+
+        # Filter by category
+        category = request.GET.get('category')
+        if category:
+            resources = resources.filter(category=category)
+
+        # Filter by active status
+        is_active = request.GET.get('is_active')
+        if is_active is not None:
+            resources = resources.filter(is_active=is_active.lower() == 'true')
+
+        page = paginate_keyset(resources, request.GET, ('category', 'name'))
+        resource_list = [{
             'id': resource.id,
             'name': resource.name,
             'category': resource.category,
@@ -55,13 +63,23 @@ def list_resources(request):
             'available_quantity': float(resource.available_quantity),
             'is_active': resource.is_active,
             'created_at': resource.created_at.isoformat()
-        })
-    
-    return JsonResponse({'resources': resource_list}, safe=False)
+        } for resource in page]
+        return {'resources': resource_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}
+
+    try:
+        payload = cached_reference(
+            'relief.list_resources', ('relief.Resource',), build,
+            variant=request_variant(request, 'category', 'is_active', 'cursor', 'page_size')
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(payload, safe=False)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get('relief.Resource', 'relief.ResourceInventoryTransaction')
 def get_resource(request, resource_id):
     """
     Get a specific resource by ID with inventory history
@@ -203,6 +221,9 @@ def adjust_inventory(request, resource_id):
     if request.user.role not in ['super_admin', 'camp_admin']:
         return Response({'error': 'Unauthorized. Admin role required.'}, status=status.HTTP_403_FORBIDDEN)
     
+    if not isinstance(request.data, dict):
+        return Response({'error': 'Request body must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
         quantity_delta = request.data.get('quantity_delta')
         reason = request.data.get('reason', 'Manual adjustment')
@@ -218,41 +239,75 @@ def adjust_inventory(request, resource_id):
         if transaction_type not in valid_types:
             return Response({'error': f'Invalid transaction_type. Must be one of: {valid_types}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update inventory
-        if transaction_type == 'add':
-            resource.total_quantity += quantity_delta
-            resource.available_quantity += quantity_delta
-        elif transaction_type == 'remove':
-            resource.available_quantity -= quantity_delta
-            if resource.available_quantity < 0:
-                return Response({'error': 'Insufficient available quantity'}, status=status.HTTP_400_BAD_REQUEST)
-        else:  # adjust
-            resource.available_quantity += quantity_delta
-            if resource.available_quantity < 0:
-                return Response({'error': 'Insufficient available quantity'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        resource.save()
+        try:
+            quantity_delta = parse_quantity_delta(quantity_delta)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create transaction record
-        ResourceInventoryTransaction.objects.create(
-            resource=resource,
-            transaction_type=transaction_type,
-            quantity_delta=quantity_delta,
-            reason=reason,
-            created_by=request.user
-        )
+        # Update inventory in the database, so concurrent adjustments cannot overwrite each other
+        available_delta, total_delta = inventory_deltas(transaction_type, quantity_delta)
+        try:
+            available_quantity, total_quantity = change_inventory(
+                resource.id, transaction_type, available_delta, total_delta,
+                quantity_delta=quantity_delta,
+                reason=reason,
+                created_by=request.user
+            )
+        except InventoryError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'message': 'Inventory adjusted successfully',
             'resource_id': resource.id,
-            'new_available_quantity': float(resource.available_quantity),
-            'new_total_quantity': float(resource.total_quantity)
+            'new_available_quantity': float(available_quantity),
+            'new_total_quantity': float(total_quantity)
         })
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_adjust_inventory(request):
+    """
+    Adjust the inventory of many resources at once (admin only), e.g. a
+    warehouse intake. Body: {"entries": [{"resource_id", "quantity_delta",
+    "transaction_type", "reason"}], "reason": default reason}. The batch is
+    applied whole or rejected whole, with the failing entries listed
+    """
+    if request.user.role not in ['super_admin', 'camp_admin']:
+        return Response({'error': 'Unauthorized. Admin role required.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    if not isinstance(request.data, dict):
+        return Response({'error': 'Request body must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    entries = request.data.get('entries')
+    if not isinstance(entries, list) or not entries:
+        return Response({'error': 'entries must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(entries) > MAX_BULK_CHANGES:
+        return Response({'error': f'At most {MAX_BULK_CHANGES} entries per request'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        quantities = change_inventory_bulk(
+            entries,
+            created_by=request.user,
+            default_reason=request.data.get('reason') or 'Bulk adjustment'
+        )
+    except InventoryError as e:
+        return Response({'error': str(e), 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': 'Inventory adjusted successfully',
+        'entries_applied': len(entries),
+        'resources': [{
+            'resource_id': resource_id,
+            'new_available_quantity': float(available_quantity),
+            'new_total_quantity': float(total_quantity)
+        } for resource_id, (available_quantity, total_quantity) in sorted(quantities.items())]
+    })
+
+
 # ========================================
 # RESOURCE REQUEST MANAGEMENT VIEWS
 # ========================================
@@ -262,6 +317,7 @@ def adjust_inventory(request, resource_id):
 def list_resource_requests(request):
     """
     List all resource requests
+    Paginated with ?cursor= and ?page_size=
     """
     requests = ResourceRequest.objects.all()
     
@@ -282,17 +338,18 @@ def list_resource_requests(request):
     
     # If user is camp_admin, show only their camp's requests
     if request.user.role == 'camp_admin':
-        from users.models import CampAdmin
-        try:
-            camp_admin = CampAdmin.objects.get(user=request.user)
-            requests = requests.filter(camp=camp_admin.camp)
-        except CampAdmin.DoesNotExist:
+        if request.actor.camp_id is None:
             requests = ResourceRequest.objects.none()
+        else:
+            requests = requests.filter(camp_id=request.actor.camp_id)
     
-    requests = requests.order_by('-request_date')
+    try:
+        page = paginate_keyset(requests.select_related('camp', 'resource', 'requested_by'), request.GET, ('-request_date',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     request_list = []
-    for req in requests:
+    for req in page:
         request_list.append({
             'id': req.id,
             'camp_id': req.camp.id,
@@ -309,7 +366,7 @@ def list_resource_requests(request):
             'reason': req.reason
         })
     
-    return Response({'resource_requests': request_list})
+    return Response({'resource_requests': request_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
 
 
 @api_view(['POST'])
@@ -361,14 +418,12 @@ def create_resource_request(request):
             camp = get_object_or_404(Camp, id=camp_id)
             
             # Verify it's their camp
-            try:
-                camp_admin = CampAdmin.objects.get(user=request.user)
-                if camp_admin.camp != camp:
-                    return Response({
-                        'error': 'You can only create resource requests for your own camp'
-                    }, status=status.HTTP_403_FORBIDDEN)
-            except CampAdmin.DoesNotExist:
+            if request.actor.camp_admin_id is None:
                 return Response({'error': 'Camp admin profile not found'}, status=status.HTTP_403_FORBIDDEN)
+            if request.actor.camp_id != camp.id:
+                return Response({
+                    'error': 'You can only create resource requests for your own camp'
+                }, status=status.HTTP_403_FORBIDDEN)
         elif request.user.role == 'super_admin':
             # Super admin must specify camp
             if not camp_id:
@@ -421,6 +476,7 @@ def create_resource_request(request):
 
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def update_resource_request_status(request, request_id):
     """
     Update resource request status (admin only)
@@ -436,19 +492,17 @@ def update_resource_request_status(request, request_id):
         if not new_status:
             return Response({'error': 'status is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        request_obj = get_object_or_404(ResourceRequest, id=request_id)
+        # Locked, so a concurrent update waits and then sees the new status
+        request_obj = get_object_or_404(ResourceRequest.objects.select_for_update(), id=request_id)
         
         # If camp_admin, ensure they can only update requests for their own camp
         if request.user.role == 'camp_admin':
-            from users.models import CampAdmin
-            try:
-                camp_admin = CampAdmin.objects.get(user=request.user)
-                if camp_admin.camp != request_obj.camp:
-                    return Response({
-                        'error': 'You can only update resource requests for your own camp'
-                    }, status=status.HTTP_403_FORBIDDEN)
-            except CampAdmin.DoesNotExist:
+            if request.actor.camp_admin_id is None:
                 return Response({'error': 'Camp admin profile not found'}, status=status.HTTP_403_FORBIDDEN)
+            if request.actor.camp_id != request_obj.camp_id:
+                return Response({
+                    'error': 'You can only update resource requests for your own camp'
+                }, status=status.HTTP_403_FORBIDDEN)
         previous_status = request_obj.status
         
         # Validate status
@@ -464,19 +518,11 @@ def update_resource_request_status(request, request_id):
         
         request_obj.save()
         
-        # If fulfilled, update resource inventory
-        if new_status == 'fulfilled' and quantity_fulfilled:
-            resource = request_obj.resource
-            resource.available_quantity -= quantity_fulfilled
-            if resource.available_quantity < 0:
-                resource.available_quantity = 0
-            resource.save()
-            
-            # Create inventory transaction
-            ResourceInventoryTransaction.objects.create(
-                resource=resource,
-                transaction_type='fulfillment',
-                quantity_delta=-quantity_fulfilled,
+        # If fulfilled, update resource inventory; a request is only taken out of it once
+        if new_status == 'fulfilled' and previous_status != 'fulfilled' and quantity_fulfilled:
+            change_inventory(
+                request_obj.resource_id, 'fulfillment', -Decimal(str(quantity_fulfilled)),
+                floor_at_zero=True,
                 reason=f'Fulfilled request {request_obj.id}',
                 related_request=request_obj,
                 created_by=request.user
@@ -498,7 +544,12 @@ def update_resource_request_status(request, request_id):
             'new_status': new_status
         })
         
+    except InventoryError as e:
+        # Keep neither the status change nor its history row
+        transaction.set_rollback(True)
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
+        transaction.set_rollback(True)
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -559,6 +610,7 @@ def urgent_resource_requests(request):
 def list_inventory_transactions(request):
     """
     List all inventory transactions with optional filtering
+    Paginated with ?cursor= and ?page_size=
     """
     transactions = ResourceInventoryTransaction.objects.all()
     
@@ -572,10 +624,13 @@ def list_inventory_transactions(request):
     if transaction_type:
         transactions = transactions.filter(transaction_type=transaction_type)
     
-    transactions = transactions.order_by('-created_at')
+    try:
+        page = paginate_keyset(transactions.select_related('resource', 'created_by'), request.GET, ('-created_at',))
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     transaction_list = []
-    for t in transactions:
+    for t in page:
         transaction_list.append({
             'id': t.id,
             'resource_id': t.resource.id,
@@ -583,9 +638,9 @@ def list_inventory_transactions(request):
             'transaction_type': t.transaction_type,
             'quantity_delta': float(t.quantity_delta),
             'reason': t.reason,
-            'related_request_id': t.related_request.id if t.related_request else None,
+            'related_request_id': t.related_request_id,
             'created_by': t.created_by.username if t.created_by else None,
             'created_at': t.created_at.isoformat()
         })
     
-    return Response({'inventory_transactions': transaction_list})
+    return Response({'inventory_transactions': transaction_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
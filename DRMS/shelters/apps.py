@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SheltersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shelters'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Camp
+from .utils import invalidate_camp_index
+
+
+@receiver(post_save, sender=Camp)
+@receiver(post_delete, sender=Camp)
+def camp_changed(sender, instance, **kwargs):
+    """Rebuild the nearest-camp index lazily after any camp change"""
+    invalidate_camp_index()
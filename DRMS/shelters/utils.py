@@ -0,0 +1,70 @@
+"""
+In-memory spatial index of active camps used for nearest-camp lookups
+"""
+import copy
+import threading
+
+from django.db.models import Count, Max
+
+from operations.utils import SphericalKDTree
+
+
+class CampIndex:
+    """KD-tree of active, geolocated camps built from a single query"""
+
+    def __init__(self, version):
+        from .models import Camp
+
+        camps = list(Camp.objects.filter(
+            latitude__isnull=False,
+            longitude__isnull=False,
+            status='active'
+        ))
+        self.version = version
+        self._tree = SphericalKDTree([(camp.latitude, camp.longitude) for camp in camps], camps)
+
+    def __len__(self):
+        return len(self._tree)
+
+    def nearest(self, lat, lon, k=1, radius_km=None):
+        """
+        Return up to k (camp, distance_km) pairs sorted by distance.
+        Camps are copies, so callers may modify them freely.
+        """
+        return [
+            (copy.copy(camp), distance)
+            for camp, distance in self._tree.query(lat, lon, k=k, radius_km=radius_km)
+        ]
+
+
+_camp_index = None
+_camp_index_lock = threading.Lock()
+
+
+def _current_version():
+    # Read from the camp table rather than a cache, so every worker process
+    # notices a change saved by another one: any save moves updated_at and a
+    # delete lowers the count
+    from .models import Camp
+
+    state = Camp.objects.aggregate(last_update=Max('updated_at'), count=Count('id'))
+    return state['last_update'], state['count']
+
+
+def get_active_camp_index():
+    """Return the process-wide camp index, rebuilding it lazily when stale"""
+    global _camp_index
+    version = _current_version()
+    index = _camp_index
+    if index is not None and index.version == version:
+        return index
+    with _camp_index_lock:
+        if _camp_index is None or _camp_index.version != version:
+            _camp_index = CampIndex(version)
+        return _camp_index
+
+
+def invalidate_camp_index():
+    """Drop the local camp index; other processes notice the change on their next lookup"""
+    global _camp_index
+    _camp_index = None
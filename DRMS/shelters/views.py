@@ -1,8 +1,8 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import timedelta
@@ -12,6 +12,11 @@ from .models import Camp
 from disasters.models import Disasters
 from relief.models import ResourceRequest
 from users.models import User, CampAdmin
+from api.conditional import conditional_get
+from api.pagination import paginate_keyset, PaginationError
+from api.refdata import cached_reference
+from api.stats import read_counters, ranked
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -20,11 +25,13 @@ from users.models import User, CampAdmin
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get('shelters.Camp', 'disasters.Disasters', 'users.CampAdmin')
 def list_camps(request):
     """
     List all camps with optional filtering
     - Can filter by location (e.g., ?location=thrissur)
     - Can filter by status, type, disaster
+    Paginated with ?cursor= and ?page_size=
     """
     camps = Camp.objects.all()
     
@@ -50,16 +57,18 @@ def list_camps(request):
     
     # If user is camp_admin, show only their camp
     if request.user.role == 'camp_admin':
-        try:
-            camp_admin = CampAdmin.objects.get(user=request.user)
-            camps = Camp.objects.filter(id=camp_admin.camp.id)
-        except CampAdmin.DoesNotExist:
+        if request.actor.camp_id is None:
             camps = Camp.objects.none()
+        else:
+            camps = Camp.objects.filter(id=request.actor.camp_id)
     
-    camps = camps.order_by('name')
+    try:
+        page = paginate_keyset(camps.select_related('disasters'), request.GET, ('name',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     camp_list = []
-    for camp in camps:
+    for camp in page:
         camp_list.append({
             'id': camp.id,
             'name': camp.name,
@@ -81,11 +90,15 @@ def list_camps(request):
             'updated_at': camp.updated_at.isoformat()
         })
     
-    return JsonResponse({'camps': camp_list}, safe=False)
+    return JsonResponse({'camps': camp_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_get(
+    'shelters.Camp', 'disasters.Disasters', 'users.CampAdmin', 'relief.Resource', 'relief.ResourceRequest',
+    'operations.Donation'
+)
 def get_camp(request, camp_id):
     """
     Get a specific camp by ID with related information
@@ -232,6 +245,7 @@ def create_camp(request):
 @login_required
 @require_http_methods(["PUT", "PATCH"])
 @csrf_exempt
+@transaction.atomic
 def update_camp(request, camp_id):
     """
     Update a camp (admin only)
@@ -245,12 +259,10 @@ def update_camp(request, camp_id):
         
         # Check if camp_admin can only update their own camp
         if request.user.role == 'camp_admin':
-            try:
-                camp_admin = CampAdmin.objects.get(user=request.user)
-                if camp_admin.camp != camp:
-                    return JsonResponse({'error': 'You can only update your own camp'}, status=403)
-            except CampAdmin.DoesNotExist:
+            if request.actor.camp_admin_id is None:
                 return JsonResponse({'error': 'Camp admin profile not found'}, status=403)
+            if request.actor.camp_id != camp.id:
+                return JsonResponse({'error': 'You can only update your own camp'}, status=403)
         
         # Update fields if provided
         if 'name' in data:
@@ -306,11 +318,9 @@ def active_camps(request):
     """
     Get all active camps
     """
-    camps = Camp.objects.filter(status='active').order_by('name')
-    
-    camp_list = []
-    for camp in camps:
-        camp_list.append({
+    def build():
+        camps = Camp.objects.filter(status='active').select_related('disasters').order_by('name')
+        return [{
             'id': camp.id,
             'name': camp.name,
             'camp_type': camp.camp_type,
@@ -318,8 +328,9 @@ def active_camps(request):
             'capacity': camp.capacity,
             'population_capacity': camp.population_capacity,
             'disaster_name': camp.disasters.name
-        })
-    
+        } for camp in camps]
+
+    camp_list = cached_reference('shelters.active_camps', ('shelters.Camp', 'disasters.Disasters'), build)
     return JsonResponse({'active_camps': camp_list}, safe=False)
 
 
@@ -329,23 +340,23 @@ def camp_statistics(request):
     """
     Get camp statistics
     """
+    counters = read_counters('shelters.camp')
+    camps_per_disaster = counters.by_disaster('shelters.camp')
+    disaster_names = dict(Disasters.objects.filter(id__in=camps_per_disaster).values_list('id', 'name'))
+    camps_by_disaster = {}
+    for disaster_id, count in camps_per_disaster.items():
+        name = disaster_names.get(disaster_id)
+        camps_by_disaster[name] = camps_by_disaster.get(name, 0) + count
+    
     stats = {
-        'total_camps': Camp.objects.count(),
-        'active_camps': Camp.objects.filter(status='active').count(),
-        'full_camps': Camp.objects.filter(status='full').count(),
-        'closed_camps': Camp.objects.filter(status='closed').count(),
-        'camps_by_type': list(
-            Camp.objects.values('camp_type')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        ),
-        'total_capacity': Camp.objects.aggregate(total=Sum('capacity'))['total'] or 0,
-        'total_population_capacity': Camp.objects.aggregate(total=Sum('population_capacity'))['total'] or 0,
-        'camps_by_disaster': list(
-            Camp.objects.values('disasters__name')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+        'total_camps': counters.count('shelters.camp'),
+        'active_camps': counters.count('shelters.camp', 'status', 'active'),
+        'full_camps': counters.count('shelters.camp', 'status', 'full'),
+        'closed_camps': counters.count('shelters.camp', 'status', 'closed'),
+        'camps_by_type': ranked(counters.buckets('shelters.camp', 'camp_type'), 'camp_type'),
+        'total_capacity': counters.count('shelters.camp', 'capacity'),
+        'total_population_capacity': counters.count('shelters.camp', 'population_capacity'),
+        'camps_by_disaster': ranked(camps_by_disaster, 'disasters__name')
     }
     
     return JsonResponse(stats)
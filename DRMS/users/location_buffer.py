@@ -0,0 +1,251 @@
+"""
+In-memory buffer for high-frequency location pings.
+
+Pings are collapsed per user (the newest timestamp wins) and written to the
+users table in periodic bulk_update batches instead of one full save() per
+ping. Until a ping is flushed, spatial lookups read it through
+buffered_location() / snapshot().
+
+Each worker process buffers and flushes its own pings. With a shared cache
+every process also publishes its pending pings there (at most once per
+LOCATION_PUBLISH_INTERVAL_SECONDS), and snapshot() / get() merge in the
+other processes' pings, so a lookup lags a ping by about a second
+whichever worker received it. With a process-local cache a lookup in
+another worker only sees the ping once it is flushed, up to
+LOCATION_FLUSH_INTERVAL_SECONDS later. A ping older than the location
+already stored in the database is discarded on flush.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+
+LOCATION_FLUSH_INTERVAL_SECONDS = 15
+# Flush early once this many users have pending pings
+LOCATION_FLUSH_MAX_PENDING = 1000
+LOCATION_FLUSH_BATCH_SIZE = 500
+# Volunteers' nearby feeds are rebuilt on flush only after moving this far
+FEED_REFRESH_MIN_MOVE_KM = 0.5
+# How often pending pings are published to a shared cache
+LOCATION_PUBLISH_INTERVAL_SECONDS = 1
+# Cache key listing the publishing processes ({token: expiry timestamp})
+SHARED_BUFFERS_KEY = 'users:location_buffers'
+SHARED_BUFFER_KEY = 'users:location_buffer:{}'
+
+logger = logging.getLogger(__name__)
+
+
+class LocationBuffer:
+    """Last-write-wins map of user_id -> (latitude, longitude, timestamp)"""
+
+    def __init__(self, interval=LOCATION_FLUSH_INTERVAL_SECONDS, max_pending=LOCATION_FLUSH_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._worker = None
+        # Identifies this process's pings in the shared cache
+        self._token = uuid.uuid4().hex
+        self._dirty = False
+        self._last_publish = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, user_id, latitude, longitude, timestamp):
+        """Buffer a ping, keeping only the newest one per user"""
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp >= current[2]:
+                self._pending[user_id] = (float(latitude), float(longitude), timestamp)
+                self._dirty = True
+        self._ensure_worker()
+        if time.monotonic() - self._last_publish >= LOCATION_PUBLISH_INTERVAL_SECONDS:
+            self.publish()
+
+    def get(self, user_id):
+        """Return the buffered (latitude, longitude, timestamp) for a user, or None"""
+        with self._lock:
+            ping = self._pending.get(user_id) or self._flushing.get(user_id)
+        for other in self._shared_buffers():
+            other_ping = other.get(user_id)
+            if other_ping and (ping is None or other_ping[2] > ping[2]):
+                ping = other_ping
+        return ping
+
+    def snapshot(self):
+        """Return every buffered position, including those being flushed and, with a shared cache, those of other processes"""
+        positions = self._local_snapshot()
+        for other in self._shared_buffers():
+            for user_id, ping in other.items():
+                current = positions.get(user_id)
+                if current is None or ping[2] > current[2]:
+                    positions[user_id] = ping
+        return positions
+
+    def _local_snapshot(self):
+        with self._lock:
+            positions = dict(self._flushing)
+            positions.update(self._pending)
+            return positions
+
+    def _shared_buffers(self):
+        """The pending pings other processes published to the shared cache"""
+        from api.conditional import cache_is_shared
+
+        if not cache_is_shared():
+            return []
+        tokens = cache.get(SHARED_BUFFERS_KEY) or {}
+        keys = [SHARED_BUFFER_KEY.format(token) for token in tokens if token != self._token]
+        return list(cache.get_many(keys).values()) if keys else []
+
+    def publish(self):
+        """
+        With a shared cache, write this process's pending pings there so
+        other workers' lookups see them before they are flushed
+        """
+        from api.conditional import cache_is_shared
+
+        if not cache_is_shared():
+            return
+        with self._lock:
+            was_dirty, self._dirty = self._dirty, False
+            self._last_publish = time.monotonic()
+        if not was_dirty:
+            return
+        positions = self._local_snapshot()
+        # Outlives a few flush intervals, so a dead process's pings expire
+        timeout = self.interval * 4
+        if positions:
+            cache.set(SHARED_BUFFER_KEY.format(self._token), positions, timeout)
+        else:
+            cache.delete(SHARED_BUFFER_KEY.format(self._token))
+
+        now = time.time()
+        tokens = cache.get(SHARED_BUFFERS_KEY) or {}
+        if tokens.get(self._token, 0) < now + timeout / 2:
+            # Read-modify-write: a registration lost to a concurrent one is redone on the next publish
+            tokens = {token: expires for token, expires in tokens.items() if expires > now}
+            tokens[self._token] = now + timeout
+            cache.set(SHARED_BUFFERS_KEY, tokens, None)
+
+    def flush_due(self):
+        return bool(self._pending) and (
+            len(self._pending) >= self.max_pending
+            or time.monotonic() - self._last_flush >= self.interval
+        )
+
+    def maybe_flush(self):
+        """Flush if the interval has elapsed or too many pings are waiting"""
+        if self.flush_due():
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """Write the buffered positions with bulk_update; returns the number of users updated"""
+        from users.models import User
+        from operations.feeds import refresh_volunteer_feed
+        from operations.utils import calculate_distance, grid_cell_for
+
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+                flushing = self._flushing
+            if not flushing:
+                return 0
+
+            try:
+                users = list(User.objects.filter(id__in=list(flushing)).only(
+                    'id', 'role', 'latitude', 'longitude', 'location_updated_at', 'grid_cell'
+                ))
+                moved = []
+                feed_stale = []
+                for user in users:
+                    latitude, longitude, timestamp = flushing[user.id]
+                    if user.location_updated_at and user.location_updated_at > timestamp:
+                        # The profile was updated after this ping was taken
+                        continue
+                    if user.role == 'volunteer' and (
+                        user.latitude is None or user.longitude is None
+                        or calculate_distance(user.latitude, user.longitude, latitude, longitude) >= FEED_REFRESH_MIN_MOVE_KM
+                    ):
+                        feed_stale.append(user)
+                    user.latitude = round(latitude, 6)
+                    user.longitude = round(longitude, 6)
+                    user.location_updated_at = timestamp
+                    user.grid_cell = grid_cell_for(user.latitude, user.longitude)
+                    moved.append(user)
+                User.objects.bulk_update(
+                    moved, ['latitude', 'longitude', 'location_updated_at', 'grid_cell'],
+                    batch_size=LOCATION_FLUSH_BATCH_SIZE
+                )
+            except Exception:
+                # Put the pings back (unless newer ones arrived) so the next flush retries them
+                with self._lock:
+                    for user_id, ping in flushing.items():
+                        current = self._pending.get(user_id)
+                        if current is None or ping[2] > current[2]:
+                            self._pending[user_id] = ping
+                    self._flushing = {}
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self._dirty = True
+            # Take the flushed pings out of the shared cache; they are in the database now
+            self.publish()
+
+            # bulk_update skips the post_save signals that keep the nearby feeds in sync
+            for user in feed_stale:
+                refresh_volunteer_feed(user)
+            return len(moved)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='location-buffer-flush', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        from api.conditional import cache_is_shared
+
+        while True:
+            time.sleep(min(self.interval, LOCATION_PUBLISH_INTERVAL_SECONDS) if cache_is_shared() else self.interval)
+            if self._dirty:
+                self.publish()
+            if not self.flush_due():
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # Pings stay buffered and are retried on the next tick
+                logger.exception('Flushing %d buffered location pings failed', len(self._pending))
+            finally:
+                close_old_connections()
+
+
+location_buffer = LocationBuffer()
+
+
+def buffered_location(user, positions=None):
+    """
+    Return the freshest known (latitude, longitude) for a user: a buffered
+    ping newer than the stored location, else the stored one.
+    positions is a snapshot() to look the ping up in, for callers
+    resolving many users
+    """
+    ping = location_buffer.get(user.pk) if positions is None else positions.get(user.pk)
+    if ping and (user.location_updated_at is None or ping[2] >= user.location_updated_at):
+        return ping[0], ping[1]
+    return user.latitude, user.longitude
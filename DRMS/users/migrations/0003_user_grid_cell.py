@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-17 09:12
+
+from math import floor
+
+from django.db import migrations, models
+
+# Frozen copy of operations.utils.grid_cell_for as of this migration, so
+# later changes to the live grid cannot change what the migration writes
+GRID_CELL_DEGREES = 0.5
+GRID_LAT_CELLS = int(180 / GRID_CELL_DEGREES)
+GRID_LON_CELLS = int(360 / GRID_CELL_DEGREES)
+
+
+def grid_cell_for(lat, lon):
+    lat_idx = min(int(floor((float(lat) + 90) / GRID_CELL_DEGREES)), GRID_LAT_CELLS - 1)
+    lon_idx = int(floor((float(lon) + 180) / GRID_CELL_DEGREES)) % GRID_LON_CELLS
+    return f"{max(lat_idx, 0)}:{lon_idx}"
+
+
+def populate_grid_cells(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    users = list(User.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude'))
+    for user in users:
+        user.grid_cell = grid_cell_for(user.latitude, user.longitude)
+    User.objects.bulk_update(users, ['grid_cell'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_managers_user_current_location_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='grid_cell',
+            field=models.CharField(blank=True, editable=False, help_text='Spatial grid cell of the current location (derived from latitude/longitude)', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['grid_cell'], name='users_grid_ce_52e15a_idx'),
+        ),
+        migrations.RunPython(populate_grid_cells, migrations.RunPython.noop),
+    ]
@@ -60,6 +60,10 @@ class User(AbstractUser):
         help_text="Longitude coordinate"
     )
     location_updated_at = models.DateTimeField(null=True, blank=True, help_text="When location was last updated")
+    grid_cell = models.CharField(
+        max_length=16, blank=True, editable=False,
+        help_text="Spatial grid cell of the current location (derived from latitude/longitude)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     objects = CustomUserManager()
@@ -71,6 +75,7 @@ class User(AbstractUser):
             models.Index(fields=['role']),
             models.Index(fields=['username']),
             models.Index(fields=['latitude', 'longitude']),  # For location-based queries
+            models.Index(fields=['grid_cell']),  # For radius searches
         ]
         constraints = [
             models.CheckConstraint(
@@ -82,6 +87,16 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+    def save(self, *args, **kwargs):
+        from operations.utils import grid_cell_for
+
+        # Keep the spatial grid cell in sync with the coordinates
+        self.grid_cell = grid_cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'grid_cell'}
+        super().save(*args, **kwargs)
+
     @classmethod
     def create_superuser(cls, username, email=None, password=None, **extra_fields):
         extra_fields.setdefault('role', 'super_admin')
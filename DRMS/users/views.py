@@ -1,5 +1,4 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -12,6 +11,9 @@ import json
 from .models import User, Volunteer, Victim, CampAdmin, VolunteerSkill
 from operations.models import TaskAssignment, HelpRequest
 from shelters.models import Camp
+from api.pagination import paginate_keyset, PaginationError
+from api.stats import read_counters, ranked
+from api.renderers import FastJsonResponse as JsonResponse
 
 
 # ========================================
@@ -23,6 +25,7 @@ from shelters.models import Camp
 def list_users(request):
     """
     List all users with optional filtering (admin only)
+    Paginated with ?cursor= and ?page_size=
     """
     if request.user.role not in ['super_admin', 'camp_admin']:
         return JsonResponse({'error': 'Unauthorized. Admin role required.'}, status=403)
@@ -39,10 +42,13 @@ def list_users(request):
     if is_active is not None:
         users = users.filter(is_active=is_active.lower() == 'true')
     
-    users = users.order_by('username')
+    try:
+        page = paginate_keyset(users, request.GET, ('username',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     user_list = []
-    for user in users:
+    for user in page:
         user_list.append({
             'id': user.id,
             'username': user.username,
@@ -56,7 +62,7 @@ def list_users(request):
             'created_at': user.created_at.isoformat()
         })
     
-    return JsonResponse({'users': user_list}, safe=False)
+    return JsonResponse({'users': user_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -216,6 +222,7 @@ def my_profile(request):
 def list_volunteers(request):
     """
     List all volunteers
+    Paginated with ?cursor= and ?page_size=
     """
     volunteers = Volunteer.objects.all()
     
@@ -224,8 +231,13 @@ def list_volunteers(request):
     if availability is not None:
         volunteers = volunteers.filter(availability=availability.lower() == 'true')
     
+    try:
+        page = paginate_keyset(volunteers.select_related('user').prefetch_related('skills'), request.GET, ('id',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
     volunteer_list = []
-    for volunteer in volunteers:
+    for volunteer in page:
         volunteer_list.append({
             'id': volunteer.id,
             'user_id': volunteer.user.id,
@@ -241,7 +253,7 @@ def list_volunteers(request):
             } for skill in volunteer.skills.all()]
         })
     
-    return JsonResponse({'volunteers': volunteer_list}, safe=False)
+    return JsonResponse({'volunteers': volunteer_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -327,6 +339,7 @@ def available_volunteers(request):
 def volunteer_tasks(request, volunteer_id):
     """
     Get tasks assigned to a volunteer
+    Paginated with ?cursor= and ?page_size=
     """
     volunteer_user = get_object_or_404(User, id=volunteer_id, role='volunteer')
     
@@ -334,19 +347,23 @@ def volunteer_tasks(request, volunteer_id):
     if request.user.id != volunteer_id and request.user.role not in ['super_admin', 'camp_admin']:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     
-    tasks = TaskAssignment.objects.filter(volunteer=volunteer_user).order_by('-assigned_at')
+    tasks = TaskAssignment.objects.filter(volunteer=volunteer_user)
+    try:
+        page = paginate_keyset(tasks, request.GET, ('-assigned_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     task_list = []
-    for task in tasks:
+    for task in page:
         task_list.append({
             'id': task.id,
             'task_description': task.task_description,
-            'help_request_id': task.help_request.id if task.help_request else None,
+            'help_request_id': task.help_request_id,
             'status': task.status,
             'assigned_at': task.assigned_at.isoformat()
         })
     
-    return JsonResponse({'tasks': task_list}, safe=False)
+    return JsonResponse({'tasks': task_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 # ========================================
@@ -358,11 +375,12 @@ def volunteer_tasks(request, volunteer_id):
 def list_victims(request):
     """
     List all victims (admin only)
+    Paginated with ?cursor= and ?page_size=
     """
     if request.user.role not in ['super_admin', 'camp_admin']:
         return JsonResponse({'error': 'Unauthorized. Admin role required.'}, status=403)
     
-    victims = Victim.objects.all().order_by('-registration_date')
+    victims = Victim.objects.all()
     
     # Filter by priority
     priority = request.GET.get('priority')
@@ -374,8 +392,13 @@ def list_victims(request):
     if high_risk is not None:
         victims = victims.filter(is_high_risk=high_risk.lower() == 'true')
     
+    try:
+        page = paginate_keyset(victims.select_related('user'), request.GET, ('-registration_date',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
     victim_list = []
-    for victim in victims:
+    for victim in page:
         victim_list.append({
             'id': victim.id,
             'user_id': victim.user.id,
@@ -393,7 +416,7 @@ def list_victims(request):
             'registration_date': victim.registration_date.isoformat()
         })
     
-    return JsonResponse({'victims': victim_list}, safe=False)
+    return JsonResponse({'victims': victim_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 @login_required
@@ -491,6 +514,7 @@ def high_priority_victims(request):
 def victim_help_requests(request, victim_id):
     """
     Get help requests made by a victim
+    Paginated with ?cursor= and ?page_size=
     """
     victim_user = get_object_or_404(User, id=victim_id, role='victim')
     
@@ -498,10 +522,14 @@ def victim_help_requests(request, victim_id):
     if request.user.id != victim_id and request.user.role not in ['super_admin', 'camp_admin']:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     
-    help_requests = HelpRequest.objects.filter(victim=victim_user).order_by('-requested_at')
+    help_requests = HelpRequest.objects.filter(victim=victim_user)
+    try:
+        page = paginate_keyset(help_requests.select_related('disasters'), request.GET, ('-requested_at',))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     request_list = []
-    for req in help_requests:
+    for req in page:
         request_list.append({
             'id': req.id,
             'disaster_name': req.disasters.name,
@@ -511,7 +539,7 @@ def victim_help_requests(request, victim_id):
             'requested_at': req.requested_at.isoformat()
         })
     
-    return JsonResponse({'help_requests': request_list}, safe=False)
+    return JsonResponse({'help_requests': request_list, 'next_cursor': page.next_cursor, 'has_more': page.has_more}, safe=False)
 
 
 # ========================================
@@ -572,21 +600,16 @@ def user_statistics(request):
     if request.user.role not in ['super_admin', 'camp_admin']:
         return JsonResponse({'error': 'Unauthorized. Admin role required.'}, status=403)
     
+    counters = read_counters('users.user', 'users.volunteer', 'users.victim', 'users.campadmin')
     stats = {
-        'total_users': User.objects.count(),
-        'users_by_role': list(
-            User.objects.values('role')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        ),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'total_volunteers': Volunteer.objects.count(),
-        'available_volunteers': Volunteer.objects.filter(availability=True).count(),
-        'total_victims': Victim.objects.count(),
-        'high_priority_victims': Victim.objects.filter(
-            Q(priority_level__in=['high', 'critical']) | Q(is_high_risk=True)
-        ).count(),
-        'total_camp_admins': CampAdmin.objects.count(),
+        'total_users': counters.count('users.user'),
+        'users_by_role': ranked(counters.buckets('users.user', 'role'), 'role'),
+        'active_users': counters.count('users.user', 'is_active', 'True'),
+        'total_volunteers': counters.count('users.volunteer'),
+        'available_volunteers': counters.count('users.volunteer', 'availability', 'True'),
+        'total_victims': counters.count('users.victim'),
+        'high_priority_victims': counters.count('users.victim', 'high_priority', 'True'),
+        'total_camp_admins': counters.count('users.campadmin'),
         'users_by_month': list(
             User.objects.extra(
                 select={'month': "DATE_TRUNC('month', created_at)"}